@@ -0,0 +1,517 @@
+import argparse
+import csv
+import gc
+import json
+import os
+import struct
+import sys
+import time
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from config_manager import ConfigManager
+from document_processor import DocumentProcessor
+from credential_generator import CredentialGenerator
+from job_journal import (
+    JobJournal, row_key, credential_hash, fsync_directory, fsync_path, load_journal_key,
+    PENDING, DONE, FAILED
+)
+from output_planner import ArchivePlanner, OutputPlanner
+from template_catalog import TemplateCatalog
+from utils.logger import (
+    Logger, attach_to_queue, configure_logging, end_bulk_summary,
+    multiprocess_log_queue, start_bulk_summary
+)
+from utils.metrics import configure_metrics
+from utils.profiling import configure_profiling, profiler
+
+# Local file header of a zip entry, see APPNOTE.TXT 4.3.7
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+# Per-process state, set up once by the pool initializer
+_doc_processor = None
+_to_archive = False
+_max_rss = 0
+_credential_key = None
+
+def init_worker(config, log_queue=None, to_archive=False, credential_key=None):
+    """Create the document processor once per worker process
+
+    With log_queue, the worker's log records go to the parent's listener.
+    With to_archive, documents are rendered in memory and sent back to the
+    parent, which writes them into the archive. With credential_key, each
+    result carries the keyed hash of the row's credentials for the journal.
+    """
+    global _doc_processor, _to_archive, _max_rss, _credential_key
+    _to_archive = to_archive
+    _credential_key = credential_key
+    _max_rss = config.get("bulk_settings", {}).get("max_worker_rss_mb", 0) * 1024 * 1024
+    if log_queue is not None:
+        attach_to_queue(log_queue)
+    configure_metrics(config.get("metrics"))
+    configure_profiling(config.get("profiling"))
+    _doc_processor = DocumentProcessor(config)
+
+def render_row(task):
+    """Render the document for one validated row with its issued credentials
+
+    Returns ((row_number, name, success, message, output_path, credential_hash),
+    document bytes). The bytes are None unless rendering for an archive,
+    in which case output_path is the archive member name. Otherwise it is
+    the file created, which has the next free name if another process
+    took the planned one.
+    """
+    row_number, name, username, template_path, schema, output_path, (pin, print_pin, password) = task
+
+    try:
+        replacements = _doc_processor.create_replacements_dict(
+            name, username, pin, print_pin, password, schema
+        )
+        data = None
+        if _to_archive:
+            success, message, data = _doc_processor.render_to_bytes(
+                template_path,
+                replacements,
+                label=output_path
+            )
+        else:
+            success, message, output_path = _doc_processor.create_document(
+                template_path,
+                output_path,
+                replacements
+            )
+        issued = credential_hash(_credential_key, pin, print_pin, password) if _credential_key else None
+        return (row_number, name, success, message, output_path, issued), data
+
+    except Exception as e:
+        return (row_number, name, False, str(e), None, None), None
+
+def render_rows(tasks):
+    """Render a chunk of rows in a worker
+
+    Returns the render_row results and the worker's resident set size in
+    bytes afterwards (None if it cannot be measured). A worker over its
+    memory ceiling runs the cycle collector first, since lxml trees held
+    in reference cycles are otherwise freed late.
+    """
+    rendered = [render_row(task) for task in tasks]
+    rss = current_rss()
+    if _max_rss and rss and rss > _max_rss:
+        gc.collect()
+        rss = current_rss()
+    return rendered, rss
+
+def current_rss():
+    """Resident set size of this process in bytes, or None if it cannot be read
+
+    Uses psutil when it is installed and /proc on Linux otherwise.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def prepare_tasks(rows, catalog, cred_generator, output_planner):
+    """Validate rows, then plan output paths and issue credentials for the valid ones in a single batch
+
+    Templates and their schemas come from the template catalog, which
+    indexes every template once however many rows use it. Output paths
+    are planned here rather than in the workers, so rows with the same
+    name never race for one file. Returns the render tasks and the
+    results for rows that failed validation.
+    """
+    valid = []
+    invalid = []
+    for row_number, row in rows:
+        if isinstance(row, ValueError):
+            invalid.append((row_number, "", False, str(row), None, None))
+            continue
+
+        name = str(row.get("name") or "").strip()
+        username = str(row.get("username") or "").strip()
+        template = str(row.get("template") or "").strip()
+
+        if not template:
+            invalid.append((row_number, name, False, "Template is required", None, None))
+            continue
+
+        entry = catalog.get(template)
+        if entry is None:
+            invalid.append((row_number, name, False, f"Unknown template: {template}", None, None))
+            continue
+
+        missing = entry.schema.missing_fields({"name": name, "username": username})
+        if missing:
+            verb = "is" if len(missing) == 1 else "are"
+            message = f"{' and '.join(missing)} {verb} required for this template"
+            invalid.append((row_number, name, False, message, None, None))
+            continue
+
+        valid.append((row_number, name, username, entry.path, entry.schema))
+
+    credentials = cred_generator.generate_credentials_batch(
+        [schema for _, _, _, _, schema in valid]
+    )
+    output_paths = output_planner.plan_batch([name for _, name, _, _, _ in valid])
+    tasks = [
+        task + (output_path, issued)
+        for task, output_path, issued in zip(valid, output_paths, credentials)
+    ]
+    return tasks, invalid
+
+def read_rows(input_path, default_template=None):
+    """Yield (row_number, row) pairs from a CSV or JSONL file
+
+    A row that cannot be parsed is yielded as a ValueError saying why, so
+    it fails on its own instead of ending the run.
+    """
+    with open(input_path, 'r', encoding='utf-8-sig', newline='') as f:
+        if input_path.lower().endswith(('.jsonl', '.ndjson')):
+            rows = _json_rows(f)
+        else:
+            rows = _csv_rows(f)
+
+        for row_number, row in enumerate(rows, start=1):
+            if not isinstance(row, ValueError):
+                row = {key.strip().lower(): value for key, value in row.items() if key}
+                if default_template and not row.get("template"):
+                    row["template"] = default_template
+            yield row_number, row
+
+def _json_rows(f):
+    for line in f:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON: {str(e)}")
+            continue
+        yield row if isinstance(row, dict) else ValueError("Row is not a JSON object")
+
+def _csv_rows(f):
+    reader = csv.DictReader(f)
+    while True:
+        try:
+            yield next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield ValueError(f"Invalid CSV row: {str(e)}")
+
+def open_archive(archive_path, expected=()):
+    """Open the output archive, appending to it when resuming a run that already wrote to it
+
+    expected holds the member names of the documents the journal says a
+    previous run rendered. The existing archive is only appended to if it
+    passes its CRC check and holds all of them. A run killed mid-write
+    leaves no central directory of its own (zipfile would then find the
+    one of the last stored .docx instead), so such an archive is rebuilt
+    from the documents that were written completely; the caller
+    re-renders the rows whose documents are missing.
+
+    Documents are stored, not deflated again: a .docx is already compressed.
+    """
+    if not expected or not os.path.exists(archive_path):
+        return zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_STORED)
+
+    try:
+        with zipfile.ZipFile(archive_path) as existing:
+            members = existing.infolist()
+            intact = (
+                bool(members) and members[0].header_offset == 0 and
+                set(expected) <= {member.filename for member in members} and
+                existing.testzip() is None
+            )
+    except (zipfile.BadZipFile, OSError):
+        intact = False
+    if intact:
+        return zipfile.ZipFile(archive_path, 'a', zipfile.ZIP_STORED)
+
+    damaged_path = archive_path + ".damaged"
+    os.replace(archive_path, damaged_path)
+    archive = zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_STORED)
+    recovered = salvage_archive(damaged_path, archive)
+    os.remove(damaged_path)
+    Logger().warning(f"Archive {archive_path} was incomplete; recovered {recovered} documents")
+    return archive
+
+def salvage_archive(damaged_path, archive):
+    """Copy the complete documents of a damaged archive into archive
+
+    Entries are read from their local headers in order, so this works
+    without a central directory. Reading stops at the first entry that is
+    torn or fails its CRC. Returns the number of documents copied.
+    """
+    recovered = 0
+    with open(damaged_path, 'rb') as f:
+        while True:
+            header = f.read(_LOCAL_HEADER.size)
+            if len(header) < _LOCAL_HEADER.size:
+                break
+            (signature, _, _, flags, method, dos_time, dos_date,
+             crc, size, _, name_length, extra_length) = _LOCAL_HEADER.unpack(header)
+            # Stored entries written by writestr carry their size in the header
+            if signature != _LOCAL_HEADER_SIGNATURE or flags & 0x08 or method != zipfile.ZIP_STORED:
+                break
+            name = f.read(name_length)
+            f.seek(extra_length, os.SEEK_CUR)
+            data = f.read(size)
+            if len(name) < name_length or len(data) < size or zlib.crc32(data) != crc:
+                break
+
+            date_time = (
+                (dos_date >> 9) + 1980, (dos_date >> 5) & 0xF, dos_date & 0x1F,
+                dos_time >> 11, (dos_time >> 5) & 0x3F, (dos_time & 0x1F) * 2
+            )
+            info = zipfile.ZipInfo(name.decode('utf-8' if flags & 0x800 else 'cp437'), date_time=date_time)
+            info.compress_type = zipfile.ZIP_STORED
+            archive.writestr(info, data)
+            recovered += 1
+    return recovered
+
+def run_bulk(config, input_path, workers=None, chunk_size=None, default_template=None,
+             journal_path=None, archive_path=None):
+    """Render every row of the input file across a process pool
+
+    With a journal, rows a previous run already rendered are skipped and
+    every row's outcome is recorded. With archive_path, the documents are
+    rendered in memory and streamed into one .zip archive instead of the
+    dated output folders. Returns (succeeded, failures, skipped, elapsed,
+    workers); failures holds the results of the rows that failed, in row
+    order, and succeeded only counts the others.
+
+    The input is read one chunk at a time and at most max_in_flight_rows
+    rows are queued for the workers, so memory use does not grow with the
+    size of the input: finished rows are counted, not kept, and the
+    journal only remembers which rows are done. The worker pool is replaced after
+    max_tasks_per_worker rows per worker, or as soon as a worker reports a
+    resident set over max_worker_rss_mb.
+    """
+    bulk_settings = config.get("bulk_settings", {})
+    workers = workers or bulk_settings.get("workers") or os.cpu_count()
+    chunk_size = chunk_size or bulk_settings.get("chunk_size", 16)
+    max_in_flight = bulk_settings.get("max_in_flight_rows") or workers * chunk_size * 2
+    max_pool_rows = bulk_settings.get("max_tasks_per_worker", 0) * workers
+    max_rss = bulk_settings.get("max_worker_rss_mb", 0) * 1024 * 1024
+
+    archive = None
+
+    def sync_outputs(outputs):
+        """Force the documents of rows about to be journalled as done to disk"""
+        if archive is not None:
+            if archive.fp is not None:
+                archive.fp.flush()
+            fsync_path(archive_path)
+            fsync_directory(os.path.dirname(os.path.abspath(archive_path)))
+            return
+        directories = set()
+        for output in outputs:
+            fsync_path(output)
+            directories.add(os.path.dirname(os.path.abspath(output)))
+        for directory in directories:
+            fsync_directory(directory)
+
+    journal = JobJournal(
+        journal_path,
+        flush_every=bulk_settings.get("journal_flush_every", 100),
+        before_flush=sync_outputs
+    ) if journal_path else None
+    key_path = bulk_settings.get("journal_key_path")
+    credential_key = load_journal_key(key_path) if journal and key_path else None
+
+    archived = None
+    if archive_path:
+        archive = open_archive(archive_path, journal.done_outputs() if journal else ())
+        archived = set(archive.namelist())
+        output_planner = ArchivePlanner(archived)
+    else:
+        output_planner = OutputPlanner(config)
+
+    logger = Logger()
+    catalog = TemplateCatalog(config)
+    cred_generator = CredentialGenerator(config)
+    succeeded = 0
+    failures = []
+    keys = {}
+    skipped = 0
+    start = time.perf_counter()
+
+    def read_chunks():
+        """Yield chunks of rows still to render, reading the input only as they are needed"""
+        nonlocal skipped
+        chunk = []
+        for row_number, row in read_rows(input_path, default_template):
+            key = row_key(row if isinstance(row, dict) else str(row))
+            # In an archive run a row is only done if its document made it into the archive
+            if journal and journal.is_done(row_number, key) and (
+                    archived is None or journal.output(row_number) in archived):
+                skipped += 1
+                continue
+            keys[row_number] = key
+            if journal:
+                journal.record(row_number, key, PENDING)
+            chunk.append((row_number, row))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def record(result):
+        nonlocal succeeded
+        row_number, _, success, message, output_path, issued = result
+        if success:
+            succeeded += 1
+        else:
+            failures.append(result)
+        key = keys.pop(row_number)
+        if journal:
+            journal.record(
+                row_number,
+                key,
+                DONE if success else FAILED,
+                output=output_path if success else None,
+                credential_hash=issued,
+                message=None if success else message
+            )
+
+    def collect(future):
+        """Record a finished chunk; returns True if its worker is over the memory ceiling"""
+        rendered, rss = future.result()
+        for result, data in rendered:
+            if data is not None:
+                info = zipfile.ZipInfo(result[4], date_time=time.localtime()[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                archive.writestr(info, data)
+            record(result)
+        if max_rss and rss and rss > max_rss:
+            logger.info(f"Worker resident set {rss / 1048576:.0f} MB is over {max_rss / 1048576:.0f} MB")
+            return True
+        return False
+
+    log_queue = multiprocess_log_queue()
+    start_bulk_summary(config.get("logging", {}).get("bulk_summary_interval"))
+    executor = None
+    in_flight = set()
+    try:
+        # The batch report covers the main process: validation, credentials, planning and archive writes
+        with profiler.profile("bulk", os.path.basename(input_path),
+                              sampled=not profiler.settings["every_batch"]):
+            pool_rows = 0
+            recycle = False
+            for chunk in read_chunks():
+                tasks, invalid = prepare_tasks(chunk, catalog, cred_generator, output_planner)
+                for result in invalid:
+                    record(result)
+                if not tasks:
+                    continue
+
+                if executor is not None and recycle:
+                    # Let the old workers finish their chunks, then start fresh processes
+                    for future in in_flight:
+                        collect(future)
+                    in_flight = set()
+                    executor.shutdown(wait=True)
+                    executor = None
+                    logger.info(f"Recycled the worker pool after {pool_rows} rows")
+                if executor is None:
+                    executor = ProcessPoolExecutor(
+                        max_workers=workers,
+                        initializer=init_worker,
+                        initargs=(config, log_queue, archive is not None, credential_key)
+                    )
+                    pool_rows = 0
+                    recycle = False
+
+                # Backpressure: no more rows are read until the queue has room
+                while in_flight and len(in_flight) * chunk_size >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if collect(future):
+                            recycle = True
+
+                in_flight.add(executor.submit(render_rows, tasks))
+                pool_rows += len(tasks)
+                if max_pool_rows and pool_rows >= max_pool_rows:
+                    recycle = True
+
+            for future in in_flight:
+                collect(future)
+            in_flight = set()
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        end_bulk_summary()
+        if archive:
+            # Writes the central directory, so an interrupted run still leaves a readable archive
+            archive.close()
+        if journal:
+            journal.close()
+
+    elapsed = time.perf_counter() - start
+    failures.sort(key=lambda result: result[0])
+    return succeeded, failures, skipped, elapsed, workers
+
+def print_summary(succeeded, failures, skipped, elapsed, workers):
+    """Print throughput and failures for a finished run"""
+    processed = succeeded + len(failures)
+    rate = processed / elapsed if elapsed > 0 else 0.0
+
+    print(f"Rows processed: {processed} ({workers} workers)")
+    if skipped:
+        print(f"Skipped (already done): {skipped}")
+    print(f"Succeeded: {succeeded}")
+    print(f"Failed: {len(failures)}")
+    print(f"Elapsed: {elapsed:.2f}s ({rate:.1f} documents/s)")
+
+    for row_number, name, _, message, _, _ in failures:
+        print(f"  Row {row_number} ({name or 'no name'}): {message}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate documents in bulk from a CSV or JSONL file"
+    )
+    parser.add_argument("input", help="CSV or JSONL file with name, username and template columns")
+    parser.add_argument("--template", help="Template used for rows that do not name one")
+    parser.add_argument("--workers", type=int, help="Number of worker processes")
+    parser.add_argument("--chunk-size", type=int, help="Rows sent to a worker per task")
+    parser.add_argument("--journal", help="Job journal file (default: <input>.journal)")
+    parser.add_argument("--no-journal", action="store_true", help="Do not record or resume progress")
+    parser.add_argument("--zip", help="Write all documents into this .zip archive instead of the output folders")
+    args = parser.parse_args(argv)
+
+    journal_path = None
+    if not args.no_journal:
+        journal_path = args.journal or f"{args.input}.journal"
+
+    config_manager = ConfigManager()
+    configure_logging(config_manager.config.get("logging"))
+    configure_metrics(config_manager.config.get("metrics"))
+    configure_profiling(config_manager.config.get("profiling"))
+    logger = Logger()
+    logger.info(f"Starting bulk run: {args.input}")
+
+    succeeded, failures, skipped, elapsed, workers = run_bulk(
+        config_manager.config,
+        args.input,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        default_template=args.template,
+        journal_path=journal_path,
+        archive_path=args.zip
+    )
+    print_summary(succeeded, failures, skipped, elapsed, workers)
+
+    logger.info(f"Bulk run finished: {succeeded} succeeded, {len(failures)} failed")
+    return 0 if not failures else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
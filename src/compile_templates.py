@@ -0,0 +1,91 @@
+import argparse
+import glob
+import os
+import sys
+from config_manager import ConfigManager
+from template_artifact import ARTIFACT_SUFFIX, TemplateArtifact, artifact_path, compile_artifact
+from template_catalog import TemplateCatalog
+from utils.logger import Logger, configure_logging
+
+def compile_templates(config, directory=None, prune=False, force=False):
+    """Compile every catalogued template into an artifact named by its content hash
+
+    An artifact that already exists for a template's current content is
+    kept. With prune, artifacts of content no template has any more are
+    removed. An artifact mapped by a running renderer cannot be replaced
+    or removed on Windows; it is skipped and left for a later run.
+    Returns (compiled, unchanged, removed, skipped) lists.
+    """
+    logger = Logger()
+    directory = directory or config.get("template_artifacts", {}).get("directory", "resources/compiled")
+    os.makedirs(directory, exist_ok=True)
+
+    compiled, unchanged, skipped = [], [], []
+    current = set()
+    for entry in TemplateCatalog(config).entries():
+        destination = artifact_path(directory, entry.content_hash)
+        current.add(os.path.basename(destination))
+        if not force and _is_current(destination, entry.content_hash):
+            unchanged.append(entry.name)
+            continue
+        try:
+            compile_artifact(entry.path, destination, entry.content_hash)
+        except PermissionError as e:
+            logger.warning(f"Skipped template artifact in use: {entry.name} ({str(e)})")
+            skipped.append(entry.name)
+            continue
+        logger.info(f"Compiled template artifact: {entry.name} -> {os.path.basename(destination)}")
+        compiled.append(entry.name)
+
+    removed = []
+    if prune:
+        for path in glob.glob(os.path.join(directory, "*" + ARTIFACT_SUFFIX)):
+            if os.path.basename(path) not in current:
+                try:
+                    os.remove(path)
+                except PermissionError as e:
+                    logger.warning(f"Skipped removing template artifact in use: {str(e)}")
+                    skipped.append(os.path.basename(path))
+                    continue
+                removed.append(os.path.basename(path))
+    return compiled, unchanged, removed, skipped
+
+def _is_current(destination, content_hash):
+    if not os.path.exists(destination):
+        return False
+    try:
+        artifact = TemplateArtifact(destination)
+    except (OSError, ValueError):
+        return False
+    try:
+        return artifact.content_hash == content_hash
+    finally:
+        artifact.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compile the templates into memory-mappable artifacts shared by all renderers"
+    )
+    parser.add_argument("--directory", help="Artifact directory (default from config: resources/compiled)")
+    parser.add_argument("--prune", action="store_true", help="Remove artifacts no current template uses")
+    parser.add_argument("--force", action="store_true", help="Recompile templates that already have an artifact")
+    args = parser.parse_args(argv)
+
+    config_manager = ConfigManager()
+    configure_logging(config_manager.config.get("logging"))
+
+    compiled, unchanged, removed, skipped = compile_templates(
+        config_manager.config, args.directory, prune=args.prune, force=args.force
+    )
+    print(
+        f"Compiled: {len(compiled)}, unchanged: {len(unchanged)}, removed: {len(removed)}, "
+        f"skipped (in use): {len(skipped)}"
+    )
+    for name in compiled:
+        print(f"  {name}")
+    for name in skipped:
+        print(f"  in use, retry when the renderers are stopped: {name}")
+    return 1 if skipped else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
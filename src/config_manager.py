@@ -1,48 +1,123 @@
 import json
 import os
+import sys
+import tempfile
+import threading
+import time
 from utils.logger import Logger
-import customtkinter
+
+def show_error_dialog(title, message):
+    """Show an error dialog if the GUI is loaded; headless callers only get the log entry"""
+    if "tkinter" not in sys.modules:
+        return
+    try:
+        from tkinter import messagebox
+        messagebox.showerror(title, message)
+    except Exception:
+        pass
 
 class ConfigManager:
-    def __init__(self):
+    """Parsed config.json, reloaded in place when the file changes on disk"""
+    def __init__(self, config_file=None, check_interval=1.0):
         self.logger = Logger()
         self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.config_file = os.path.join(self.base_dir, 'config.json')
+        self.config_file = config_file or os.path.join(self.base_dir, 'config.json')
         self.theme_file = os.path.join(self.base_dir, 'resources/themes/theme.json')
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._stamp = None
+        self._last_check = time.monotonic()
         self.config = self.load_config()
         self.theme = self.load_theme()
         self.resolve_paths()
     
-    def resolve_paths(self):
+    def resolve_paths(self, config=None):
         """Convert relative paths to absolute paths"""
+        config = self.config if config is None else config
         # Resolve template directory
-        if not os.path.isabs(self.config["template_directory"]):
-            self.config["template_directory"] = os.path.join(
+        if not os.path.isabs(config["template_directory"]):
+            config["template_directory"] = os.path.join(
                 self.base_dir,
-                self.config["template_directory"]
+                config["template_directory"]
             )
 
         # Create template directory if it doesn't exist
-        if not os.path.exists(self.config["template_directory"]):
-            os.makedirs(self.config["template_directory"])
-            self.logger.info(f"Created template directory: {self.config['template_directory']}")
+        if not os.path.exists(config["template_directory"]):
+            os.makedirs(config["template_directory"])
+            self.logger.info(f"Created template directory: {config['template_directory']}")
+
+        # Resolve compiled template artifacts
+        artifacts = config.get("template_artifacts")
+        if artifacts and not os.path.isabs(artifacts["directory"]):
+            artifacts["directory"] = os.path.join(self.base_dir, artifacts["directory"])
+
+        # Resolve the key for credential hashes in bulk job journals
+        key_path = config.get("bulk_settings", {}).get("journal_key_path")
+        if key_path and not os.path.isabs(key_path):
+            config["bulk_settings"]["journal_key_path"] = os.path.join(self.base_dir, key_path)
+
+        # Resolve PIN registry database
+        pin_registry = config.get("pin_registry")
+        if pin_registry and not os.path.isabs(pin_registry["path"]):
+            pin_registry["path"] = os.path.join(self.base_dir, pin_registry["path"])
     
+    def _file_stamp(self):
+        """(mtime, size) of the config file, or None if it does not exist"""
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_config(self):
+        with open(self.config_file, 'r') as f:
+            return json.load(f)
+
     def load_config(self):
         """Load configuration from a JSON file"""
         try:
-            if not os.path.exists(self.config_file):
+            self._stamp = self._file_stamp()
+            if self._stamp is None:
                 return self.create_default_config()
             
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
+            return self._read_config()
         except json.JSONDecodeError:
             self.logger.error("Configuration file is invalid or corrupted.")
-            customtkinter.CTkMessageBox.show_error("Error", "Configuration file is invalid. Please check the file.")
-            return self.create_default_config()  # Fallback to default config
+            show_error_dialog("Error", "Configuration file is invalid. Please check the file.")
+            return self.default_config()  # Fallback to default config
         except Exception as e:
             self.logger.error(f"Error loading configuration: {str(e)}")
-            customtkinter.CTkMessageBox.show_error("Error", "Failed to load configuration. Please try again.")
-            return self.create_default_config()  # Fallback to default config
+            show_error_dialog("Error", "Failed to load configuration. Please try again.")
+            return self.default_config()  # Fallback to default config
+
+    def reload_if_changed(self, force=False):
+        """Reload the config in place if the file changed; returns True if it was reloaded"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_check < self.check_interval:
+                return False
+            self._last_check = now
+
+            stamp = self._file_stamp()
+            if stamp is None or stamp == self._stamp:
+                return False
+            self._stamp = stamp
+
+            try:
+                config = self._read_config()
+                self.resolve_paths(config)
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.error(f"Not reloading configuration: {str(e)}")
+                return False
+
+            # Swap values key by key, so readers on other threads never see
+            # a half-empty dict or unresolved paths
+            self.config.update(config)
+            for key in list(self.config):
+                if key not in config:
+                    del self.config[key]
+            self.logger.info("Configuration reloaded")
+            return True
     
     def load_theme(self):
         """Load theme from a JSON file"""
@@ -54,35 +129,16 @@ class ConfigManager:
                 return json.load(f)
         except json.JSONDecodeError:
             self.logger.error("Theme file is invalid or corrupted.")
-            customtkinter.CTkMessageBox.show_error("Error", "Theme file is invalid. Please check the file.")
+            show_error_dialog("Error", "Theme file is invalid. Please check the file.")
             return {}  # Fallback to default theme
         except Exception as e:
             self.logger.error(f"Error loading theme: {str(e)}")
-            customtkinter.CTkMessageBox.show_error("Error", "Failed to load theme. Please try again.")
+            show_error_dialog("Error", "Failed to load theme. Please try again.")
             return {}  # Fallback to default theme
     
-    def create_default_config(self):
-        """Create a default configuration"""
-        default_config = {
-            "template_directory": "",
-            "theme_directory": "",
-            "last_used_template": "",
-            "last_used_theme": "",
-            "button_fg_color": "lightblue",
-            "button_hover_color": "blue",
-            "button_text_color": "white"
-        }
-        self.save_config(default_config)
-        return default_config
-    
-    def save_config(self, config):
-        """Save the configuration to a JSON file"""
-        with open(self.config_file, 'w') as f:
-            json.dump(config, f, indent=4)
-    
-    def create_default_config(self):
-        """Create a default configuration and save it to a file"""
-        default_config = {
+    def default_config(self):
+        """Return the default configuration"""
+        return {
             "template_directory": "resources/templates",
             "theme_directory": "resources/themes",
             "window_size": {
@@ -96,12 +152,96 @@ class ConfigManager:
                 "use_digits": True,
                 "use_special": True,
                 "special_chars": "!@#$%^&*"
+            },
+            "render_engine": "docx",
+            "output_settings": {
+                "directory": "",
+                "files_per_directory": 0
+            },
+            "template_catalog": {
+                "refresh_interval": 5
+            },
+            "template_cache": {
+                "max_entries": 8,
+                "max_megabytes": 64
+            },
+            "template_artifacts": {
+                "enabled": True,
+                "directory": "resources/compiled"
+            },
+            "bulk_settings": {
+                "workers": 0,
+                "chunk_size": 16,
+                "journal_flush_every": 100,
+                "journal_key_path": "journal.key",
+                "max_in_flight_rows": 0,
+                "max_tasks_per_worker": 1000,
+                "max_worker_rss_mb": 1024
+            },
+            "pin_registry": {
+                "enabled": True,
+                "path": "pin_registry.sqlite3",
+                "unique_print_pins": False,
+                "print_pin_days": 90,
+                "max_attempts": 50
+            },
+            "logging": {
+                "directory": "logs",
+                "level": "INFO",
+                "format": "text",
+                "backup_count": 30,
+                "console": True,
+                "bulk_summary_interval": 10
+            },
+            "metrics": {
+                "enabled": False,
+                "directory": "logs",
+                "format": "json",
+                "dump_interval": 60,
+                "samples": 1024
+            },
+            "profiling": {
+                "enabled": False,
+                "directory": "logs/profiles",
+                "sample_rate": 0.01,
+                "top": 25,
+                "memory": True,
+                "max_reports": 200,
+                "every_batch": False
+            },
+            "render_server": {
+                "host": "127.0.0.1",
+                "port": 8765,
+                "workers": 8,
+                "keep_alive_timeout": 5,
+                "output": "bytes"
             }
         }
+    
+    def create_default_config(self):
+        """Create a default configuration and save it to a file"""
+        default_config = self.default_config()
         self.save_config(default_config)
         return default_config
     
-    def save_config(self, config):
-        """Save the configuration to a JSON file"""
-        with open(self.config_file, 'w') as f:
-            json.dump(config, f, indent=4)  # Ensure the file object is passed correctly 
\ No newline at end of file
+    def save_config(self, config=None):
+        """Save the configuration to a JSON file atomically"""
+        config = self.config if config is None else config
+        directory = os.path.dirname(os.path.abspath(self.config_file))
+        with self._lock:
+            fd, temp_path = tempfile.mkstemp(prefix=".config.", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(config, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                if os.path.exists(self.config_file):
+                    # mkstemp creates the file private; keep the permissions config.json had
+                    os.chmod(temp_path, os.stat(self.config_file).st_mode & 0o7777)
+                os.replace(temp_path, self.config_file)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            # Our own write is not an external change to reload
+            self._stamp = self._file_stamp()
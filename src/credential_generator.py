@@ -1,45 +1,160 @@
-import random
+import re
+import secrets
 import string
+from pin_registry import PinRegistry
 from utils.logger import Logger
+from utils.metrics import metrics
+
+PIN_LENGTH = 6
+
+# Rounds of redrawing colliding PINs before giving up on a batch
+DEFAULT_MAX_ATTEMPTS = 50
+
+# Random bytes are drawn from the OS CSPRNG in blocks of up to this size
+ENTROPY_BLOCK_SIZE = 64 * 1024
 
 class CredentialGenerator:
     def __init__(self, config):
         self.config = config
         self.logger = Logger()
-    
+        self._pin_registry = None
+
+    @property
+    def pin_registry(self):
+        """Registry of issued PINs from the pin_registry settings, or None when disabled"""
+        settings = self.config.get("pin_registry", {})
+        if self._pin_registry is None and settings.get("enabled"):
+            self._pin_registry = PinRegistry(
+                settings["path"],
+                unique_print_pins=settings.get("unique_print_pins", False),
+                print_pin_days=settings.get("print_pin_days", 90)
+            )
+        return self._pin_registry
+
+    def _random_chars(self, alphabet, count):
+        """Return count characters drawn uniformly from alphabet, without modulo bias"""
+        size = len(alphabet)
+        if not 0 < size <= 256:
+            raise ValueError("Alphabet must contain between 1 and 256 characters")
+
+        limit = 256 - 256 % size
+        to_index = bytes(value % size for value in range(256))
+        rejected = bytes(range(limit, 256))
+        to_char = {index: char for index, char in enumerate(alphabet)}
+
+        indexes = bytearray()
+        while len(indexes) < count:
+            needed = count - len(indexes)
+            block_size = min(needed * 256 // limit + 8, ENTROPY_BLOCK_SIZE)
+            indexes += secrets.token_bytes(block_size).translate(to_index, rejected)
+        return indexes[:count].decode('latin-1').translate(to_char)
+
+    def _draw_pins(self, n):
+        first_digits = self._random_chars("123456789", n)
+        other_digits = self._random_chars(string.digits, n * (PIN_LENGTH - 1))
+        step = PIN_LENGTH - 1
+        pins = [
+            first_digits[index] + other_digits[index * step:(index + 1) * step]
+            for index in range(n)
+        ]
+        return pins
+
+    def generate_pins(self, n):
+        """Generate n six-digit PINs (100000-999999), unique against the PIN registry if there is one"""
+        registry = self.pin_registry
+        if registry is None:
+            with metrics.time("credentials.draw_pins"):
+                pins = self._draw_pins(n)
+        else:
+            max_attempts = self.config["pin_registry"].get("max_attempts", DEFAULT_MAX_ATTEMPTS)
+            pins = []
+            attempts = 0
+            # One transaction for the whole batch: if it cannot be completed
+            # none of its PINs stay reserved
+            with registry.transaction():
+                while len(pins) < n:
+                    if attempts == max_attempts:
+                        raise RuntimeError(
+                            f"Could not issue {n} unique PINs after {max_attempts} attempts; "
+                            f"the PIN registry holds {len(registry)} PINs"
+                        )
+                    attempts += 1
+                    with metrics.time("credentials.draw_pins"):
+                        candidates = self._draw_pins(n - len(pins))
+                    with metrics.time("credentials.registry_reserve"):
+                        accepted = registry.reserve([(pin, self.get_print_pin(pin)) for pin in candidates])
+                    pins.extend(pin for pin, _ in accepted)
+                    if len(accepted) < len(candidates):
+                        metrics.counter("credentials.pin_collisions").inc(len(candidates) - len(accepted))
+                        self.logger.warning(f"Redrawing {len(candidates) - len(accepted)} colliding PINs")
+
+        metrics.counter("credentials.pins").inc(n)
+        self.logger.info("Generated new PIN" if n == 1 else f"Generated {n} PINs")
+        return pins
+
     def generate_pin(self):
-        pin = str(random.randint(100000, 999999))
-        self.logger.info("Generated new PIN")
-        return pin
-    
+        return self.generate_pins(1)[0]
+
     def get_print_pin(self, pin):
         return pin[-4:]
-    
-    def generate_password(self):
+
+    def _password_classes(self):
+        """Return the character classes enabled in password_settings"""
         settings = self.config["password_settings"]
-        chars = ""
-        required_chars = []
-        
+        classes = []
         if settings["use_lowercase"]:
-            chars += string.ascii_lowercase
-            required_chars.append(random.choice(string.ascii_lowercase))
-            
+            classes.append(string.ascii_lowercase)
         if settings["use_uppercase"]:
-            chars += string.ascii_uppercase
-            required_chars.append(random.choice(string.ascii_uppercase))
-            
+            classes.append(string.ascii_uppercase)
         if settings["use_digits"]:
-            chars += string.digits
-            required_chars.append(random.choice(string.digits))
-            
+            classes.append(string.digits)
         if settings["use_special"]:
-            special = settings["special_chars"]
-            chars += special
-            required_chars.append(random.choice(special))
-        
-        remaining_length = settings["length"] - len(required_chars)
-        password = required_chars + [random.choice(chars) for _ in range(remaining_length)]
-        random.shuffle(password)
-        
-        self.logger.info("Generated new password")
-        return ''.join(password) 
\ No newline at end of file
+            classes.append(settings["special_chars"])
+        return classes
+
+    def generate_passwords(self, n):
+        """Generate n passwords that satisfy password_settings"""
+        length = self.config["password_settings"]["length"]
+        classes = self._password_classes()
+        if not classes:
+            raise ValueError("password_settings enables no character classes")
+        if length < len(classes):
+            raise ValueError("Password length is shorter than the number of required character classes")
+
+        alphabet = "".join(dict.fromkeys("".join(classes)))
+        requirements = re.compile("".join(
+            f"(?=.*[{re.escape(chars)}])" for chars in classes
+        ), re.DOTALL)
+
+        passwords = []
+        with metrics.time("credentials.draw_passwords"):
+            while len(passwords) < n:
+                needed = n - len(passwords)
+                chars = self._random_chars(alphabet, needed * length)
+                candidates = (chars[index:index + length] for index in range(0, len(chars), length))
+                passwords.extend(candidate for candidate in candidates if requirements.match(candidate))
+        metrics.counter("credentials.passwords").inc(n)
+
+        self.logger.info("Generated new password" if n == 1 else f"Generated {n} passwords")
+        return passwords[:n]
+
+    def generate_password(self):
+        return self.generate_passwords(1)[0]
+
+    def generate_credentials_batch(self, schemas):
+        """Generate (pin, print_pin, password) for each template schema in one batch"""
+        needs_pin = [schema is None or schema.uses("pin", "printpin") for schema in schemas]
+        needs_password = [schema is None or schema.uses("password") for schema in schemas]
+        pins = iter(self.generate_pins(sum(needs_pin)) if any(needs_pin) else [])
+        passwords = iter(self.generate_passwords(sum(needs_password)) if any(needs_password) else [])
+
+        credentials = []
+        for pin_needed, password_needed in zip(needs_pin, needs_password):
+            pin = next(pins) if pin_needed else ""
+            password = next(passwords) if password_needed else ""
+            credentials.append((pin, self.get_print_pin(pin), password))
+        return credentials
+
+    def generate_credentials(self, schema=None):
+        """Generate the PIN, print PIN and password a template needs"""
+        return self.generate_credentials_batch([schema])[0]
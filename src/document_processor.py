@@ -1,63 +1,492 @@
+import io
 import os
+import zipfile
 from datetime import datetime
-import docx
-import shutil
+from xml.parsers import expat
+from output_planner import OutputPlanner
+from part_index import WORDPROCESSINGML_NS, wordprocessingml_tags
+from placeholder_grammar import DEFAULT_PLAN
+from placeholder_matcher import PlaceholderMatcher
+from repeating_rows import RowFiller, expand_rows, find_table, split_replacements, table_placeholder
+from template_cache import TemplateCache
+from template_schema import load_template_schema
 from utils.logger import Logger
+from utils.metrics import metrics
+from utils.profiling import profiler
+from utils.zip_writer import PassthroughZipFile
+
+_P = f"{{{WORDPROCESSINGML_NS}}}p"
+_T = f"{{{WORDPROCESSINGML_NS}}}t"
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+def _escape_text(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def _escape_attribute(value):
+    return (
+        _escape_text(value)
+        .replace('"', "&quot;")
+        .replace("\t", "&#9;")
+        .replace("\n", "&#10;")
+        .replace("\r", "&#13;")
+    )
+
+class StreamingXmlRewriter:
+    """Rewrites placeholders in a WordprocessingML part one paragraph at a time, without building a tree"""
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, matcher, tables=None):
+        self.matcher = matcher
+        self.tables = tables or {}
+
+    def rewrite(self, source, target, tags=None):
+        """Stream XML from the source file object into the binary target"""
+        state = _RewriteState(self.matcher, self.tables, target, self.CHUNK_SIZE)
+        if tags:
+            state.set_tags(*tags)
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.ordered_attributes = True
+        parser.XmlDeclHandler = state.declaration
+        parser.StartElementHandler = state.start
+        parser.EndElementHandler = state.end
+        parser.CharacterDataHandler = state.data
+        parser.ProcessingInstructionHandler = state.processing_instruction
+        parser.CommentHandler = state.comment
+
+        while True:
+            chunk = source.read(self.CHUNK_SIZE)
+            parser.Parse(chunk, not chunk)
+            if not chunk:
+                break
+
+        state.close()
+        return state.replacements_made
+
+def _group_text_nodes(events):
+    """Map paragraph ids to the text node events of that paragraph, in order"""
+    paragraphs = {}
+    for event in events:
+        if event[0] == "text":
+            paragraphs.setdefault(event[1], []).append(event)
+    return paragraphs
+
+class _RewriteState:
+    """Parser callbacks and output buffer for a single StreamingXmlRewriter run"""
+    def __init__(self, matcher, tables, target, chunk_size):
+        self.matcher = matcher
+        self.tables = tables
+        self.target = target
+        self.chunk_size = chunk_size
+        self.replacements_made = False
+
+        self.p_tag = "w:p"
+        self.t_tag = "w:t"
+        self.tr_tag = "w:tr"
+        self.root_seen = False
+
+        self.output = []
+        self.output_size = 0
+        self.pending_start = False
+
+        # Paragraph buffering: events of the outermost open paragraph, the ids
+        # of the open (possibly nested) paragraphs and the text node being read
+        self.buffer = None
+        self.paragraph_stack = []
+        self.next_paragraph_id = 0
+        self.current_text = None
+        # Buffer positions where the open table rows start, if rows can repeat
+        self.row_stack = []
+
+    def set_tags(self, p_tag, t_tag):
+        self.p_tag, self.t_tag = p_tag, t_tag
+        self.tr_tag = p_tag[:-1] + "tr"
+        self.root_seen = True
+
+    # Parser callbacks
+
+    def declaration(self, version, encoding, standalone):
+        standalone_attr = ""
+        if standalone != -1:
+            standalone_attr = f' standalone="{"yes" if standalone else "no"}"'
+        self._write(f'<?xml version="{version or "1.0"}" encoding="UTF-8"{standalone_attr}?>\r\n')
+
+    def start(self, name, attributes):
+        if not self.root_seen:
+            self.set_tags(*wordprocessingml_tags(attributes))
+
+        if name == self.tr_tag and self.tables:
+            if self.buffer is None:
+                self.buffer = []
+            self.row_stack.append(len(self.buffer))
+        elif name == self.p_tag:
+            if self.buffer is None:
+                self.buffer = []
+            self.paragraph_stack.append(self.next_paragraph_id)
+            self.next_paragraph_id += 1
+
+        if self.buffer is None:
+            self._emit_start(name, attributes)
+            return
+
+        event = ["start", name, attributes]
+        self.buffer.append(event)
+        if name == self.t_tag and self.paragraph_stack:
+            self.current_text = ["text", self.paragraph_stack[-1], [], event]
+            self.buffer.append(self.current_text)
+
+    def end(self, name):
+        if self.buffer is None:
+            self._emit_end(name)
+            return
+
+        if name == self.t_tag:
+            self.current_text = None
+        self.buffer.append(["end", name])
+
+        if name == self.tr_tag and self.row_stack:
+            self._expand_row(self.row_stack.pop())
+        elif name == self.p_tag:
+            self.paragraph_stack.pop()
+
+        if not self.paragraph_stack and not self.row_stack and name in (self.p_tag, self.tr_tag):
+            self._flush_buffer()
+
+    def data(self, text):
+        if self.buffer is None:
+            self._emit_data(text)
+        elif self.current_text is not None:
+            self.current_text[2].append(text)
+        else:
+            self.buffer.append(["data", text])
+
+    def processing_instruction(self, target, data):
+        self._emit_raw(f"<?{target} {data}?>")
+
+    def comment(self, text):
+        self._emit_raw(f"<!--{text}-->")
+
+    def close(self):
+        self._close_pending()
+        self._flush_output(force=True)
+
+    # Paragraph handling
+
+    def _expand_row(self, start):
+        """Replace a just closed row in the buffer by one filled copy per record"""
+        segment = self.buffer[start:]
+        paragraphs = _group_text_nodes(segment)
+        texts = {
+            paragraph_id: ["".join(node[2]) for node in text_nodes]
+            for paragraph_id, text_nodes in paragraphs.items()
+        }
+        row_text = "".join("".join(segments) for segments in texts.values())
+        table = find_table(row_text, self.tables)
+        if table is None:
+            return
+
+        filler = RowFiller(table, row_text, self.matcher.replacements)
+        expanded = []
+        for record in self.tables[table]:
+            matcher = filler.matcher_for(record)
+            filled = {}
+            for paragraph_id, text_nodes in paragraphs.items():
+                segments = texts[paragraph_id]
+                replaced = matcher.replace_segments(segments) or segments
+                for node, original_text, text in zip(text_nodes, segments, replaced):
+                    filled[id(node)] = text
+                    if text != original_text:
+                        self._preserve_space(node[3])
+            for event in segment:
+                if event[0] == "text":
+                    # Filled text is final, so it is carried as plain data
+                    expanded.append(["data", filled[id(event)]])
+                else:
+                    expanded.append(event)
+
+        self.buffer[start:] = expanded
+        self.replacements_made = True
+
+    def _flush_buffer(self):
+        """Apply replacements to every paragraph in the buffer and write it out"""
+        buffer, self.buffer = self.buffer, None
+
+        paragraphs = _group_text_nodes(buffer)
+        for text_nodes in paragraphs.values():
+            texts = ["".join(node[2]) for node in text_nodes]
+            replaced = self.matcher.replace_segments(texts)
+            if replaced is None:
+                continue
+
+            # Each run keeps its own text node, so run formatting survives
+            self.replacements_made = True
+            for node, original_text, text in zip(text_nodes, texts, replaced):
+                if text != original_text:
+                    node[2] = [text]
+                    self._preserve_space(node[3])
+
+        for event in buffer:
+            kind = event[0]
+            if kind == "start":
+                self._emit_start(event[1], event[2])
+            elif kind == "end":
+                self._emit_end(event[1])
+            elif kind == "text":
+                self._emit_data("".join(event[2]))
+            elif kind == "data":
+                self._emit_data(event[1])
+            else:
+                self._close_pending()
+                self._write(event[1])
+
+    def _preserve_space(self, start_event):
+        """Make sure leading or trailing spaces in a rewritten text node survive"""
+        attributes = start_event[2]
+        for index in range(0, len(attributes), 2):
+            if attributes[index] == "xml:space":
+                attributes[index + 1] = "preserve"
+                return
+        start_event[2] = attributes + ["xml:space", "preserve"]
+
+    # Serialisation
+
+    def _emit_start(self, name, attributes):
+        self._close_pending()
+        parts = [f"<{name}"]
+        for index in range(0, len(attributes), 2):
+            parts.append(f' {attributes[index]}="{_escape_attribute(attributes[index + 1])}"')
+        self._write("".join(parts))
+        self.pending_start = True
+
+    def _emit_end(self, name):
+        if self.pending_start:
+            self.pending_start = False
+            self._write("/>")
+        else:
+            self._write(f"</{name}>")
+
+    def _emit_data(self, text):
+        if text:
+            self._close_pending()
+            self._write(_escape_text(text))
+
+    def _emit_raw(self, text):
+        if self.buffer is not None:
+            # Comments and processing instructions inside a paragraph are rare
+            # enough to be carried through the buffer as already escaped data
+            self.buffer.append(["raw", text])
+            return
+        self._close_pending()
+        self._write(text)
+
+    def _close_pending(self):
+        if self.pending_start:
+            self.pending_start = False
+            self._write(">")
+
+    def _write(self, text):
+        self.output.append(text)
+        self.output_size += len(text)
+        self._flush_output()
+
+    def _flush_output(self, force=False):
+        if self.output and (force or self.output_size >= self.chunk_size):
+            self.target.write("".join(self.output).encode("utf-8"))
+            self.output = []
+            self.output_size = 0
 
 class DocumentProcessor:
     def __init__(self, config):
         self.config = config
         self.logger = Logger()
-        
+        cache_settings = config.get("template_cache", {})
+        artifact_settings = config.get("template_artifacts", {})
+        self.template_cache = TemplateCache(
+            max_entries=cache_settings.get("max_entries", 8),
+            max_bytes=cache_settings.get("max_megabytes", 64) * 1024 * 1024,
+            artifact_directory=artifact_settings.get("directory") if artifact_settings.get("enabled") else None
+        )
+        self._schemas = {}
+        self.output_planner = OutputPlanner(config)
+
+    def get_output_path(self, name):
+        """Generate a new, unused output path for the document"""
+        return self.output_planner.plan(name)
+
+    def get_template_schema(self, template_path):
+        """Return the placeholder schema of a template, reusing it while the file is unchanged"""
+        stat = os.stat(template_path)
+        key = (os.path.abspath(template_path), stat.st_mtime_ns, stat.st_size)
+        schema = self._schemas.get(key)
+        if schema is None:
+            schema = load_template_schema(template_path)
+            self._schemas[key] = schema
+        return schema
+
+    def create_replacements_dict(self, name, username, pin, print_pin, password, schema=None, tables=None):
+        """Create dictionary of replacements for the document"""
+        values = {
+            "name": name,
+            "username": username,
+            "pin": pin,
+            "printpin": print_pin,
+            "password": password,
+            "date": datetime.now
+        }
+        plan = schema.plan if schema is not None else DEFAULT_PLAN
+        replacements = plan.resolve(values)
+        for table, records in (tables or {}).items():
+            placeholder = table_placeholder(table)
+            if schema is None or placeholder in schema.placeholder_set:
+                replacements[placeholder] = list(records)
+        return replacements
+
     def process_document(self, template_path, output_path, replacements):
+        return self._process(template_path, output_path, replacements, output_path)
+
+    def create_document(self, template_path, output_path, replacements):
+        """Render into a new file at a planned path; returns (success, message, path or None)"""
+        try:
+            output, path = self.output_planner.create(output_path)
+        except OSError as e:
+            self.logger.error(f"Error creating output file: {str(e)}")
+            return False, str(e), None
+
+        with output:
+            success, message = self._process(template_path, output, replacements, path)
+        if not success:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return success, message, None
+        return success, message, path
+
+    def render_to_bytes(self, template_path, replacements, label="in memory"):
+        """Render a document into memory; returns (success, message, bytes or None)"""
+        buffer = io.BytesIO()
+        success, message = self._process(template_path, buffer, replacements, label)
+        return success, message, buffer.getvalue() if success else None
+
+    def _process(self, template_path, output, replacements, label):
+        """Render to output, a path or a binary file object"""
         try:
-            # Create output directory if it doesn't exist
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            
-            # Copy template to output location
-            shutil.copyfile(template_path, output_path)
-            
-            # Process the document
-            doc = docx.Document(output_path)
-            replacements_made = self._process_replacements(doc, replacements)
-            
-            # Save the document
-            doc.save(output_path)
-            
-            self.logger.info(f"Document processed successfully: {output_path}")
+            with profiler.profile("render", os.path.basename(template_path)), metrics.time("render.total"):
+                scalars, tables = split_replacements(replacements)
+                matcher = PlaceholderMatcher(scalars)
+                if self.config.get("render_engine", "docx") == "xml":
+                    try:
+                        self._render_xml(template_path, output, matcher, tables)
+                    except Exception as e:
+                        self.logger.warning(f"XML engine failed, falling back to python-docx: {str(e)}")
+                        metrics.counter("render.xml_fallbacks").inc()
+                        if not isinstance(output, str):
+                            output.seek(0)
+                            output.truncate()
+                        self._render_docx(template_path, output, matcher, tables)
+                else:
+                    self._render_docx(template_path, output, matcher, tables)
+
+            metrics.counter("documents.rendered").inc()
+            self.logger.info(f"Document processed successfully: {label}")
             return True, "Document created successfully"
-            
+
         except Exception as e:
+            metrics.counter("documents.failed").inc()
             self.logger.error(f"Error processing document: {str(e)}")
             return False, str(e)
-    
-    def _process_replacements(self, doc, replacements):
+        finally:
+            metrics.maybe_dump()
+
+    def _render_docx(self, template_path, output, matcher, tables):
+        """Render from the cached, already parsed python-docx elements"""
+        with metrics.time("render.load_template"):
+            template = self.template_cache.get(template_path)
+        with metrics.time("render.copy"):
+            parts = template.checkout()
+
+        changed_parts = {}
+        for part in parts:
+            with metrics.time("render.replace"):
+                changed = self._process_replacements(part.paragraphs, matcher)
+            if tables:
+                with metrics.time("render.expand_rows"):
+                    if expand_rows(part.paragraphs, tables, matcher.replacements):
+                        changed = True
+            if changed:
+                with metrics.time("render.serialize"):
+                    changed_parts[part.name] = part.serialize()
+
+        # Save the document
+        with metrics.time("render.save"):
+            template.save(output, changed_parts)
+        return bool(changed_parts)
+
+    def _render_xml(self, template_path, output, matcher, tables):
+        """Render by streaming the indexed parts through StreamingXmlRewriter"""
+        with metrics.time("render.load_template"):
+            template = self.template_cache.get(template_path)
+        source = template.package
+        rewriter = StreamingXmlRewriter(matcher, tables)
         replacements_made = False
-        
-        # Process paragraphs
-        for paragraph in doc.paragraphs:
-            if self._replace_text(paragraph, replacements):
-                replacements_made = True
-        
-        # Process tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        if self._replace_text(paragraph, replacements):
+
+        with PassthroughZipFile(output, 'w', zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                if info.filename not in template.part_index:
+                    with metrics.time("render.copy"):
+                        target.copy_member(source, info)
+                    continue
+
+                output_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                output_info.compress_type = zipfile.ZIP_DEFLATED
+                skeleton = template.skeletons.get(info.filename)
+                if skeleton is not None:
+                    with metrics.time("render.skeleton_part"), target.open(output_info, 'w') as part_out:
+                        if self._render_skeleton(skeleton, part_out, rewriter):
+                            replacements_made = True
+                    continue
+
+                # Parsing, replacing and writing are interleaved in the streaming engine
+                with metrics.time("render.stream_part"):
+                    with source.open(info) as part_in, target.open(output_info, 'w') as part_out:
+                        if rewriter.rewrite(part_in, part_out):
                             replacements_made = True
-        
+
         return replacements_made
-    
-    def _replace_text(self, paragraph, replacements):
-        original_text = paragraph.text
-        modified_text = original_text
-        
-        for placeholder, value in replacements.items():
-            if placeholder in modified_text:
-                modified_text = modified_text.replace(placeholder, value)
-        
-        if original_text != modified_text:
-            paragraph.text = modified_text
-            return True
-        return False 
\ No newline at end of file
+
+    def _render_skeleton(self, skeleton, target, rewriter):
+        """Write a pre-split part: the static XML as is, only the spans through the rewriter"""
+        replacements_made = False
+        position = 0
+        for start, end in skeleton.spans:
+            target.write(skeleton.xml[position:start])
+            if rewriter.rewrite(io.BytesIO(skeleton.xml[start:end]), target, skeleton.tags):
+                replacements_made = True
+            position = end
+        target.write(skeleton.xml[position:])
+        return replacements_made
+
+    def _process_replacements(self, paragraphs, matcher):
+        replacements_made = False
+
+        # Only paragraphs the template cache located placeholders in are visited
+        for paragraph in paragraphs:
+            if self._replace_text(paragraph, matcher):
+                replacements_made = True
+
+        return replacements_made
+
+    def _replace_text(self, paragraph, matcher):
+        """Replace placeholders in the text nodes the paragraph itself owns, keeping its runs"""
+        element = paragraph._p
+        nodes = [node for node in element.iter(_T) if next(node.iterancestors(_P)) is element]
+        texts = [node.text or "" for node in nodes]
+        replaced = matcher.replace_segments(texts)
+        if replaced is None:
+            return False
+
+        for node, original_text, text in zip(nodes, texts, replaced):
+            if text != original_text:
+                node.text = text
+                node.set(_XML_SPACE, "preserve")
+        return True
@@ -1,9 +1,12 @@
 import tkinter as tk  # Import tkinter for menu functionality
 import customtkinter
 import os
-import glob
 from .components import InputField, TemplateSelector
+from render_worker import RenderWorker
+from template_catalog import TemplateCatalog
+from template_schema import FIELD_LABELS
 from utils.logger import Logger
+from utils.metrics import metrics
 import json
 from tkinter import filedialog  # Import filedialog for directory selection
 
@@ -13,6 +16,16 @@ class DocumentProcessorApp:
         self.doc_processor = document_processor
         self.cred_generator = credential_generator
         self.logger = Logger()
+        self.template_catalog = TemplateCatalog(
+            self.config.config,
+            self.config.config.get("template_catalog", {}).get("refresh_interval", 5.0)
+        )
+        # Index once before the window exists; later refreshes run in the background
+        self.template_catalog.maybe_refresh()
+        
+        # Rendering happens off the Tk main loop; results are polled below
+        self.render_worker = RenderWorker(self.render_job)
+        self.render_worker.start()
         
         # Initialize the main window first
         self.root = customtkinter.CTk()  # Use CTk for the main window
@@ -50,22 +63,14 @@ class DocumentProcessorApp:
         self.process_document()
     
     def get_template_list(self):
-        """Get list of template files from the configured directory"""
+        """Get list of template names from the last template catalog snapshot"""
         try:
-            template_dir = self.config.config["template_directory"]
-            self.logger.info(f"Looking for templates in: {template_dir}")
-            
-            # Get full paths but only display filenames
-            full_paths = glob.glob(os.path.join(template_dir, "*.docx"))
-            
-            # Return just the filenames
-            template_names = [os.path.basename(path) for path in full_paths]
+            template_names = self.template_catalog.names(refresh=False)
             
             if not template_names:
-                self.logger.warning(f"No templates found in {template_dir}")
+                self.logger.warning(f"No templates found in {self.template_catalog.directory}")
                 return ["No templates found"]
                 
-            self.logger.info(f"Found templates: {template_names}")
             return template_names
             
         except Exception as e:
@@ -74,51 +79,32 @@ class DocumentProcessorApp:
     
     def get_output_path(self, name):
         """Generate output path for the document"""
-        from datetime import datetime
-        current_year = datetime.now().strftime("%Y")
-        current_month = datetime.now().strftime("%B")
-        current_date = datetime.now().strftime("%d")
-        
-        output_dir = os.path.join(
-            os.getcwd(),
-            current_year,
-            current_month,
-            current_date
-        )
-        return os.path.join(output_dir, f"{name}.docx")
+        return self.doc_processor.get_output_path(name)
     
-    def create_replacements_dict(self, name, username, pin, print_pin, password):
+    def create_replacements_dict(self, name, username, pin, print_pin, password, schema=None):
         """Create dictionary of replacements for the document"""
-        return {
-            "[Name]": name,
-            "[NAME]": name.upper(),
-            "[name]": name.lower(),
-            "[Username]": username,
-            "[USERNAME]": username.upper(),
-            "[username]": username.lower(),
-            "[Pin]": pin,
-            "[PIN]": pin,
-            "[pin]": pin,
-            "[PrintPin]": print_pin,
-            "[PRINTPIN]": print_pin,
-            "[printpin]": print_pin,
-            "[Password]": password,
-            "[PASSWORD]": password,
-            "[password]": password
-        }
+        return self.doc_processor.create_replacements_dict(
+            name, username, pin, print_pin, password, schema
+        )
+    
+    def get_template_schema(self, template):
+        """Get the placeholder schema of a template from the last template catalog snapshot"""
+        entry = self.template_catalog.get(template, refresh=False)
+        if entry is None:
+            raise ValueError(f"Template not found: {template}")
+        return entry.schema
     
     def validate_inputs(self, template, name, username):
         """Validate user inputs"""
-        if not template or template == "No templates found":
+        if not template or template in ("No templates found", "Error loading templates"):
             self.logger.error("No template selected")
             return False
-            
-        if not name:
-            self.logger.error("Name is required")
-            return False
-            
-        if template != "Lagermedarbejder_skabelon.docx" and not username:
-            self.logger.error("Username is required for this template")
+        
+        schema = self.get_template_schema(template)
+        missing = schema.missing_fields({"name": name, "username": username})
+        for label in missing:
+            self.logger.error(f"{label} is required for this template")
+        if missing:
             return False
             
         return True
@@ -261,9 +247,10 @@ class DocumentProcessorApp:
         self.settings_frame.grid_remove()  # Initially hide the settings frame
 
         # Template selector in top frame
+        self.template_names = self.get_template_list()
         self.template_selector = TemplateSelector(
             self.top_frame,
-            self.get_template_list(),
+            self.template_names,
             self.on_template_change
         )
         self.template_selector.pack(fill='x')  # Fill horizontally
@@ -310,18 +297,22 @@ class DocumentProcessorApp:
     
     def update_template_info(self, template_name):
         """Update template info based on selected template"""
-        if template_name == "Lagermedarbejder_skabelon.docx":
-            info = "This template requires: Name only"
-            self.template_info.configure(
-                text=info,
-                text_color="blue"
-            )
+        try:
+            schema = self.get_template_schema(template_name)
+        except Exception as e:
+            self.logger.error(f"Error reading template: {str(e)}")
+            self.template_info.configure(text="", text_color="blue")
+            return
+        
+        labels = [FIELD_LABELS[field] for field in schema.required_fields]
+        if len(labels) == 1:
+            info = f"This template requires: {labels[0]} only"
         else:
-            info = "This template requires: Name and Username"
-            self.template_info.configure(
-                text=info,
-                text_color="blue"
-            )
+            info = f"This template requires: {' and '.join(labels)}"
+        self.template_info.configure(
+            text=info,
+            text_color="blue"
+        )
     
     def on_template_change(self, *args):
         """Handle template selection changes"""
@@ -331,20 +322,26 @@ class DocumentProcessorApp:
         self.name_input.pack_forget()
         self.username_input.pack_forget()
         
-        # Show appropriate fields based on the selected template
-        if selected_template == "Lagermedarbejder_skabelon.docx":
-            self.name_input.pack(pady=(5, 0))  # Show only the name input
-            self.update_status("Lagermedarbejder template selected", "green")
-        else:
-            self.name_input.pack(pady=(5, 0))  # Show name input
-            self.username_input.pack(pady=(5, 0))  # Show username input
-            self.update_status("Brugeroplysninger template selected", "green")
+        try:
+            schema = self.get_template_schema(selected_template)
+        except Exception as e:
+            self.logger.error(f"Error reading template: {str(e)}")
+            self.update_status(f"Error: {str(e)}", "red")
+            return
+        
+        # Show the fields the selected template needs
+        inputs = {"name": self.name_input, "username": self.username_input}
+        for field in schema.required_fields:
+            inputs[field].pack(pady=(5, 0))
+        
+        template_label = os.path.splitext(selected_template)[0]
+        self.update_status(f"{template_label} template selected", "green")
         
         # Update template info
         self.update_template_info(selected_template)
     
     def process_document(self):
-        """Process the document with the current inputs"""
+        """Queue a document for the current inputs on the render worker"""
         try:
             name = self.name_input.get()
             username = self.username_input.get()
@@ -354,53 +351,99 @@ class DocumentProcessorApp:
                 self.update_status("Please fill in all required fields", "red")
                 return
             
-            # Update status during processing
-            self.update_status("Processing document...", "blue")
-            self.root.update()  # Force GUI update
+            self.render_worker.submit(template=template, name=name, username=username)
             
-            # Generate credentials
-            pin = self.cred_generator.generate_pin()
-            print_pin = self.cred_generator.get_print_pin(pin)
-            password = self.cred_generator.generate_password()
+            # Clear inputs so the next person can be entered right away
+            self.name_input.set("")
+            self.username_input.set("")
             
-            # Create replacements and process document
-            replacements = self.create_replacements_dict(
-                name, username, pin, print_pin, password
-            )
-            
-            template_path = os.path.join(
-                self.config.config["template_directory"],
-                template
-            )
-            
-            success, message = self.doc_processor.process_document(
-                template_path,
-                self.get_output_path(name),
-                replacements
-            )
+        except Exception as e:
+            self.logger.error(f"Error processing document: {str(e)}")
+            self.update_status(f"Error: {str(e)}", "red")
+    
+    def render_job(self, template, name, username, progress):
+        """Generate credentials and render one document (runs on the worker thread)"""
+        progress(f"Generating credentials for {name}...")
+        entry = self.template_catalog.get(template)
+        if entry is None:
+            raise ValueError(f"Template not found: {template}")
+        schema = entry.schema
+        pin, print_pin, password = self.cred_generator.generate_credentials(schema)
+        
+        # Create replacements and process document
+        replacements = self.create_replacements_dict(
+            name, username, pin, print_pin, password, schema
+        )
+        
+        progress(f"Processing document for {name}...")
+        success, message, _ = self.doc_processor.create_document(
+            entry.path,
+            self.get_output_path(name),
+            replacements
+        )
+        return success, message, template, name, pin
+    
+    def poll_render_worker(self):
+        """Apply render worker events to the GUI (runs on the Tk main loop)"""
+        for kind, job_id, payload in self.render_worker.poll():
+            pending = self.render_worker.pending
             
-            if success:
-                # Clear inputs first
-                self.name_input.set("")
-                self.username_input.set("")
-                
-                # Show success message with PIN
-                success_message = f"Document created successfully!\nPIN: {pin}"
-                self.update_status(success_message, "green")
+            if kind == "queued":
+                self.show_progress(f"Document for {payload['name']} queued ({pending} pending)")
+            elif kind == "started":
+                self.show_progress(f"Processing document for {payload['name']}... ({pending} pending)")
+            elif kind == "progress":
+                self.show_progress(f"{payload} ({pending} pending)")
+            elif kind == "done":
+                success, message, template, name, pin = payload
+                if success:
+                    # Show success message with PIN
+                    success_message = f"Document created successfully for {name}!"
+                    if pin:
+                        success_message += f"\nPIN: {pin}"
+                    timing = metrics.latency_summary("render.total")
+                    if timing:
+                        success_message += f"\nRender time {timing}"
+                    self.update_status(success_message, "green")
+                else:
+                    self.update_status(f"Error: {message}", "red")
                 
-                # Reset template info to default state
-                self.update_template_info(template)
-                
-                # Force GUI update
-                self.root.update()
-            else:
-                self.update_status(f"Error: {message}", "red")
+                # Reset template info to default state once the queue is empty
+                if pending == 0:
+                    self.update_template_info(template)
+            elif kind == "failed":
+                self.update_status(f"Error: {payload}", "red")
+                if pending == 0:
+                    self.show_progress("")
+        
+        self.root.after(100, self.poll_render_worker)
+    
+    def show_progress(self, message):
+        """Show render progress below the status label"""
+        self.template_info.configure(text=message, text_color="blue")
+    
+    def poll_config(self):
+        """Pick up edits to config.json and the template directory while the app is running"""
+        try:
+            self.config.reload_if_changed()
             
+            # The catalog re-lists the directory on its own thread once its refresh
+            # interval has passed; the list below is the last finished snapshot
+            self.template_catalog.refresh_in_background()
+            template_names = self.get_template_list()
+            if template_names != self.template_names:
+                self.template_names = template_names
+                self.template_selector.set_templates(template_names)
         except Exception as e:
-            self.logger.error(f"Error processing document: {str(e)}")
-            self.update_status(f"Error: {str(e)}", "red")
+            self.logger.error(f"Error reloading configuration: {str(e)}")
+        self.root.after(2000, self.poll_config)
     
     def run(self):
-        self.root.mainloop() 
+        self.root.after(100, self.poll_render_worker)
+        self.root.after(2000, self.poll_config)
+        try:
+            self.root.mainloop()
+        finally:
+            self.render_worker.stop(timeout=5)
     
     
\ No newline at end of file
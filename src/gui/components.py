@@ -56,6 +56,10 @@ class TemplateSelector:
     def set(self, value):
         self.var.set(value)
     
+    def set_templates(self, templates):
+        """Replace the templates offered in the dropdown"""
+        self.dropdown.configure(values=templates)
+    
     def browse_directory(self):
         # Implement directory browsing logic here
         pass
\ No newline at end of file
@@ -0,0 +1,175 @@
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from utils.logger import Logger
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+def row_key(row):
+    """Fingerprint of an input row, so an edited input file is not mistaken for a finished one"""
+    return hashlib.sha256(json.dumps(row, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def credential_hash(key, *credentials):
+    """Keyed hash identifying the credentials issued for a row without storing them
+
+    A plain hash of a 6 digit PIN is reversed by trying every PIN, so the
+    hash is an HMAC with the installation's journal key (see load_journal_key).
+    """
+    return hmac.new(key, ":".join(credentials).encode('utf-8'), hashlib.sha256).hexdigest()
+
+def load_journal_key(path):
+    """Return the secret key for credential hashes, creating it on first use
+
+    The key file is created readable by its owner only and must not be
+    stored next to the journals it protects.
+    """
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+    except FileExistsError:
+        with open(path, 'rb') as f:
+            return f.read()
+    with os.fdopen(fd, 'wb') as f:
+        key = secrets.token_bytes(32)
+        f.write(key)
+    return key
+
+def fsync_path(path):
+    """Force a file written by any process to disk
+
+    The file is opened for writing because Windows only flushes writable
+    handles. On POSIX, call fsync_directory too if the file is new.
+    """
+    fd = os.open(path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def fsync_directory(path):
+    """Force the entries of a directory to disk where the OS allows it"""
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class JobJournal:
+    """Append-only on-disk log of the state of every row in a bulk job
+
+    Each line is a JSON record {"row", "key", "state", "output",
+    "credential_hash", "message"}; the last record for a row wins. Records
+    are buffered and written (and fsynced) in batches, so journaling costs
+    one write per batch rather than one per document. A torn last line
+    left by a crash is ignored on load.
+
+    Before a batch is written, before_flush (if given) is called with the
+    outputs of its done rows, so the caller can force those documents to
+    disk first; a journal must never claim a document the disk lost.
+
+    In memory only the rows that are done are kept, as row number -> key,
+    plus the outputs of the rows that were already done when the journal
+    was opened, so a long job does not hold every record.
+    """
+    def __init__(self, path, flush_every=100, flush_interval=1.0, before_flush=None):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.before_flush = before_flush
+        self.logger = Logger()
+        self.done = {}
+        self._outputs = {}
+        self._load()
+        self._buffer = []
+        self._buffered_outputs = []
+        self._last_flush = time.monotonic()
+        self._file = open(path, 'a', encoding='utf-8')
+        if self._file.tell() > 0 and not self._ends_with_newline():
+            # Terminate a line torn by a crash so the next record starts cleanly
+            self._file.write("\n")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                try:
+                    record = json.loads(line)
+                    row_number = record["row"]
+                    if record["state"] == DONE:
+                        self.done[row_number] = record["key"]
+                        self._outputs[row_number] = record["output"]
+                    else:
+                        self.done.pop(row_number, None)
+                        self._outputs.pop(row_number, None)
+                except (ValueError, KeyError, TypeError):
+                    self.logger.warning(f"Skipping unreadable journal line {line_number} in {self.path}")
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def is_done(self, row_number, key):
+        """Return True if the row was rendered by an earlier run of the same input"""
+        return self.done.get(row_number) == key
+
+    def output(self, row_number):
+        """Return the output of a row that was done when the journal was opened, or None"""
+        return self._outputs.get(row_number)
+
+    def done_outputs(self):
+        """Return the set of outputs of the rows that were done when the journal was opened"""
+        return set(self._outputs.values())
+
+    def record(self, row_number, key, state, output=None, credential_hash=None, message=None):
+        """Buffer a state change for a row, writing the batch when it is due"""
+        record = {
+            "row": row_number,
+            "key": key,
+            "state": state,
+            "output": output,
+            "credential_hash": credential_hash,
+            "message": message
+        }
+        if state == DONE:
+            self.done[row_number] = key
+            if output:
+                self._buffered_outputs.append(output)
+        else:
+            self.done.pop(row_number, None)
+        self._outputs.pop(row_number, None)
+        self._buffer.append(json.dumps(record))
+
+        if (len(self._buffer) >= self.flush_every or
+                time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write buffered records and force them to disk"""
+        if self._buffer:
+            if self.before_flush and self._buffered_outputs:
+                self.before_flush(self._buffered_outputs)
+            self._buffered_outputs = []
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
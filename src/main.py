@@ -1,16 +1,23 @@
 from config_manager import ConfigManager
 from document_processor import DocumentProcessor
 from credential_generator import CredentialGenerator
-from gui.app import DocumentProcessorApp
-from utils.logger import Logger
+from utils.logger import Logger, configure_logging
+from utils.metrics import configure_metrics
+from utils.profiling import configure_profiling
 
 def main():
     logger = Logger()
     logger.info("Starting application")
     
     try:
+        # The GUI (and with it Tk) is only loaded when the app is actually started
+        from gui.app import DocumentProcessorApp
+        
         # Initialize components
         config_manager = ConfigManager()
+        configure_logging(config_manager.config.get("logging"))
+        configure_metrics(config_manager.config.get("metrics"))
+        configure_profiling(config_manager.config.get("profiling"))
         document_processor = DocumentProcessor(config_manager.config)
         credential_generator = CredentialGenerator(config_manager.config)
         
@@ -0,0 +1,168 @@
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime
+
+DEFAULT_SETTINGS = {
+    "directory": "",
+    "files_per_directory": 0
+}
+
+MAX_NAME_LENGTH = 150
+
+# Characters Windows does not allow in file names, plus control characters
+_INVALID_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+_RESERVED_NAMES = {"CON", "PRN", "AUX", "NUL"} | {f"{prefix}{index}" for prefix in ("COM", "LPT") for index in range(1, 10)}
+_SHARD_NAME = re.compile(r"^\d{3,}$")
+_NUMBER_SUFFIX = re.compile(r" \(\d+\)$")
+
+def sanitize_name(name):
+    """Turn a person's name into a safe file name stem
+
+    Characters not allowed in Windows file names become spaces, runs of
+    whitespace collapse, and trailing dots and spaces are dropped.
+    Reserved device names get an underscore appended.
+    """
+    name = unicodedata.normalize("NFC", name)
+    name = _INVALID_CHARS.sub(" ", name)
+    name = " ".join(name.split()).rstrip(". ")[:MAX_NAME_LENGTH].rstrip(". ")
+    if not name:
+        return "document"
+    if name.split(".")[0].upper() in _RESERVED_NAMES:
+        name += "_"
+    return name
+
+def unique_file_name(name, taken):
+    """Return a .docx file name for name that is not in taken, and add it
+
+    taken holds lowercased file names, since Windows file names are
+    case-insensitive. A name already taken gets " (2)", " (3)", ... appended.
+    """
+    stem = sanitize_name(name)
+    file_name = f"{stem}.docx"
+    counter = 1
+    while file_name.lower() in taken:
+        counter += 1
+        file_name = f"{stem} ({counter}).docx"
+    taken.add(file_name.lower())
+    return file_name
+
+class OutputPlanner:
+    """Plans output paths as <directory>/YEAR/Month/DD[/NNN]/<name>.docx
+
+    Each day folder's existing file names are read once into an in-memory
+    index; after that a collision check is a set lookup and a duplicate
+    name becomes "<name> (2).docx". Directories are created once per
+    planner. With files_per_directory set, a day's documents are split
+    over numbered subfolders (001, 002, ...) of that many files each.
+
+    The index only knows about files this planner created or found when
+    it first read a day folder, so one planner should plan every path of
+    a process (the bulk runner plans all rows in its main process). Other
+    processes can still take a planned name, so documents are written
+    through create(), which never replaces an existing file.
+    """
+    def __init__(self, config=None):
+        settings = {**DEFAULT_SETTINGS, **(config or {}).get("output_settings", {})}
+        self.directory = settings["directory"]
+        self.files_per_directory = settings["files_per_directory"]
+        self._days = {}
+        self._created = set()
+        self._lock = threading.Lock()
+
+    def day_directory(self, now):
+        root = self.directory or os.getcwd()
+        return os.path.join(root, now.strftime("%Y"), now.strftime("%B"), now.strftime("%d"))
+
+    def _day_index(self, day_dir):
+        """Lowercased names of the .docx files already in a day folder and its shards"""
+        index = self._days.get(day_dir)
+        if index is not None:
+            return index
+
+        index = set()
+        pending = [day_dir]
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as scan:
+                    for entry in scan:
+                        if entry.is_dir() and directory == day_dir and _SHARD_NAME.match(entry.name):
+                            pending.append(entry.path)
+                        elif entry.name.lower().endswith(".docx"):
+                            index.add(entry.name.lower())
+            except FileNotFoundError:
+                pass
+
+        # Only the current day is planned into; older indexes are dropped
+        self._days = {day_dir: index}
+        return index
+
+    def _ensure_directory(self, directory):
+        if directory not in self._created:
+            os.makedirs(directory, exist_ok=True)
+            self._created.add(directory)
+
+    def plan(self, name, now=None):
+        """Return a new, unused output path for name"""
+        return self.plan_batch([name], now)[0]
+
+    def plan_batch(self, names, now=None):
+        """Return an unused output path for each name, all in the same day folder
+
+        The date is read once, so a batch never straddles midnight.
+        """
+        now = now or datetime.now()
+        day_dir = self.day_directory(now)
+        paths = []
+        with self._lock:
+            index = self._day_index(day_dir)
+            for name in names:
+                directory = day_dir
+                if self.files_per_directory:
+                    shard = len(index) // self.files_per_directory + 1
+                    directory = os.path.join(day_dir, f"{shard:03d}")
+
+                file_name = unique_file_name(name, index)
+                self._ensure_directory(directory)
+                paths.append(os.path.join(directory, file_name))
+        return paths
+
+    def create(self, path):
+        """Create a planned output file, moving on to the next free name if it exists
+
+        The file is opened with exclusive create, so a document another
+        process (a second GUI, the render server, a bulk run) wrote under
+        the same name is never overwritten. Names found taken are added to
+        the day's index. Returns (binary file object, path created).
+        """
+        directory, file_name = os.path.split(path)
+        day_dir = directory
+        if _SHARD_NAME.match(os.path.basename(directory)):
+            day_dir = os.path.dirname(directory)
+        stem = _NUMBER_SUFFIX.sub("", os.path.splitext(file_name)[0])
+        collided = set()
+
+        while True:
+            try:
+                return open(path, 'xb'), path
+            except FileExistsError:
+                with self._lock:
+                    index = self._days.get(day_dir, collided)
+                    index.add(file_name.lower())
+                    file_name = unique_file_name(stem, index)
+                path = os.path.join(directory, file_name)
+
+class ArchivePlanner:
+    """Plans member names for documents written into a single .zip archive
+
+    Members are flat "<name>.docx" entries, numbered on collision like
+    OutputPlanner's files; taken seeds the index with the names of an
+    archive being appended to.
+    """
+    def __init__(self, taken=()):
+        self._taken = {name.lower() for name in taken}
+
+    def plan_batch(self, names, now=None):
+        return [unique_file_name(name, self._taken) for name in names]
@@ -0,0 +1,131 @@
+import re
+import xml.etree.ElementTree as ElementTree
+from xml.parsers import expat
+
+WORDPROCESSINGML_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+
+# Placeholders are bracketed tokens such as "[Name]" or "[PrintPin]"
+PLACEHOLDER_PATTERN = re.compile(r"\[[^\[\]]+\]")
+
+# Content type suffixes of the parts that hold document text ("stories")
+STORY_CONTENT_TYPES = (
+    ".main+xml",
+    ".header+xml",
+    ".footer+xml",
+    ".footnotes+xml",
+    ".endnotes+xml",
+)
+
+def wordprocessingml_tags(attributes):
+    """Return the paragraph and text tag names used by a part, given its root attributes
+
+    attributes is an expat ordered attribute list. Parts almost always bind
+    the WordprocessingML namespace to "w", but nothing requires it.
+    """
+    for index in range(0, len(attributes), 2):
+        name, value = attributes[index], attributes[index + 1]
+        if value == WORDPROCESSINGML_NS and (name == "xmlns" or name.startswith("xmlns:")):
+            prefix = name[6:]
+            if not prefix:
+                return "p", "t"
+            return f"{prefix}:p", f"{prefix}:t"
+    return "w:p", "w:t"
+
+def story_parts(package):
+    """Return the zip member names of all text-bearing parts of a package"""
+    content_types = ElementTree.fromstring(package.read("[Content_Types].xml"))
+    names = set(package.namelist())
+    parts = []
+    for override in content_types.iter(f"{{{CONTENT_TYPES_NS}}}Override"):
+        content_type = override.get("ContentType", "")
+        name = override.get("PartName", "").lstrip("/")
+        is_word_type = "wordprocessingml" in content_type or "ms-word" in content_type
+        if is_word_type and content_type.endswith(STORY_CONTENT_TYPES) and name in names:
+            parts.append(name)
+    return parts
+
+class PartIndex:
+    """Which parts of a template, and which paragraphs inside them, hold placeholders
+
+    parts maps a zip member name to the document-order indexes of its
+    paragraphs that contain a placeholder. Text boxes are covered because
+    their paragraphs are part of the story they are anchored in.
+    """
+    def __init__(self, parts, placeholders):
+        self.parts = parts
+        self.placeholders = placeholders
+
+    def __contains__(self, part_name):
+        return part_name in self.parts
+
+class _ParagraphScanner:
+    """Collects paragraph text from a part with expat, without building a tree"""
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self):
+        self.p_tag = "w:p"
+        self.t_tag = "w:t"
+        self.root_seen = False
+        self.paragraph_stack = []
+        self.next_paragraph_id = 0
+        self.texts = {}
+        self.current_text = None
+        self.paragraphs = []
+        self.placeholders = set()
+
+    def scan(self, source):
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.ordered_attributes = True
+        parser.StartElementHandler = self.start
+        parser.EndElementHandler = self.end
+        parser.CharacterDataHandler = self.data
+
+        while True:
+            chunk = source.read(self.CHUNK_SIZE)
+            parser.Parse(chunk, not chunk)
+            if not chunk:
+                break
+
+        # Nested paragraphs close before their parent, so restore document order
+        self.paragraphs.sort()
+        return self.paragraphs, self.placeholders
+
+    def start(self, name, attributes):
+        if not self.root_seen:
+            self.p_tag, self.t_tag = wordprocessingml_tags(attributes)
+            self.root_seen = True
+
+        if name == self.p_tag:
+            self.paragraph_stack.append(self.next_paragraph_id)
+            self.texts[self.next_paragraph_id] = []
+            self.next_paragraph_id += 1
+        elif name == self.t_tag and self.paragraph_stack:
+            self.current_text = self.texts[self.paragraph_stack[-1]]
+
+    def end(self, name):
+        if name == self.t_tag:
+            self.current_text = None
+        elif name == self.p_tag and self.paragraph_stack:
+            paragraph_id = self.paragraph_stack.pop()
+            found = PLACEHOLDER_PATTERN.findall("".join(self.texts.pop(paragraph_id)))
+            if found:
+                self.paragraphs.append(paragraph_id)
+                self.placeholders.update(found)
+
+    def data(self, text):
+        if self.current_text is not None:
+            self.current_text.append(text)
+
+def build_part_index(package):
+    """Scan every story part of an open template ZipFile once"""
+    parts = {}
+    placeholders = set()
+    for name in story_parts(package):
+        with package.open(name) as source:
+            paragraphs, found = _ParagraphScanner().scan(source)
+        if paragraphs:
+            parts[name] = paragraphs
+            placeholders.update(found)
+    return PartIndex(parts, placeholders)
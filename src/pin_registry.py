@@ -0,0 +1,127 @@
+import contextlib
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+class PinRegistry:
+    """Persistent registry of issued PINs and print PINs
+
+    Backed by SQLite: the PIN is the primary key and the print PIN has its
+    own index, so a collision check is a single index probe no matter how
+    many PINs have been issued. reserve() checks and inserts a whole batch
+    inside one write transaction, which also keeps concurrent processes
+    (GUI, bulk runs) from handing out the same PIN.
+
+    There are only 10,000 print PINs, so with unique_print_pins they only
+    have to be unique among the PINs issued in the last print_pin_days
+    days (0 keeps them unique forever).
+    """
+    def __init__(self, path, unique_print_pins=False, print_pin_days=90):
+        self.path = path
+        self.unique_print_pins = unique_print_pins
+        self.print_pin_days = print_pin_days
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS issued_pins ("
+            "pin TEXT PRIMARY KEY, print_pin TEXT NOT NULL, issued_at TEXT NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS issued_pins_print_pin ON issued_pins (print_pin)"
+        )
+
+    def _existing(self, column, values, since=None):
+        found = set()
+        values = list(values)
+        condition = " AND issued_at >= ?" if since else ""
+        for start in range(0, len(values), _QUERY_CHUNK):
+            chunk = values[start:start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._connection.execute(
+                f"SELECT {column} FROM issued_pins WHERE {column} IN ({placeholders}){condition}",
+                chunk + [since] if since else chunk
+            )
+            found.update(row[0] for row in rows)
+        return found
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Run the reserve() calls of a block in one write transaction
+
+        Everything reserved in the block is rolled back if it raises, so a
+        batch that cannot be completed leaves no PINs behind.
+        """
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self
+                finally:
+                    self._depth -= 1
+                return
+
+            self._connection.execute("BEGIN IMMEDIATE")
+            self._depth = 1
+            try:
+                yield self
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            else:
+                self._connection.execute("COMMIT")
+            finally:
+                self._depth = 0
+
+    def reserve(self, candidates):
+        """Register the (pin, print_pin) candidates that do not collide
+
+        Returns the accepted pairs in the order given; a candidate is
+        rejected if its PIN, or with unique_print_pins its print PIN, has
+        been issued before or appears earlier in the same batch.
+        """
+        with self.transaction():
+            now = datetime.now()
+            taken_pins = self._existing("pin", {pin for pin, _ in candidates})
+            taken_print_pins = set()
+            if self.unique_print_pins:
+                since = None
+                if self.print_pin_days:
+                    since = (now - timedelta(days=self.print_pin_days)).isoformat(timespec="seconds")
+                taken_print_pins = self._existing("print_pin", {print_pin for _, print_pin in candidates}, since)
+
+            accepted = []
+            for pin, print_pin in candidates:
+                if pin in taken_pins or print_pin in taken_print_pins:
+                    continue
+                taken_pins.add(pin)
+                if self.unique_print_pins:
+                    taken_print_pins.add(print_pin)
+                accepted.append((pin, print_pin))
+
+            issued_at = now.isoformat(timespec="seconds")
+            self._connection.executemany(
+                "INSERT INTO issued_pins (pin, print_pin, issued_at) VALUES (?, ?, ?)",
+                [(pin, print_pin, issued_at) for pin, print_pin in accepted]
+            )
+        return accepted
+
+    def is_issued(self, pin):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM issued_pins WHERE pin = ?", (pin,)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM issued_pins").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
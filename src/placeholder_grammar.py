@@ -0,0 +1,109 @@
+import re
+from utils.logger import Logger
+
+# "[Field]" or "[Field|modifier|...]", e.g. "[Name|upper]", "[Pin|last4]" or "[Date|%d-%m-%Y]"
+DEFAULT_DATE_FORMAT = "%d-%m-%Y"
+
+# Case variants templates used before modifiers existed
+LEGACY_ALIASES = {
+    "[NAME]": ("Name", ("upper",)),
+    "[name]": ("Name", ("lower",)),
+    "[USERNAME]": ("Username", ("upper",)),
+    "[username]": ("Username", ("lower",)),
+}
+
+# The placeholders every template could use before templates had schemas
+DEFAULT_PLACEHOLDERS = (
+    "[Name]", "[NAME]", "[name]",
+    "[Username]", "[USERNAME]", "[username]",
+    "[Pin]", "[PIN]", "[pin]",
+    "[PrintPin]", "[PRINTPIN]", "[printpin]",
+    "[Password]", "[PASSWORD]", "[password]",
+    "[Date]",
+)
+
+_SLICE_MODIFIER = re.compile(r"^(first|last)(\d+)$")
+
+def parse_placeholder(placeholder):
+    """Split a placeholder into its field name and modifiers
+
+    "[Pin|last4]" -> ("Pin", ("last4",)). The field keeps its case; fields
+    are looked up case-insensitively.
+    """
+    alias = LEGACY_ALIASES.get(placeholder)
+    if alias:
+        return alias
+    parts = placeholder[1:-1].split("|")
+    return parts[0].strip(), tuple(part.strip() for part in parts[1:])
+
+def to_text(value):
+    if hasattr(value, "strftime"):
+        return value.strftime(DEFAULT_DATE_FORMAT)
+    return "" if value is None else str(value)
+
+def _compile_modifier(modifier):
+    """Return the function for a modifier, or None if it is not one"""
+    if "%" in modifier:
+        return lambda value: value.strftime(modifier) if hasattr(value, "strftime") else to_text(value)
+    if modifier == "upper":
+        return lambda value: to_text(value).upper()
+    if modifier == "lower":
+        return lambda value: to_text(value).lower()
+    if modifier == "title":
+        return lambda value: to_text(value).title()
+    match = _SLICE_MODIFIER.match(modifier)
+    if match:
+        count = int(match.group(2))
+        if match.group(1) == "first":
+            return lambda value: to_text(value)[:count]
+        return lambda value: to_text(value)[-count:] if count else ""
+    return None
+
+def compile_modifiers(modifiers):
+    """Return a function applying the modifiers in order, or None if one is unknown"""
+    functions = [_compile_modifier(modifier) for modifier in modifiers]
+    if None in functions:
+        return None
+
+    def apply(value):
+        for function in functions:
+            value = function(value)
+        return to_text(value)
+    return apply
+
+class PlaceholderPlan:
+    """The placeholders of a template, parsed once into (field, modifier function) pairs
+
+    resolve() turns field values into a replacement map for exactly these
+    placeholders. A field's value is only computed, and a modifier only
+    run, when the template has a placeholder for it, so adding variants
+    costs nothing for templates that do not use them. Placeholders with an
+    unknown modifier are left in the document as they are.
+    """
+    def __init__(self, placeholders):
+        self.entries = {}
+        for placeholder in placeholders:
+            field, modifiers = parse_placeholder(placeholder)
+            apply = compile_modifiers(modifiers)
+            if apply is None:
+                Logger().warning(f"Unknown modifier in placeholder {placeholder}")
+                continue
+            self.entries[placeholder] = (field.lower(), apply)
+
+    def resolve(self, values):
+        """Return the replacement map for values, which maps lowercase field names to values
+
+        A value may be a callable, which is called once if a placeholder uses it.
+        """
+        computed = {}
+        replacements = {}
+        for placeholder, (field, apply) in self.entries.items():
+            if field not in values:
+                continue
+            if field not in computed:
+                value = values[field]
+                computed[field] = value() if callable(value) else value
+            replacements[placeholder] = apply(computed[field])
+        return replacements
+
+DEFAULT_PLAN = PlaceholderPlan(DEFAULT_PLACEHOLDERS)
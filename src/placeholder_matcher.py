@@ -0,0 +1,64 @@
+import bisect
+from part_index import PLACEHOLDER_PATTERN
+
+class PlaceholderMatcher:
+    """Replaces every placeholder of a replacement map in a single scan
+
+    Text is scanned once for bracketed tokens and each token is looked up
+    in the map, so the scan costs the same however many placeholders (and
+    modifier variants of them) the map holds. Tokens not in the map are
+    left as they are.
+    """
+    def __init__(self, replacements):
+        self.replacements = replacements
+
+    def replace(self, text):
+        """Return text with all placeholders substituted"""
+        if not self.replacements or "[" not in text:
+            return text
+        return PLACEHOLDER_PATTERN.sub(self._lookup, text)
+
+    def replace_segments(self, segments):
+        """Substitute placeholders in text split over several segments (text nodes)
+
+        Returns the new text of every segment, or None if nothing was
+        replaced. A value goes into the segment its placeholder starts in
+        and the rest of the placeholder is cut from the segments it spans;
+        all other text stays in the segment it was in.
+        """
+        text = "".join(segments)
+        if not self.replacements or "[" not in text:
+            return None
+
+        starts = []
+        position = 0
+        for segment in segments:
+            starts.append(position)
+            position += len(segment)
+        pieces = [[] for _ in segments]
+
+        def copy(begin, end):
+            while begin < end:
+                index = bisect.bisect_right(starts, begin) - 1
+                stop = min(end, starts[index] + len(segments[index]))
+                pieces[index].append(text[begin:stop])
+                begin = stop
+
+        replaced = False
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            placeholder = match.group(0)
+            if placeholder not in self.replacements:
+                continue
+            copy(position, match.start())
+            pieces[bisect.bisect_right(starts, match.start()) - 1].append(self.replacements[placeholder])
+            position = match.end()
+            replaced = True
+        if not replaced:
+            return None
+        copy(position, len(text))
+        return ["".join(piece) for piece in pieces]
+
+    def _lookup(self, match):
+        placeholder = match.group(0)
+        return self.replacements.get(placeholder, placeholder)
@@ -0,0 +1,307 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import quote
+from config_manager import ConfigManager
+from credential_generator import CredentialGenerator
+from document_processor import DocumentProcessor
+from template_catalog import TemplateCatalog
+from utils.logger import Logger, configure_logging
+from utils.metrics import configure_metrics, metrics
+from utils.profiling import configure_profiling
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+MAX_REQUEST_BYTES = 1024 * 1024
+
+DEFAULT_SETTINGS = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "workers": 8,
+    "keep_alive_timeout": 5,
+    "output": "bytes"
+}
+
+class RenderError(Exception):
+    """A render request that cannot be served, with the HTTP status to answer with"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class RenderService:
+    """Renders documents for JSON requests with templates kept warm in memory
+
+    With a config_manager, edits to config.json are picked up between
+    requests without restarting the server.
+    """
+    def __init__(self, config, config_manager=None):
+        self.config = config
+        self.config_manager = config_manager
+        self.logger = Logger()
+        self.doc_processor = DocumentProcessor(config)
+        self.cred_generator = CredentialGenerator(config)
+        self.catalog = TemplateCatalog(
+            config, config.get("template_catalog", {}).get("refresh_interval", 5.0)
+        )
+        self.started = time.time()
+        self.counts = {"requests": 0, "rendered": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def template_names(self):
+        return self.catalog.names()
+
+    def preload(self):
+        """Compile every catalogued template so the first request is not slower"""
+        for entry in self.catalog.entries():
+            try:
+                template = self.doc_processor.template_cache.get(entry.path)
+                if self.config.get("render_engine", "docx") == "docx":
+                    template.preload()
+            except Exception as e:
+                self.logger.warning(f"Could not preload template {entry.name}: {str(e)}")
+        self.logger.info(f"Preloaded {len(self.doc_processor.template_cache)} templates")
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def render(self, request):
+        """Render one request; returns (result, document bytes or None)
+
+        request holds "template", "name", optionally "username",
+        "tables" with the records of the template's repeating rows
+        ({"Hires": [{"Name": ...}, ...]}), and "output": "bytes" to get the
+        document back or "path" to have it saved to the dated output folder.
+        """
+        self._count("requests")
+        if self.config_manager is not None:
+            self.config_manager.reload_if_changed()
+        if not isinstance(request, dict):
+            raise RenderError(400, "Request body must be a JSON object")
+
+        template = str(request.get("template") or "").strip()
+        name = str(request.get("name") or "").strip()
+        username = str(request.get("username") or "").strip()
+        output = request.get("output") or self.config.get("render_server", {}).get("output", "bytes")
+        tables = request.get("tables") or {}
+
+        if not template:
+            raise RenderError(400, "Template is required")
+        if "/" in name or "\\" in name:
+            raise RenderError(400, "Name must not contain path separators")
+        if output not in ("bytes", "path"):
+            raise RenderError(400, 'Output must be "bytes" or "path"')
+        if not isinstance(tables, dict) or not all(
+                isinstance(records, list) and all(isinstance(record, dict) for record in records)
+                for records in tables.values()):
+            raise RenderError(400, "Tables must map table names to lists of objects")
+        entry = self.catalog.get(template) if os.path.basename(template) == template else None
+        if entry is None:
+            raise RenderError(404, f"Unknown template: {template}")
+
+        template_path = entry.path
+        schema = entry.schema
+        missing = schema.missing_fields({"name": name, "username": username})
+        if missing:
+            verb = "is" if len(missing) == 1 else "are"
+            raise RenderError(400, f"{' and '.join(missing)} {verb} required for this template")
+
+        pin, print_pin, password = self.cred_generator.generate_credentials(schema)
+        replacements = self.doc_processor.create_replacements_dict(
+            name, username, pin, print_pin, password, schema, tables
+        )
+        result = {"template": template, "name": name, "pin": pin, "print_pin": print_pin}
+
+        if output == "path":
+            success, message, output_path = self.doc_processor.create_document(
+                template_path, self.doc_processor.get_output_path(name), replacements
+            )
+            self._check(success, message)
+            result["output_path"] = output_path
+            return result, None
+
+        success, message, document = self.doc_processor.render_to_bytes(
+            template_path, replacements, label=f"{name} (HTTP response)"
+        )
+        self._check(success, message)
+        return result, document
+
+    def _check(self, success, message):
+        if not success:
+            # The message can name template and output paths; it is logged, not sent
+            self._count("failed")
+            self.logger.error(f"Render failed: {message}")
+            raise RenderError(500, "The document could not be rendered")
+        self._count("rendered")
+
+    def health(self):
+        with self._lock:
+            counts = dict(self.counts)
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "templates": self.template_names(),
+            "cached_templates": len(self.doc_processor.template_cache),
+            "counts": counts,
+            "metrics": metrics.snapshot() if metrics.enabled else None
+        }
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 handler; connections stay open between requests (keep-alive)"""
+    protocol_version = "HTTP/1.1"
+    server_version = "AutoKvittering"
+
+    def setup(self):
+        # Idle keep-alive connections are closed so they do not hold a worker forever
+        self.timeout = self.server.keep_alive_timeout
+        super().setup()
+
+    def log_message(self, format, *args):
+        self.server.service.logger.info(f"{self.address_string()} {format % args}")
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if self.close_connection or self.server.has_waiting_connections():
+            # Give the worker to a waiting connection instead of idling on this one
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, data):
+        self.send_body(status, json.dumps(data).encode('utf-8'), "application/json")
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == "/health":
+            self.send_json(200, service.health())
+        elif self.path == "/metrics":
+            body = metrics.to_prometheus(metrics.snapshot()).encode('utf-8')
+            self.send_body(200, body, "text/plain; version=0.0.4")
+        else:
+            self.send_json(404, {"error": f"Not found: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/render":
+            self.send_json(404, {"error": f"Not found: {self.path}"})
+            return
+
+        try:
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                # The body's end is unknown, so the connection cannot be reused
+                self.close_connection = True
+                raise RenderError(400, "Invalid Content-Length")
+            if length > MAX_REQUEST_BYTES:
+                self.close_connection = True
+                raise RenderError(413, "Request body is too large")
+            try:
+                request = json.loads(self.rfile.read(length) or b"null")
+            except ValueError:
+                raise RenderError(400, "Request body is not valid JSON")
+
+            result, document = self.server.service.render(request)
+            if document is None:
+                self.send_json(200, result)
+            else:
+                self.send_body(200, document, DOCX_CONTENT_TYPE, {
+                    "Content-Disposition": f"attachment; filename*=UTF-8''{quote(result['name'] + '.docx')}",
+                    "X-Pin": result["pin"],
+                    "X-Print-Pin": result["print_pin"]
+                })
+        except RenderError as e:
+            self.send_json(e.status, {"error": str(e)})
+        except Exception as e:
+            self.server.service.logger.error(f"Render request failed: {str(e)}")
+            self.send_json(500, {"error": "Internal server error"})
+
+class RenderServer(HTTPServer):
+    """HTTP server handing each connection to a fixed pool of worker threads
+
+    A keep-alive connection holds its worker until the client closes it or
+    it sits idle for keep_alive_timeout seconds. While connections are
+    waiting for a worker, responses close their connection instead of
+    keeping it alive, so idle clients cannot starve the others.
+    """
+    def __init__(self, service, host="127.0.0.1", port=8765, workers=8, keep_alive_timeout=5):
+        self.service = service
+        self.keep_alive_timeout = keep_alive_timeout
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="RenderServer")
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+        super().__init__((host, port), RenderRequestHandler)
+
+    def has_waiting_connections(self):
+        return self._waiting > 0
+
+    def process_request(self, request, client_address):
+        with self._waiting_lock:
+            self._waiting += 1
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        with self._waiting_lock:
+            self._waiting -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+def create_server(config, host=None, port=None, workers=None, config_manager=None):
+    """Create a RenderServer with its templates preloaded; port 0 picks a free port"""
+    settings = {**DEFAULT_SETTINGS, **config.get("render_server", {})}
+    service = RenderService(config, config_manager)
+    service.preload()
+    return RenderServer(
+        service,
+        host=host or settings["host"],
+        port=settings["port"] if port is None else port,
+        workers=workers or settings["workers"],
+        keep_alive_timeout=settings["keep_alive_timeout"]
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve document renders over HTTP on localhost")
+    parser.add_argument("--host", help="Address to listen on (default from config: 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="Port to listen on")
+    parser.add_argument("--workers", type=int, help="Number of worker threads")
+    args = parser.parse_args(argv)
+
+    config_manager = ConfigManager()
+    configure_logging(config_manager.config.get("logging"))
+    configure_metrics(config_manager.config.get("metrics"))
+    configure_profiling(config_manager.config.get("profiling"))
+    logger = Logger()
+
+    server = create_server(
+        config_manager.config, args.host, args.port, args.workers, config_manager=config_manager
+    )
+    host, port = server.server_address[:2]
+    logger.info(f"Render server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info("Render server stopped")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import queue
+import threading
+from utils.logger import Logger
+
+class RenderWorker:
+    """Runs render jobs on a background thread and reports back through a queue
+
+    Jobs are processed one at a time in submission order, so a second job
+    can be queued while the first is still rendering. Every state change is
+    posted to a thread-safe event queue as (kind, job_id, payload), where
+    kind is one of "queued", "started", "progress", "done" or "failed".
+    The GUI drains it with poll() from its own thread, e.g. via root.after.
+    """
+    def __init__(self, render_function):
+        self.render_function = render_function
+        self.logger = Logger()
+        self._jobs = queue.Queue()
+        self._events = queue.Queue()
+        self._next_job_id = 1
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="RenderWorker", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Finish the queued jobs and stop the thread"""
+        self._jobs.put(None)
+        self._thread.join(timeout)
+
+    @property
+    def pending(self):
+        """Number of submitted jobs that have not finished yet"""
+        with self._lock:
+            return self._pending
+
+    def submit(self, **job):
+        """Queue a job; its keyword arguments are passed to the render function"""
+        with self._lock:
+            job_id = self._next_job_id
+            self._next_job_id += 1
+            self._pending += 1
+        self._events.put(("queued", job_id, job))
+        self._jobs.put((job_id, job))
+        return job_id
+
+    def poll(self):
+        """Return every event posted since the last poll, without blocking"""
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _run(self):
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                break
+
+            job_id, job = item
+            self._events.put(("started", job_id, job))
+            try:
+                result = self.render_function(
+                    progress=lambda message: self._events.put(("progress", job_id, message)),
+                    **job
+                )
+                kind, payload = "done", result
+            except Exception as e:
+                self.logger.error(f"Render job {job_id} failed: {str(e)}")
+                kind, payload = "failed", str(e)
+
+            with self._lock:
+                self._pending -= 1
+            self._events.put((kind, job_id, payload))
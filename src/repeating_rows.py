@@ -0,0 +1,119 @@
+import copy
+import re
+from part_index import PLACEHOLDER_PATTERN, WORDPROCESSINGML_NS
+from placeholder_grammar import compile_modifiers, parse_placeholder
+from placeholder_matcher import PlaceholderMatcher
+
+# "[#Hires]" anywhere in a table row makes the row repeat once per record of the
+# "Hires" list; "[Hires.Name]" in the row is filled from each record's "Name"
+TABLE_MARKER = re.compile(r"\[#([^\[\]]+)\]")
+
+_TR = f"{{{WORDPROCESSINGML_NS}}}tr"
+_P = f"{{{WORDPROCESSINGML_NS}}}p"
+_T = f"{{{WORDPROCESSINGML_NS}}}t"
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+def table_placeholder(table):
+    return f"[#{table}]"
+
+def split_replacements(replacements):
+    """Split a replacement map into scalar replacements and the table lists
+
+    Returns (scalars, tables), tables mapping a table name to its records.
+    """
+    scalars = {}
+    tables = {}
+    for placeholder, value in replacements.items():
+        match = TABLE_MARKER.fullmatch(placeholder)
+        if match and isinstance(value, (list, tuple)):
+            tables[match.group(1)] = value
+        else:
+            scalars[placeholder] = value
+    return scalars, tables
+
+def find_table(text, tables):
+    """Return the name of the first table with data whose marker is in text, or None"""
+    for match in TABLE_MARKER.finditer(text):
+        if match.group(1) in tables:
+            return match.group(1)
+    return None
+
+class RowFiller:
+    """Placeholder values for the copies of one repeating row
+
+    The row's field placeholders are parsed once, modifiers included
+    ("[Hires.Name|upper]"); each record only swaps their values. The
+    marker itself is removed.
+    """
+    def __init__(self, table, row_text, replacements):
+        prefix = f"{table}."
+        self.fields = {}
+        for placeholder in set(PLACEHOLDER_PATTERN.findall(row_text)):
+            field, modifiers = parse_placeholder(placeholder)
+            apply = compile_modifiers(modifiers)
+            if field.startswith(prefix) and apply is not None:
+                self.fields[placeholder] = (field[len(prefix):], apply)
+        self.values = dict(replacements)
+        self.values[table_placeholder(table)] = ""
+        self.values.update((placeholder, "") for placeholder in self.fields)
+        self.matcher = PlaceholderMatcher(self.values)
+
+    def matcher_for(self, record):
+        for placeholder, (field, apply) in self.fields.items():
+            self.values[placeholder] = apply(record.get(field))
+        return self.matcher
+
+def expand_rows(paragraphs, tables, replacements):
+    """Repeat the rows of a parsed part whose paragraphs carry a table marker
+
+    paragraphs are the python-docx paragraphs of the part that hold
+    placeholders. Each marked row is cloned once per record and the clones
+    replace it. Returns True if any row was expanded.
+    """
+    rows = []
+    for paragraph in paragraphs:
+        table = find_table(paragraph.text, tables)
+        if table is None:
+            continue
+        row = next(paragraph._p.iterancestors(_TR), None)
+        if row is not None and all(row is not seen for seen, _ in rows):
+            rows.append((row, table))
+
+    for row, table in rows:
+        _expand_row(row, tables[table], replacements, table)
+    return bool(rows)
+
+def _expand_row(row, records, replacements, table):
+    # Text nodes grouped by the paragraph that owns them, as indexes into row.iter(w:t)
+    paragraphs = {}
+    texts = []
+    for index, node in enumerate(row.iter(_T)):
+        owner = next(node.iterancestors(_P), None)
+        paragraphs.setdefault(owner, []).append(index)
+        texts.append(node.text or "")
+
+    plan = []
+    for indexes in paragraphs.values():
+        segments = [texts[index] for index in indexes]
+        if PLACEHOLDER_PATTERN.search("".join(segments)):
+            plan.append((indexes, segments))
+
+    filler = RowFiller(table, "".join("".join(segments) for _, segments in plan), replacements)
+    clones = []
+    for record in records:
+        matcher = filler.matcher_for(record)
+        clone = copy.deepcopy(row)
+        nodes = list(clone.iter(_T))
+        for indexes, segments in plan:
+            replaced = matcher.replace_segments(segments)
+            if replaced is None:
+                continue
+            for index, original_text, text in zip(indexes, segments, replaced):
+                if text != original_text:
+                    nodes[index].text = text
+                    nodes[index].set(_XML_SPACE, "preserve")
+        clones.append(clone)
+
+    parent = row.getparent()
+    position = parent.index(row)
+    parent[position:position + 1] = clones
@@ -0,0 +1,229 @@
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import zipfile
+from xml.parsers import expat
+from part_index import PLACEHOLDER_PATTERN, PartIndex, build_part_index, wordprocessingml_tags
+from repeating_rows import TABLE_MARKER
+
+ARTIFACT_SUFFIX = ".akt"
+FORMAT_VERSION = 1
+
+# Magic, format version and the length of the JSON metadata that follows
+_HEADER = struct.Struct("<8sII")
+_MAGIC = b"AKTPL\r\n\x1a"
+
+_XML_ENCODING = re.compile(rb'^<\?xml[^>]*encoding="([^"]+)"')
+
+def artifact_path(directory, content_hash):
+    return os.path.join(directory, content_hash + ARTIFACT_SUFFIX)
+
+class PartSkeleton:
+    """The decompressed XML of a part, pre-split around the spans that hold placeholders
+
+    spans are (start, end) byte offsets of the outermost paragraphs with
+    placeholders, or of the table rows carrying a repeating-row marker.
+    Everything between the spans is written out unchanged.
+    """
+    def __init__(self, xml, spans, p_tag, t_tag):
+        self.xml = xml
+        self.spans = spans
+        self.tags = (p_tag, t_tag)
+
+class _SpanScanner:
+    """Finds the byte spans of a part that a render has to rewrite"""
+    def __init__(self, xml):
+        self.xml = xml
+        self.parser = None
+        self.p_tag = "w:p"
+        self.t_tag = "w:t"
+        self.tr_tag = "w:tr"
+        self.root_seen = False
+        self.paragraphs = []
+        self.rows = []
+        self.marked_rows = set()
+        self.current_text = None
+        self.spans = []
+
+    def scan(self):
+        self.parser = expat.ParserCreate()
+        self.parser.buffer_text = True
+        self.parser.ordered_attributes = True
+        self.parser.StartElementHandler = self.start
+        self.parser.EndElementHandler = self.end
+        self.parser.CharacterDataHandler = self.data
+        self.parser.Parse(self.xml, True)
+
+        # Nested spans (a text box inside a paragraph) collapse into the outer one
+        merged = []
+        for start, end in sorted(self.spans):
+            if merged and start < merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return [tuple(span) for span in merged]
+
+    def _end_offset(self):
+        # CurrentByteIndex points at the start of the closing tag
+        return self.xml.index(b">", self.parser.CurrentByteIndex) + 1
+
+    def start(self, name, attributes):
+        if not self.root_seen:
+            self.p_tag, self.t_tag = wordprocessingml_tags(attributes)
+            self.tr_tag = self.p_tag[:-1] + "tr"
+            self.root_seen = True
+
+        if name == self.p_tag:
+            self.paragraphs.append([self.parser.CurrentByteIndex, [], False])
+        elif name == self.tr_tag:
+            self.rows.append(self.parser.CurrentByteIndex)
+        elif name == self.t_tag and self.paragraphs:
+            self.current_text = self.paragraphs[-1][1]
+
+    def end(self, name):
+        if name == self.t_tag:
+            self.current_text = None
+        elif name == self.p_tag and self.paragraphs:
+            start, text, marked = self.paragraphs.pop()
+            text = "".join(text)
+            if TABLE_MARKER.search(text) and self.rows:
+                self.marked_rows.add(len(self.rows) - 1)
+            elif PLACEHOLDER_PATTERN.search(text):
+                if self.paragraphs:
+                    self.paragraphs[0][2] = True
+                else:
+                    marked = True
+            if marked:
+                self.spans.append((start, self._end_offset()))
+        elif name == self.tr_tag and self.rows:
+            start = self.rows.pop()
+            if len(self.rows) in self.marked_rows:
+                self.marked_rows.discard(len(self.rows))
+                self.spans.append((start, self._end_offset()))
+
+    def data(self, text):
+        if self.current_text is not None:
+            self.current_text.append(text)
+
+def _skeleton_for(xml):
+    """Return (spans, p_tag, t_tag) for a part, or None if it cannot be pre-split"""
+    match = _XML_ENCODING.match(xml)
+    if match and match.group(1).lower() not in (b"utf-8", b"utf8"):
+        return None
+    scanner = _SpanScanner(xml)
+    spans = scanner.scan()
+    return spans, scanner.p_tag, scanner.t_tag
+
+def compile_artifact(template_path, destination, content_hash):
+    """Write the compiled artifact of a template to destination
+
+    Layout: header, JSON metadata, the decompressed XML of every part with
+    placeholders, then the template's own bytes unchanged, so the untouched
+    members can be copied from it without recompressing.
+    """
+    with open(template_path, 'rb') as f:
+        package_bytes = f.read()
+
+    with zipfile.ZipFile(template_path) as package:
+        part_index = build_part_index(package)
+        blobs = []
+        skeletons = {}
+        offset = 0
+        for name in part_index.parts:
+            xml = package.read(name)
+            skeleton = _skeleton_for(xml)
+            if skeleton is None:
+                continue
+            spans, p_tag, t_tag = skeleton
+            skeletons[name] = {
+                "offset": offset, "length": len(xml), "spans": spans, "p_tag": p_tag, "t_tag": t_tag
+            }
+            blobs.append(xml)
+            offset += len(xml)
+
+    metadata = json.dumps({
+        "content_hash": content_hash,
+        "source": os.path.basename(template_path),
+        "parts": part_index.parts,
+        "placeholders": sorted(part_index.placeholders),
+        "skeletons": skeletons,
+        "package_offset": offset,
+        "package_length": len(package_bytes)
+    }).encode('utf-8')
+
+    temp_path = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, len(metadata)))
+            f.write(metadata)
+            for blob in blobs:
+                f.write(blob)
+            f.write(package_bytes)
+        os.replace(temp_path, destination)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+class TemplateArtifact:
+    """A compiled template mapped into memory
+
+    The file is opened with mmap, so every process rendering from it
+    shares one copy in the page cache; nothing is parsed or decompressed
+    at load time apart from the small JSON metadata. A truncated or
+    foreign file raises ValueError.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = None
+        self.skeletons = {}
+        self.package = None
+        try:
+            self._load(path)
+        except (KeyError, TypeError, IndexError, struct.error, zipfile.BadZipFile) as e:
+            self.close()
+            raise ValueError(f"Invalid template artifact {path}: {str(e)}")
+        except Exception:
+            self.close()
+            raise
+
+    def _load(self, path):
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"Truncated template artifact: {path}")
+        magic, version, metadata_length = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a template artifact of format version {FORMAT_VERSION}: {path}")
+        data_offset = _HEADER.size + metadata_length
+        if data_offset > len(self._map):
+            raise ValueError(f"Truncated template artifact: {path}")
+        metadata = json.loads(self._map[_HEADER.size:data_offset])
+        if data_offset + metadata["package_offset"] + metadata["package_length"] != len(self._map):
+            raise ValueError(f"Truncated template artifact: {path}")
+        self._view = memoryview(self._map)
+
+        self.content_hash = metadata["content_hash"]
+        self.part_index = PartIndex(metadata["parts"], set(metadata["placeholders"]))
+        for name, skeleton in metadata["skeletons"].items():
+            start = data_offset + skeleton["offset"]
+            self.skeletons[name] = PartSkeleton(
+                self._view[start:start + skeleton["length"]],
+                [tuple(span) for span in skeleton["spans"]],
+                skeleton["p_tag"],
+                skeleton["t_tag"]
+            )
+        # zipfile accepts data in front of an archive, so the embedded
+        # template is read straight from the map
+        self.package = zipfile.ZipFile(self._map)
+
+    def close(self):
+        """Unmap the file; the artifact cannot be rendered from afterwards"""
+        if self.package is not None:
+            self.package.close()
+        for skeleton in self.skeletons.values():
+            skeleton.xml.release()
+        if self._view is not None:
+            self._view.release()
+        self._map.close()
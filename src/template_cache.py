@@ -0,0 +1,210 @@
+import copy
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from part_index import WORDPROCESSINGML_NS, build_part_index
+from template_artifact import TemplateArtifact, artifact_path
+from template_schema import cached_content_hash
+from utils.logger import Logger
+from utils.metrics import metrics
+from utils.zip_writer import PassthroughZipFile
+
+class PartCopy:
+    """A fresh copy of one template part, checked out for a single render"""
+    def __init__(self, name, element, paragraphs):
+        self.name = name
+        self.element = element
+        self.paragraphs = paragraphs
+
+    def serialize(self):
+        from docx.opc.oxml import serialize_part_xml
+        return serialize_part_xml(self.element)
+
+class CompiledTemplate:
+    """A template's raw package plus the index of parts and paragraphs holding placeholders
+
+    Built either from the template's bytes or from a TemplateArtifact, in
+    which case the package and the pre-split part skeletons are read from
+    the memory-mapped artifact instead of this process's heap.
+    """
+    def __init__(self, path, mtime, size, content_hash, data=None, artifact=None):
+        self.path = path
+        self.mtime = mtime
+        self.size = size
+        self.content_hash = content_hash
+        if artifact is not None:
+            # Mapped pages live in the shared page cache, not in this cache's budget
+            self.nbytes = 0
+            self.package = artifact.package
+            self.part_index = artifact.part_index
+            self.skeletons = artifact.skeletons
+        else:
+            self.nbytes = len(data)
+            self.package = zipfile.ZipFile(io.BytesIO(data))
+            self.part_index = build_part_index(self.package)
+            self.skeletons = {}
+        self._elements = None
+        self._lock = threading.Lock()
+
+    def _parsed_parts(self):
+        """Parse the indexed parts with python-docx's element classes on first use
+
+        python-docx is imported here rather than at module level, so the xml
+        engine and headless tools never load it. The parsed trees count
+        towards nbytes by the length of their XML.
+        """
+        from docx.oxml import parse_xml
+        with self._lock:
+            if self._elements is None:
+                elements = {}
+                for name in self.part_index.parts:
+                    xml = (bytes(self.skeletons[name].xml) if name in self.skeletons
+                           else self.package.read(name))
+                    elements[name] = parse_xml(xml)
+                    self.nbytes += len(xml)
+                self._elements = elements
+            return self._elements
+
+    def preload(self):
+        """Parse the indexed parts now instead of on the first docx render"""
+        self._parsed_parts()
+
+    def checkout(self):
+        """Return fresh copies of every part that holds placeholders
+
+        Each copy carries the placeholder paragraphs found for it at compile
+        time, so a render never walks paragraphs or parts without any. The
+        compiled elements themselves are never modified.
+        """
+        from docx.text.paragraph import Paragraph
+        copies = []
+        for name, element in self._parsed_parts().items():
+            clone = copy.deepcopy(element)
+            paragraphs = list(clone.iter(f"{{{WORDPROCESSINGML_NS}}}p"))
+            copies.append(PartCopy(name, clone, [
+                Paragraph(paragraphs[index], None)
+                for index in self.part_index.parts[name]
+            ]))
+        return copies
+
+    def save(self, target, changed_parts):
+        """Write the package to a path or binary file object
+
+        changed_parts maps part names to their new XML. Every other member
+        is copied from the template archive without being decompressed.
+        """
+        with PassthroughZipFile(target, 'w', zipfile.ZIP_DEFLATED) as output:
+            for info in self.package.infolist():
+                if info.filename in changed_parts:
+                    output_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                    output_info.compress_type = zipfile.ZIP_DEFLATED
+                    output.writestr(output_info, changed_parts[info.filename])
+                else:
+                    output.copy_member(self.package, info)
+
+class TemplateCache:
+    """LRU cache of compiled templates keyed by path, mtime and content hash
+
+    max_bytes caps the templates' bytes held in memory plus the XML length
+    of their parsed parts; memory-mapped artifacts only count the latter.
+    With an artifact_directory, a template whose content hash has a
+    compiled artifact there (see compile_templates.py) is loaded from it
+    instead of being read and indexed again.
+    """
+    def __init__(self, max_entries=8, max_bytes=64 * 1024 * 1024, artifact_directory=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.artifact_directory = artifact_directory
+        self.logger = Logger()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, template_path):
+        """Return the compiled template, compiling it on a miss"""
+        path = os.path.abspath(template_path)
+        stat = os.stat(path)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry.mtime == stat.st_mtime_ns and entry.size == stat.st_size:
+                self._entries.move_to_end(path)
+                # Parsing on the first docx render may have grown the entries since they were added
+                self._evict()
+                metrics.counter("template_cache.hits").inc()
+                return entry
+
+        metrics.counter("template_cache.misses").inc()
+
+        data = None
+        if self.artifact_directory:
+            # The schema sidecar gives the content hash without reading the template while it is unchanged
+            content_hash = cached_content_hash(path, stat)
+            if content_hash is None:
+                data, content_hash = self._read(path)
+            compiled = self._load_artifact(path, stat, content_hash)
+            if compiled is not None:
+                with self._lock:
+                    self._entries[path] = compiled
+                    self._entries.move_to_end(path)
+                    self._evict()
+                return compiled
+
+        if data is None:
+            data, content_hash = self._read(path)
+
+        # A touched but unchanged file only needs its mtime refreshed
+        if entry and entry.content_hash == content_hash:
+            entry.mtime = stat.st_mtime_ns
+            entry.size = stat.st_size
+            compiled = entry
+        else:
+            with metrics.time("template_cache.compile"):
+                compiled = CompiledTemplate(path, stat.st_mtime_ns, stat.st_size, content_hash, data)
+            self.logger.info(f"Compiled template: {path}")
+
+        with self._lock:
+            self._entries[path] = compiled
+            self._entries.move_to_end(path)
+            self._evict()
+        return compiled
+
+    def _read(self, path):
+        """Return the template's bytes and their content hash"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        return data, hashlib.sha256(data).hexdigest()
+
+    def _load_artifact(self, path, stat, content_hash):
+        """Return the template compiled from its artifact, or None if there is no usable one"""
+        artifact_file = artifact_path(self.artifact_directory, content_hash)
+        if not os.path.exists(artifact_file):
+            return None
+        try:
+            artifact = TemplateArtifact(artifact_file)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring template artifact {artifact_file}: {str(e)}")
+            return None
+        if artifact.content_hash != content_hash:
+            artifact.close()
+            return None
+        self.logger.info(f"Loaded compiled template: {path}")
+        return CompiledTemplate(path, stat.st_mtime_ns, stat.st_size, content_hash, artifact=artifact)
+
+    def _evict(self):
+        """Drop least recently used templates until the cache fits its limits"""
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or
+            sum(entry.nbytes for entry in self._entries.values()) > self.max_bytes
+        ):
+            path, _ = self._entries.popitem(last=False)
+            self.logger.info(f"Evicted template from cache: {path}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,200 @@
+import os
+import threading
+import time
+from template_schema import load_template_schema
+from utils.logger import Logger
+
+class TemplateEntry:
+    """A template in the catalog with the metadata gathered when it was indexed"""
+    def __init__(self, name, path, mtime, size, schema):
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self.size = size
+        self.schema = schema
+
+    @property
+    def content_hash(self):
+        return self.schema.content_hash
+
+    @property
+    def placeholders(self):
+        return self.schema.placeholders
+
+    @property
+    def modified(self):
+        """Last modification time in seconds since the epoch"""
+        return self.mtime / 1e9
+
+class TemplateCatalog:
+    """Index of the .docx templates in the configured template directory
+
+    The directory is listed with one os.scandir pass per refresh and only
+    new or changed files (by mtime and size) are opened, so on a slow
+    network share a refresh of an unchanged directory costs one listing.
+    Refreshes are polled: queries refresh at most once per
+    refresh_interval seconds. The directory is read from the config on
+    every refresh, so changing template_directory re-indexes it.
+
+    Refreshes index files without holding the lock and then swap in the
+    new snapshot, so readers passing refresh=False never wait on disk.
+    """
+    def __init__(self, config, refresh_interval=5.0):
+        self.config = config
+        self.refresh_interval = refresh_interval
+        self.logger = Logger()
+        self._entries = {}
+        self._errors = {}
+        self._directory = None
+        self._last_refresh = None
+        self._last_miss_refresh = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.RLock()
+        self._refresh_thread = None
+
+    @property
+    def directory(self):
+        return self.config["template_directory"]
+
+    def refresh(self):
+        """Re-index the directory; returns the (added, changed, removed) template names"""
+        with self._refresh_lock:
+            directory = self.directory
+            with self._lock:
+                if directory == self._directory:
+                    entries, errors = dict(self._entries), dict(self._errors)
+                else:
+                    entries, errors = {}, {}
+
+            try:
+                with os.scandir(directory) as scan:
+                    files = sorted((
+                        entry for entry in scan
+                        if entry.name.lower().endswith(".docx")
+                        and not entry.name.startswith("~$")
+                        and entry.is_file()
+                    ), key=lambda entry: entry.name)
+            except OSError as e:
+                self.logger.error(f"Error listing templates in {directory}: {str(e)}")
+                files = []
+
+            added, changed = [], []
+            seen = set()
+            for file in files:
+                seen.add(file.name)
+                try:
+                    stat = file.stat()
+                except OSError:
+                    continue
+
+                current = entries.get(file.name) or errors.get(file.name)
+                if current and current.mtime == stat.st_mtime_ns and current.size == stat.st_size:
+                    continue
+
+                (changed if file.name in entries else added).append(file.name)
+                self._index(entries, errors, file.name, file.path, stat)
+
+            removed = [name for name in entries if name not in seen]
+            for name in removed:
+                del entries[name]
+            for name in [name for name in errors if name not in seen]:
+                del errors[name]
+
+            with self._lock:
+                self._entries, self._errors = entries, errors
+                self._directory = directory
+                self._last_refresh = time.monotonic()
+            if added or changed or removed:
+                self.logger.info(
+                    f"Template catalog: {len(added)} added, {len(changed)} changed, "
+                    f"{len(removed)} removed ({len(entries)} templates)"
+                )
+            return added, changed, removed
+
+    def _index(self, entries, errors, name, path, stat):
+        try:
+            schema = load_template_schema(path)
+        except Exception as e:
+            # Remember the failure so an unchanged broken file is not retried on every refresh
+            self.logger.warning(f"Could not index template {name}: {str(e)}")
+            entries.pop(name, None)
+            errors[name] = TemplateEntry(name, path, stat.st_mtime_ns, stat.st_size, None)
+            return
+
+        errors.pop(name, None)
+        entries[name] = TemplateEntry(name, path, stat.st_mtime_ns, stat.st_size, schema)
+
+    def _refresh_due(self):
+        with self._lock:
+            return (self._last_refresh is None or self.directory != self._directory or
+                    time.monotonic() - self._last_refresh >= self.refresh_interval)
+
+    def maybe_refresh(self):
+        """Refresh if the directory changed in the config or refresh_interval has passed"""
+        with self._refresh_lock:
+            if self._refresh_due():
+                self.refresh()
+
+    def refresh_in_background(self):
+        """Run maybe_refresh on a daemon thread unless the previous one is still running"""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._background_refresh, name="TemplateCatalog", daemon=True
+            )
+            self._refresh_thread.start()
+
+    def _background_refresh(self):
+        try:
+            self.maybe_refresh()
+        except Exception as e:
+            self.logger.error(f"Error refreshing template catalog: {str(e)}")
+
+    def names(self, refresh=True):
+        """Sorted names of the indexed templates; refresh=False reads the last snapshot"""
+        if refresh:
+            self.maybe_refresh()
+        with self._lock:
+            return sorted(self._entries)
+
+    def entries(self):
+        self.maybe_refresh()
+        with self._lock:
+            return [self._entries[name] for name in sorted(self._entries)]
+
+    def get(self, name, refresh=True):
+        """Return the entry for a template name, or None if there is no such template
+
+        A name that is not indexed triggers a refresh, so a template added
+        since the last poll is found right away. Such refreshes happen at
+        most once per refresh_interval, so rows or requests naming a
+        missing template cannot make every lookup rescan the directory.
+        With refresh=False only the last snapshot is read.
+        """
+        if not refresh:
+            with self._lock:
+                return self._entries.get(name)
+
+        with self._refresh_lock:
+            self.maybe_refresh()
+            with self._lock:
+                entry = self._entries.get(name)
+                miss = entry is None and name not in self._errors and (
+                    self._last_miss_refresh is None or
+                    time.monotonic() - self._last_miss_refresh >= self.refresh_interval)
+                if miss:
+                    self._last_miss_refresh = time.monotonic()
+            if not miss:
+                return entry
+            self.refresh()
+            with self._lock:
+                return self._entries.get(name)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        self.maybe_refresh()
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import threading
+import zipfile
+from part_index import build_part_index
+from placeholder_grammar import PlaceholderPlan, parse_placeholder
+from utils.logger import Logger
+
+SIDECAR_SUFFIX = ".schema.json"
+
+# Values typed in by the user, in the order the input fields are shown.
+# The name is always required because it also names the output file.
+INPUT_FIELDS = ("name", "username")
+FIELD_LABELS = {"name": "Name", "username": "Username"}
+
+class TemplateSchema:
+    """The placeholders a template uses and the input fields they require"""
+    def __init__(self, content_hash, placeholders, mtime=None, size=None):
+        self.content_hash = content_hash
+        self.placeholders = sorted(placeholders)
+        self.placeholder_set = set(self.placeholders)
+        self.mtime = mtime
+        self.size = size
+        self.fields = {parse_placeholder(placeholder)[0].lower() for placeholder in self.placeholders}
+        self._plan = None
+
+    @property
+    def required_fields(self):
+        return [
+            field for field in INPUT_FIELDS
+            if field == "name" or field in self.fields
+        ]
+
+    @property
+    def plan(self):
+        """The placeholders compiled into a PlaceholderPlan, built on first use"""
+        if self._plan is None:
+            self._plan = PlaceholderPlan(self.placeholders)
+        return self._plan
+
+    @property
+    def tables(self):
+        """Names of the tables the template has a repeating row for ("[#Hires]" -> "Hires")"""
+        return [placeholder[2:-1] for placeholder in self.placeholders if placeholder.startswith("[#")]
+
+    def uses(self, *fields):
+        """Return True if the template contains a placeholder for any of the fields"""
+        return any(field.lower() in self.fields for field in fields)
+
+    def missing_fields(self, values):
+        """Return the labels of required fields that are empty in values"""
+        return [
+            FIELD_LABELS[field] for field in self.required_fields
+            if not values.get(field)
+        ]
+
+    def __getstate__(self):
+        # The compiled plan holds closures; worker processes rebuild it on first use
+        state = dict(self.__dict__)
+        state["_plan"] = None
+        return state
+
+    def to_dict(self):
+        return {
+            "content_hash": self.content_hash,
+            "mtime": self.mtime,
+            "size": self.size,
+            "placeholders": self.placeholders
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["content_hash"], data["placeholders"], data.get("mtime"), data.get("size"))
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _read_sidecar(sidecar_path):
+    try:
+        with open(sidecar_path, 'r', encoding='utf-8') as f:
+            return TemplateSchema.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _write_sidecar(sidecar_path, schema):
+    # Unique per writer, so concurrent renders of a new template cannot clash
+    temp_path = f"{sidecar_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(schema.to_dict(), f, indent=4)
+    os.replace(temp_path, sidecar_path)
+
+def cached_content_hash(template_path, stat):
+    """Return the content hash from a template's sidecar if it is current, else None
+
+    Neither the template nor its zip index is read.
+    """
+    cached = _read_sidecar(template_path + SIDECAR_SUFFIX)
+    if cached and cached.mtime == stat.st_mtime_ns and cached.size == stat.st_size:
+        return cached.content_hash
+    return None
+
+def load_template_schema(template_path):
+    """Return the schema of a template, scanning it only when its content changed
+
+    The result is cached in a sidecar file next to the template. The sidecar
+    is trusted while the template's mtime and size match; otherwise the
+    content hash decides whether the template has to be scanned again.
+    """
+    logger = Logger()
+    sidecar_path = template_path + SIDECAR_SUFFIX
+    stat = os.stat(template_path)
+    cached = _read_sidecar(sidecar_path)
+
+    if cached and cached.mtime == stat.st_mtime_ns and cached.size == stat.st_size:
+        return cached
+
+    content_hash = _file_hash(template_path)
+    if cached and cached.content_hash == content_hash:
+        schema = cached
+    else:
+        with zipfile.ZipFile(template_path) as package:
+            placeholders = build_part_index(package).placeholders
+        schema = TemplateSchema(content_hash, placeholders)
+        logger.info(f"Scanned template placeholders: {os.path.basename(template_path)}")
+
+    schema.mtime = stat.st_mtime_ns
+    schema.size = stat.st_size
+    try:
+        _write_sidecar(sidecar_path, schema)
+    except OSError as e:
+        logger.warning(f"Could not write template schema cache {sidecar_path}: {str(e)}")
+    return schema
@@ -1,38 +1,241 @@
+import atexit
+import glob
+import json
 import logging
-from datetime import datetime
+import logging.handlers
+import multiprocessing
 import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+LOGGER_NAME = 'DocumentProcessor'
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+SUCCESS_PREFIX = "Document processed successfully"
+
+DEFAULT_SETTINGS = {
+    "directory": "logs",
+    "level": "INFO",
+    "format": "text",
+    "backup_count": 30,
+    "console": True,
+    "bulk_summary_interval": 10
+}
+
+_lock = threading.RLock()
+_listener = None
+_queue = None
+_settings = dict(DEFAULT_SETTINGS)
+
+class DailyFileHandler(logging.FileHandler):
+    """File handler writing to <directory>/app_YYYYMMDD.log, switching files at midnight"""
+    def __init__(self, directory, backup_count=0):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.backup_count = backup_count
+        self._rollover_at = self._next_midnight()
+        super().__init__(self._current_path(), delay=True)
+
+    def _current_path(self):
+        return os.path.join(self.directory, f'app_{datetime.now().strftime("%Y%m%d")}.log')
+
+    def _next_midnight(self):
+        tomorrow = datetime.now().date() + timedelta(days=1)
+        return datetime.combine(tomorrow, datetime.min.time()).timestamp()
+
+    def emit(self, record):
+        if record.created >= self._rollover_at:
+            self._rollover()
+        super().emit(record)
+
+    def _rollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self.baseFilename = os.path.abspath(self._current_path())
+        self._rollover_at = self._next_midnight()
+
+        if self.backup_count > 0:
+            files = sorted(glob.glob(os.path.join(self.directory, "app_*.log")))
+            for path in files[:-self.backup_count]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line"""
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.process,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class BulkSummary:
+    """Folds the per-document success lines of a bulk run into periodic summaries"""
+    def __init__(self, interval):
+        self.interval = interval
+        self.count = 0
+        self.total = 0
+        self._started = time.monotonic()
+
+    def process(self, record):
+        """Return the record to emit in place of record, or None to drop it"""
+        if getattr(record, "bulk_summary_end", False):
+            return self._summary(record, final=True)
+        if record.levelno != logging.INFO or not record.getMessage().startswith(SUCCESS_PREFIX):
+            return record
+
+        self.count += 1
+        self.total += 1
+        if time.monotonic() - self._started >= self.interval:
+            return self._summary(record)
+        return None
+
+    def _summary(self, record, final=False):
+        elapsed = time.monotonic() - self._started
+        if final:
+            message = f"Bulk run: {self.total} documents processed successfully"
+            if self.count:
+                message += f" ({self.count} in the last {elapsed:.1f}s)"
+        else:
+            message = f"Bulk run: {self.count} documents processed successfully in the last {elapsed:.1f}s ({self.total} total)"
+        self.count = 0
+        self._started = time.monotonic()
+
+        record.msg = message
+        record.args = None
+        return record
+
+class LogListener(logging.handlers.QueueListener):
+    """QueueListener that can pass records through a BulkSummary first"""
+    def __init__(self, log_queue, *handlers):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.summary = None
+
+    def handle(self, record):
+        summary = self.summary
+        if getattr(record, "bulk_summary_end", False):
+            self.summary = None
+        if summary is not None:
+            record = summary.process(record)
+            if record is None:
+                return
+        elif getattr(record, "bulk_summary_end", False):
+            return
+        super().handle(record)
+
+def _build_handlers(settings):
+    if settings["format"] == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT)
+
+    handlers = [DailyFileHandler(settings["directory"], settings["backup_count"])]
+    if settings["console"]:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+def _start_listener(log_queue, settings):
+    global _listener
+    _listener = LogListener(log_queue, *_build_handlers(settings))
+    _listener.start()
+
+def _install_queue_handler(log_queue, level):
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(level)
+    logger.propagate = False
+
+def configure_logging(settings=None, log_queue=None):
+    """Set up process-wide logging, replacing any earlier setup"""
+    global _queue, _settings
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    with _lock:
+        _stop_listener()
+        _queue = log_queue or queue.Queue()
+        _settings = settings
+        _install_queue_handler(_queue, settings["level"])
+        _start_listener(_queue, settings)
+
+    # Run before exit handlers registered since, such as the one
+    # multiprocessing uses to close its queues
+    atexit.unregister(shutdown_logging)
+    atexit.register(shutdown_logging)
+
+def ensure_logging():
+    """Configure logging with the defaults unless it is configured already"""
+    with _lock:
+        if _queue is None:
+            configure_logging()
+
+def multiprocess_log_queue():
+    """Return a queue worker processes can log into, moving the listener onto it if needed"""
+    with _lock:
+        ensure_logging()
+        if not isinstance(_queue, queue.Queue):
+            return _queue
+        configure_logging(_settings, log_queue=multiprocessing.Queue())
+        return _queue
+
+def attach_to_queue(log_queue, level=None):
+    """Send this process's records to another process's listener"""
+    global _queue, _listener
+    with _lock:
+        # A forked child inherits the parent's listener object but not its thread
+        _listener = None
+        _queue = log_queue
+        _install_queue_handler(log_queue, level or _settings["level"])
+
+def start_bulk_summary(interval=None):
+    """Aggregate per-document success lines until end_bulk_summary()"""
+    with _lock:
+        ensure_logging()
+        if _listener is not None:
+            _listener.summary = BulkSummary(interval or _settings["bulk_summary_interval"])
+
+def end_bulk_summary():
+    """Log the final bulk summary and return to per-document lines"""
+    logging.getLogger(LOGGER_NAME).info("Bulk run finished", extra={"bulk_summary_end": True})
+
+def shutdown_logging():
+    """Write out queued records and stop the listener"""
+    with _lock:
+        _stop_listener()
+
 
 class Logger:
     def __init__(self):
-        self.logger = logging.getLogger('DocumentProcessor')
-        self.logger.setLevel(logging.INFO)
-        
-        # Create logs directory if it doesn't exist
-        if not os.path.exists('logs'):
-            os.makedirs('logs')
-            
-        # Create handlers
-        file_handler = logging.FileHandler(
-            f'logs/app_{datetime.now().strftime("%Y%m%d")}.log'
-        )
-        console_handler = logging.StreamHandler()
-        
-        # Create formatters and add it to handlers
-        log_format = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        file_handler.setFormatter(log_format)
-        console_handler.setFormatter(log_format)
-        
-        # Add handlers to the logger
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
-    
+        ensure_logging()
+        self.logger = logging.getLogger(LOGGER_NAME)
+
     def info(self, message):
         self.logger.info(message)
-    
+
     def error(self, message):
         self.logger.error(message)
-    
+
     def warning(self, message):
-        self.logger.warning(message) 
\ No newline at end of file
+        self.logger.warning(message)
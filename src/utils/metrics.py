@@ -0,0 +1,205 @@
+import atexit
+import json
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "directory": "logs",
+    "format": "json",
+    "dump_interval": 60,
+    "samples": 1024
+}
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+class Histogram:
+    """Latency histogram keeping totals plus a window of recent samples for quantiles"""
+    def __init__(self, samples=1024):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.count += 1
+            self.total += value
+            self.samples.append(value)
+
+    def quantile(self, q):
+        """Return the q-quantile of the recent samples, or None without samples"""
+        with self._lock:
+            samples = sorted(self.samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99)
+        }
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+class _NullTimer:
+    """Stand-in for timers and counters while metrics are disabled"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, value):
+        pass
+
+NULL_TIMER = _NullTimer()
+
+class MetricsRegistry:
+    """Named counters and latency histograms, dumped periodically to logs/
+
+    While disabled, time() and counter() hand out a shared no-op object, so
+    instrumented code pays for little more than the method call.
+    """
+    def __init__(self):
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.enabled = False
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._last_dump = time.monotonic()
+
+    def configure(self, settings=None):
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.enabled = bool(self.settings["enabled"])
+
+    def counter(self, name):
+        if not self.enabled:
+            return NULL_TIMER
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(name, Counter())
+        return counter
+
+    def histogram(self, name):
+        if not self.enabled:
+            return NULL_TIMER
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(self.settings["samples"]))
+        return histogram
+
+    def time(self, name):
+        """Context manager recording the duration of its block in seconds"""
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timer(self.histogram(name))
+
+    def latency_summary(self, name):
+        """Return "p50 X ms / p95 Y ms" for a histogram, or None without samples"""
+        histogram = self._histograms.get(name)
+        if not self.enabled or histogram is None or not histogram.count:
+            return None
+        return f"p50 {histogram.quantile(0.5) * 1000:.0f} ms / p95 {histogram.quantile(0.95) * 1000:.0f} ms"
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = dict(self._histograms)
+        return {
+            "timestamp": time.time(),
+            "pid": os.getpid(),
+            "counters": {name: counter.value for name, counter in sorted(counters.items())},
+            "histograms": {name: histogram.snapshot() for name, histogram in sorted(histograms.items())}
+        }
+
+    def to_prometheus(self, snapshot):
+        """Render a snapshot in the Prometheus text exposition format"""
+        lines = []
+        for name, value in snapshot["counters"].items():
+            metric = _prometheus_name(name)
+            lines += [f"# TYPE {metric}_total counter", f"{metric}_total {value}"]
+        for name, values in snapshot["histograms"].items():
+            metric = _prometheus_name(name) + "_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for quantile in ("p50", "p95", "p99"):
+                if values[quantile] is not None:
+                    lines.append(f'{metric}{{quantile="0.{quantile[1:]}"}} {values[quantile]:.6f}')
+            lines += [f"{metric}_sum {values['sum']:.6f}", f"{metric}_count {values['count']}"]
+        return "\n".join(lines) + "\n"
+
+    def dump_path(self):
+        extension = "prom" if self.settings["format"] == "prometheus" else "json"
+        # Worker processes of a bulk run each write their own file
+        suffix = "" if multiprocessing.parent_process() is None else f"_{os.getpid()}"
+        return os.path.join(self.settings["directory"], f"metrics{suffix}.{extension}")
+
+    def dump(self):
+        """Write a snapshot to logs/, replacing the previous one atomically"""
+        if not self.enabled:
+            return None
+        snapshot = self.snapshot()
+        if self.settings["format"] == "prometheus":
+            content = self.to_prometheus(snapshot)
+        else:
+            content = json.dumps(snapshot, indent=4)
+
+        path = self.dump_path()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+        self._last_dump = time.monotonic()
+        return path
+
+    def maybe_dump(self):
+        """Dump if dump_interval seconds have passed since the last snapshot"""
+        if self.enabled and time.monotonic() - self._last_dump >= self.settings["dump_interval"]:
+            self.dump()
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+def _prometheus_name(name):
+    return "autokvittering_" + "".join(char if char.isalnum() else "_" for char in name)
+
+metrics = MetricsRegistry()
+
+def configure_metrics(settings=None):
+    """Apply the "metrics" section of the config to the process-wide registry"""
+    metrics.configure(settings)
+    return metrics
+
+atexit.register(lambda: metrics.dump() if metrics.enabled else None)
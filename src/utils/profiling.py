@@ -0,0 +1,182 @@
+import contextlib
+import glob
+import io
+import os
+import random
+import re
+import threading
+import time
+import tracemalloc
+
+# Set to a sample rate ("1" profiles every render, "0.05" one in twenty) to
+# turn profiling on without editing config.json; "0" turns it off
+ENV_VARIABLE = "AUTOKVITTERING_PROFILE"
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "directory": "logs/profiles",
+    "sample_rate": 0.01,
+    "top": 25,
+    "memory": True,
+    "max_reports": 200,
+    "every_batch": False
+}
+
+_NULL_PROFILE = contextlib.nullcontext()
+
+# Held while a block is being profiled; cProfile and tracemalloc are process-wide
+_active = threading.Lock()
+
+class Profiler:
+    """Samples renders and batches with cProfile and tracemalloc
+
+    A sampled block writes a text report (top functions by cumulative
+    time, peak traced memory and the top allocation sites) and the raw
+    .prof file next to it. Only one block is profiled at a time per
+    process; blocks that start while another is being profiled run
+    unprofiled. Unsampled blocks cost one random() call. Bulk batches are
+    sampled at the same rate unless every_batch is set.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self.configure()
+
+    def configure(self, settings=None):
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        override = os.environ.get(ENV_VARIABLE)
+        if override:
+            try:
+                rate = float(override)
+            except ValueError:
+                rate = 1.0
+            self.settings["enabled"] = rate > 0
+            self.settings["sample_rate"] = rate
+        self.enabled = bool(self.settings["enabled"])
+
+    def profile(self, kind, label="", sampled=True):
+        """Context manager profiling its block if it is picked by the sample rate
+
+        kind names the report ("render", "bulk"); label says what was run.
+        With sampled=False the block is profiled whenever profiling is on.
+        """
+        if not self.enabled:
+            return _NULL_PROFILE
+        if sampled and random.random() >= self.settings["sample_rate"]:
+            return _NULL_PROFILE
+        return _Profile(self, kind, label)
+
+    def report_path(self, kind, label):
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        safe_label = re.sub(r"[^\w.-]+", "_", label)[:60].strip("_")
+        name = f"{kind}_{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{sequence}"
+        return os.path.join(self.settings["directory"], f"{name}_{safe_label}" if safe_label else name)
+
+    def prune(self):
+        """Keep only the newest max_reports reports (0 keeps all)"""
+        max_reports = self.settings["max_reports"]
+        if max_reports <= 0:
+            return
+        reports = sorted(
+            glob.glob(os.path.join(self.settings["directory"], "*.txt")), key=os.path.getmtime
+        )
+        for path in reports[:-max_reports]:
+            for stale in (path, path[:-4] + ".prof"):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+class _Profile:
+    def __init__(self, profiler, kind, label):
+        self.profiler = profiler
+        self.kind = kind
+        self.label = label
+        self.active = False
+
+    def __enter__(self):
+        self.active = _active.acquire(blocking=False)
+        if not self.active:
+            return self
+
+        self.memory = self.profiler.settings["memory"]
+        self.started_tracing = False
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            tracemalloc.reset_peak()
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+
+        # Imported here so processes that never sample a block do not load them
+        import cProfile
+        self.cprofile = cProfile.Profile()
+        self.start = time.perf_counter()
+        try:
+            self.cprofile.enable()
+        except ValueError:
+            # Another profiler (a debugger or coverage tool) owns the hook
+            self.cprofile = None
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.active:
+            return False
+        try:
+            if self.cprofile is not None:
+                self.cprofile.disable()
+            elapsed = time.perf_counter() - self.start
+            snapshot = None
+            peak = None
+            if self.memory:
+                peak = tracemalloc.get_traced_memory()[1] - self.memory_start
+                snapshot = tracemalloc.take_snapshot()
+                if self.started_tracing:
+                    tracemalloc.stop()
+            self._write(elapsed, peak, snapshot)
+        except Exception:
+            # Profiling must never fail the render it observes
+            pass
+        finally:
+            _active.release()
+        return False
+
+    def _write(self, elapsed, peak, snapshot):
+        settings = self.profiler.settings
+        top = settings["top"]
+        os.makedirs(settings["directory"], exist_ok=True)
+        path = self.profiler.report_path(self.kind, self.label)
+
+        report = io.StringIO()
+        report.write(f"{self.kind}: {self.label}\n")
+        report.write(f"Wall time: {elapsed * 1000:.1f} ms (sample rate {settings['sample_rate']})\n")
+
+        if self.cprofile is not None:
+            report.write(f"\nTop {top} functions by cumulative time:\n")
+            import pstats
+            stats = pstats.Stats(self.cprofile, stream=report)
+            stats.sort_stats("cumulative").print_stats(top)
+            stats.dump_stats(path + ".prof")
+
+        if snapshot is not None:
+            report.write(f"\nPeak traced memory: {peak / 1024:.1f} KiB\n")
+            report.write(f"Top {top} allocation sites still held at the end:\n")
+            snapshot = snapshot.filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ))
+            for statistic in snapshot.statistics("lineno")[:top]:
+                report.write(f"    {statistic}\n")
+
+        with open(path + ".txt", 'w', encoding='utf-8') as f:
+            f.write(report.getvalue())
+        self.profiler.prune()
+
+profiler = Profiler()
+
+def configure_profiling(settings=None):
+    """Apply the "profiling" section of the config (and AUTOKVITTERING_PROFILE)"""
+    profiler.configure(settings)
+    return profiler
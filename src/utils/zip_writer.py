@@ -0,0 +1,52 @@
+import copy
+import struct
+import zipfile
+
+# Bit 3 of the general purpose flags: sizes and CRC follow the data
+_DATA_DESCRIPTOR_FLAG = 0x08
+_COPY_BUFFER_SIZE = 64 * 1024
+
+class PassthroughZipFile(zipfile.ZipFile):
+    """A ZipFile that can copy members from another archive without recompressing them
+
+    copy_member moves the already compressed bytes of a member across
+    unchanged, so untouched parts of a template (images, styles, fonts)
+    cost one sequential read and write instead of an inflate/deflate round
+    trip. Changed members are written with the normal ZipFile methods.
+    """
+    def copy_member(self, source, info):
+        """Copy a member of the source ZipFile into this archive byte-for-byte"""
+        if self._writing:
+            raise ValueError("Can't copy a member while another member is being written")
+
+        output_info = copy.copy(info)
+        # The sizes are known up front, so the header carries them directly
+        output_info.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+
+        with source._lock:
+            source.fp.seek(info.header_offset)
+            header = source.fp.read(zipfile.sizeFileHeader)
+            fields = struct.unpack(zipfile.structFileHeader, header)
+            source.fp.seek(
+                info.header_offset + zipfile.sizeFileHeader +
+                fields[zipfile._FH_FILENAME_LENGTH] +
+                fields[zipfile._FH_EXTRA_FIELD_LENGTH]
+            )
+
+            with self._lock:
+                if self._seekable:
+                    self.fp.seek(self.start_dir)
+                output_info.header_offset = self.fp.tell()
+                self.fp.write(output_info.FileHeader())
+
+                remaining = info.compress_size
+                while remaining > 0:
+                    chunk = source.fp.read(min(remaining, _COPY_BUFFER_SIZE))
+                    if not chunk:
+                        raise zipfile.BadZipFile(f"Truncated member in source archive: {info.filename}")
+                    self.fp.write(chunk)
+                    remaining -= len(chunk)
+
+                self.filelist.append(output_info)
+                self.NameToInfo[output_info.filename] = output_info
+                self.start_dir = self.fp.tell()
@@ -0,0 +1,155 @@
+"""Synthetic template corpus for the render benchmarks
+
+Every generator builds a .docx template of a given size that uses the
+standard placeholders, split across runs the way Word tends to split them.
+
+    python tests/benchmark_corpus.py OUTPUT_DIR [--scale 1.0]
+"""
+import argparse
+import io
+import os
+import random
+import struct
+import zlib
+import docx
+from docx.shared import Inches
+
+PLACEHOLDER_LINES = [
+    "Dear [Name], welcome aboard.",
+    "Your username is [Username] and your PIN is [Pin].",
+    "Use [PrintPin] at the printer and [Password] for your first login.",
+    "This line has no placeholders at all and is only here for bulk.",
+]
+
+def add_placeholder_paragraph(container, index):
+    """Add a paragraph whose placeholder is split over several runs"""
+    text = PLACEHOLDER_LINES[index % len(PLACEHOLDER_LINES)]
+    paragraph = container.add_paragraph()
+    if "[" in text:
+        head, rest = text.split("[", 1)
+        token, tail = rest.split("]", 1)
+        paragraph.add_run(head)
+        paragraph.add_run("[")
+        paragraph.add_run(token).bold = True
+        paragraph.add_run("]" + tail)
+    else:
+        paragraph.add_run(text)
+    return paragraph
+
+def fill_table(table, offset=0):
+    for row_index, row in enumerate(table.rows):
+        for column_index, cell in enumerate(row.cells):
+            cell.text = PLACEHOLDER_LINES[(row_index + column_index + offset) % len(PLACEHOLDER_LINES)]
+
+def png_bytes(width, height, seed=0):
+    """Return an RGB PNG filled with noise, so it does not compress away"""
+    rng = random.Random(seed)
+    raw = b"".join(
+        b"\x00" + bytes(rng.getrandbits(8) for _ in range(width * 3))
+        for _ in range(height)
+    )
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xffffffff)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+            chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+def paragraphs_template(size):
+    doc = docx.Document()
+    for index in range(size):
+        add_placeholder_paragraph(doc, index)
+    return doc
+
+def table_template(size):
+    doc = docx.Document()
+    add_placeholder_paragraph(doc, 0)
+    fill_table(doc.add_table(rows=size, cols=4))
+    return doc
+
+def merged_table_template(size):
+    """A table where every fourth row spans all columns and the rows between merge vertically"""
+    doc = docx.Document()
+    table = doc.add_table(rows=size, cols=4)
+    fill_table(table)
+    for index in range(0, size, 4):
+        row = table.rows[index]
+        row.cells[0].merge(row.cells[3])
+    for index in range(1, size - 1, 4):
+        table.cell(index, 1).merge(table.cell(index + 1, 1))
+    return doc
+
+def nested_table_template(size, depth=3):
+    """size outer rows, each holding tables nested depth levels deep"""
+    doc = docx.Document()
+    outer = doc.add_table(rows=size, cols=2)
+    fill_table(outer)
+    for row in outer.rows:
+        cell = row.cells[1]
+        for level in range(depth):
+            inner = cell.add_table(rows=2, cols=2)
+            fill_table(inner, offset=level)
+            cell = inner.cell(0, 0)
+    return doc
+
+def headers_footers_template(size, sections=3):
+    doc = docx.Document()
+    for section_index in range(sections):
+        section = doc.sections[0] if section_index == 0 else doc.add_section()
+        section.header.is_linked_to_previous = False
+        section.footer.is_linked_to_previous = False
+        add_placeholder_paragraph(section.header, section_index)
+        add_placeholder_paragraph(section.footer, section_index + 1)
+        for index in range(size // sections):
+            add_placeholder_paragraph(doc, index)
+    return doc
+
+def images_template(size, image_size=256):
+    """size paragraphs with an embedded image after every 10th"""
+    doc = docx.Document()
+    for index in range(size):
+        add_placeholder_paragraph(doc, index)
+        if index % 10 == 0:
+            image = io.BytesIO(png_bytes(image_size, image_size, seed=index))
+            doc.add_picture(image, width=Inches(1))
+    return doc
+
+# kind -> (generator, sizes); sizes grow roughly tenfold per tier
+CORPUS = {
+    "paragraphs": (paragraphs_template, (100, 1000, 10000)),
+    "table": (table_template, (100, 1000, 5000)),
+    "merged_table": (merged_table_template, (100, 1000)),
+    "nested_table": (nested_table_template, (20, 200)),
+    "headers_footers": (headers_footers_template, (30, 300)),
+    "images": (images_template, (20, 200)),
+}
+
+def generate_corpus(output_dir, scale=1.0, kinds=None):
+    """Write the corpus to output_dir and return [(case_name, path)]"""
+    os.makedirs(output_dir, exist_ok=True)
+    cases = []
+    for kind, (generator, sizes) in CORPUS.items():
+        if kinds and kind not in kinds:
+            continue
+        for size in sizes:
+            size = max(1, int(size * scale))
+            name = f"{kind}_{size}"
+            path = os.path.join(output_dir, f"{name}.docx")
+            if not os.path.exists(path):
+                generator(size).save(path)
+            cases.append((name, path))
+    return cases
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic benchmark templates")
+    parser.add_argument("output_dir")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every template size")
+    args = parser.parse_args()
+
+    for name, path in generate_corpus(args.output_dir, args.scale):
+        print(f"{name}: {os.path.getsize(path) / 1024:.0f} KB")
+
+if __name__ == "__main__":
+    main()
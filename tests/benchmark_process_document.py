@@ -0,0 +1,157 @@
+"""Benchmark DocumentProcessor.process_document over the synthetic corpus
+
+For every template in the corpus and every render engine this records the
+cold (first render, template compile included) and warm latency, the
+throughput and the peak traced memory of one warm render. Results are
+written as JSON and can be compared with a recorded baseline:
+
+    python tests/benchmark_process_document.py --save tests/benchmark_baseline.json
+    python tests/benchmark_process_document.py --compare tests/benchmark_baseline.json
+
+--compare exits with status 1 when a case is slower or uses more memory
+than the baseline by more than --tolerance (default 20%); latency changes
+under --min-delta-ms are treated as noise. Baselines are machine
+specific; record one before a change and compare after it.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_corpus import CORPUS, generate_corpus
+from document_processor import DocumentProcessor
+from utils.logger import configure_logging
+
+REPLACEMENTS = {
+    "[Name]": "John Doe",
+    "[Username]": "johndoe",
+    "[Pin]": "123456",
+    "[PrintPin]": "3456",
+    "[Password]": "Secret!Pass1"
+}
+
+def benchmark_case(template_path, output_dir, engine, repeat):
+    processor = DocumentProcessor({"render_engine": engine})
+    output_path = os.path.join(output_dir, f"{engine}_{os.path.basename(template_path)}")
+
+    def render():
+        start = time.perf_counter()
+        success, message = processor.process_document(template_path, output_path, REPLACEMENTS)
+        if not success:
+            raise RuntimeError(f"{template_path}: {message}")
+        return time.perf_counter() - start
+
+    cold = render()
+    latencies = sorted(render() for _ in range(repeat))
+
+    tracemalloc.start()
+    try:
+        render()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "cold_ms": cold * 1000,
+        "median_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        "throughput_per_s": len(latencies) / sum(latencies),
+        "peak_memory_kb": peak / 1024,
+        "template_kb": os.path.getsize(template_path) / 1024,
+        "output_kb": os.path.getsize(output_path) / 1024
+    }
+
+def run_benchmarks(corpus_dir, engines, repeat, scale=1.0, kinds=None, report=print):
+    results = {}
+    cases = generate_corpus(corpus_dir, scale, kinds)
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name, path in cases:
+            for engine in engines:
+                key = f"{name}/{engine}"
+                results[key] = benchmark_case(path, output_dir, engine, repeat)
+                report(format_result(key, results[key]))
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "settings": {"repeat": repeat, "scale": scale, "engines": list(engines)},
+        "results": results
+    }
+
+def format_result(key, result):
+    return (f"{key:32} cold {result['cold_ms']:8.1f} ms  median {result['median_ms']:8.1f} ms  "
+            f"p95 {result['p95_ms']:8.1f} ms  {result['throughput_per_s']:7.1f} docs/s  "
+            f"peak {result['peak_memory_kb']:9.0f} KB")
+
+def compare(current, baseline, tolerance, min_delta_ms=1.0):
+    """Return a message for every case that regressed against the baseline"""
+    regressions = []
+    for key, result in current["results"].items():
+        recorded = baseline["results"].get(key)
+        if recorded is None:
+            continue
+        for metric in ("median_ms", "peak_memory_kb"):
+            if metric == "median_ms" and result[metric] - recorded[metric] < min_delta_ms:
+                continue
+            if result[metric] > recorded[metric] * (1 + tolerance):
+                change = (result[metric] / recorded[metric] - 1) * 100 if recorded[metric] else float("inf")
+                regressions.append(
+                    f"{key}: {metric} {recorded[metric]:.1f} -> {result[metric]:.1f} (+{change:.0f}%)"
+                )
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark process_document over a synthetic corpus")
+    parser.add_argument("--corpus", help="Directory to generate the corpus in (reused if it exists)")
+    parser.add_argument("--engines", default="docx,xml", help="Comma separated render engines")
+    parser.add_argument("--kinds", help=f"Comma separated subset of: {', '.join(CORPUS)}")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every template size")
+    parser.add_argument("--repeat", type=int, default=5, help="Warm renders per case")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to check the results against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression ratio")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore smaller latency changes")
+    args = parser.parse_args(argv)
+
+    # Keep per-document log lines out of the timings and the report
+    configure_logging({"console": False, "level": "WARNING"})
+
+    engines = args.engines.split(",")
+    kinds = args.kinds.split(",") if args.kinds else None
+    if args.corpus:
+        current = run_benchmarks(args.corpus, engines, args.repeat, args.scale, kinds)
+    else:
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            current = run_benchmarks(corpus_dir, engines, args.repeat, args.scale, kinds)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=4)
+        print(f"Saved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"Regressions against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Startup import profile for the application's entry modules
+
+Imports each module in a fresh interpreter with -X importtime and reports
+the total import time, the heaviest imports and whether a headless module
+pulled in GUI or python-docx dependencies:
+
+    python tests/benchmark_startup.py [--top 10] [--save FILE] [--compare FILE]
+
+--compare exits with status 1 when a module's import time grew by more
+than --tolerance (default 20%) over the saved profile, or when a headless
+module loads a GUI or python-docx dependency.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Modules used by scripts, servers and bulk runs, which must start without Tk or python-docx
+HEADLESS_MODULES = ("config_manager", "credential_generator", "document_processor", "bulk", "render_server", "main")
+GUI_MODULES = ("gui.app",)
+HEAVY_DEPENDENCIES = ("tkinter", "customtkinter", "docx", "lxml")
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def profile_import(module, extra_path=None):
+    """Import module in a fresh interpreter and return its -X importtime profile"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [SRC_DIR] + ([extra_path] if extra_path else []) +
+        ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr}")
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append({
+                "name": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "top_level": len(indent) == 1
+            })
+
+    loaded = {entry["name"] for entry in imports}
+    return {
+        "total_ms": sum(entry["cumulative_ms"] for entry in imports if entry["top_level"]),
+        "imports": imports,
+        "heavy_dependencies": sorted(
+            dependency for dependency in HEAVY_DEPENDENCIES if dependency in loaded
+        )
+    }
+
+def profile_startup(modules, runs=3):
+    """Profile every module, keeping the run with the median total time"""
+    profiles = {}
+    for module in modules:
+        samples = sorted((profile_import(module) for _ in range(runs)), key=lambda p: p["total_ms"])
+        profiles[module] = samples[len(samples) // 2]
+        profiles[module]["runs_ms"] = [sample["total_ms"] for sample in samples]
+    return profiles
+
+def headless_violations(profiles):
+    return [
+        f"{module} loads {', '.join(profile['heavy_dependencies'])}"
+        for module, profile in profiles.items()
+        if module in HEADLESS_MODULES and profile["heavy_dependencies"]
+    ]
+
+def print_report(profiles, top):
+    for module, profile in profiles.items():
+        spread = statistics.pstdev(profile["runs_ms"]) if len(profile["runs_ms"]) > 1 else 0.0
+        heavy = ", ".join(profile["heavy_dependencies"]) or "none"
+        print(f"{module}: {profile['total_ms']:.1f} ms (+/- {spread:.1f} ms), heavy dependencies: {heavy}")
+        for entry in sorted(profile["imports"], key=lambda e: e["self_ms"], reverse=True)[:top]:
+            print(f"    {entry['self_ms']:8.2f} ms  {entry['name']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the import time of the entry modules")
+    parser.add_argument("modules", nargs="*", help="Modules to profile (default: all entry modules)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports to list per module")
+    parser.add_argument("--save", help="Write the profile to this JSON file")
+    parser.add_argument("--compare", help="Saved profile to check against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression ratio")
+    args = parser.parse_args(argv)
+
+    profiles = profile_startup(args.modules or HEADLESS_MODULES + GUI_MODULES, args.runs)
+    print_report(profiles, args.top)
+
+    if args.save:
+        summary = {
+            module: {"total_ms": profile["total_ms"], "heavy_dependencies": profile["heavy_dependencies"]}
+            for module, profile in profiles.items()
+        }
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({"python": sys.version.split()[0], "modules": summary}, f, indent=4)
+        print(f"Saved startup profile to {args.save}")
+
+    problems = headless_violations(profiles)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["modules"]
+        for module, profile in profiles.items():
+            recorded = baseline.get(module)
+            if recorded and profile["total_ms"] > recorded["total_ms"] * (1 + args.tolerance):
+                problems.append(f"{module}: {recorded['total_ms']:.1f} ms -> {profile['total_ms']:.1f} ms")
+
+    for problem in problems:
+        print(f"  {problem}")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,25 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from test_config_manager import TestConfigManager
 from test_credential_generator import TestCredentialGenerator
 from test_document_processor import TestDocumentProcessor
+from test_template_cache import TestTemplateCache
+from test_bulk import TestBulk
+from test_placeholder_matcher import TestPlaceholderMatcher
+from test_zip_writer import TestPassthroughZipFile
+from test_template_schema import TestTemplateSchema
+from test_render_worker import TestRenderWorker
+from test_job_journal import TestJobJournal
+from test_pin_registry import TestPinRegistry
+from test_logger import TestLogger
+from test_metrics import TestMetrics
+from test_benchmark import TestBenchmark
+from test_startup import TestStartup
+from test_render_server import TestRenderServer
+from test_template_catalog import TestTemplateCatalog
+from test_output_planner import TestOutputPlanner
+from test_repeating_rows import TestRepeatingRows
+from test_placeholder_grammar import TestPlaceholderGrammar
+from test_profiling import TestProfiling
+from test_template_artifact import TestTemplateArtifact
 
 def run_tests():
     # Create test suite
@@ -18,6 +37,25 @@ def run_tests():
     suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestConfigManager))
     suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCredentialGenerator))
     suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestDocumentProcessor))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestTemplateCache))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestBulk))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestPlaceholderMatcher))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestPassthroughZipFile))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestTemplateSchema))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestRenderWorker))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestJobJournal))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestPinRegistry))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestLogger))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestMetrics))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestBenchmark))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestStartup))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestRenderServer))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestTemplateCatalog))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestOutputPlanner))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestRepeatingRows))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestPlaceholderGrammar))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestProfiling))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestTemplateArtifact))
     
     # Run tests
     runner = unittest.TextTestRunner(verbosity=2)
@@ -2,6 +2,13 @@ import unittest
 import os
 import shutil
 import json
+import sys
+
+# Tests import the modules as src.X, and those import each other by bare name
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _path in (_ROOT, os.path.join(_ROOT, "src")):
+    if _path not in sys.path:
+        sys.path.append(_path)
 
 class TestBase(unittest.TestCase):
     def setUp(self):
@@ -0,0 +1,21 @@
+from test_base import TestBase
+from benchmark_corpus import generate_corpus
+from benchmark_process_document import run_benchmarks, compare
+from src.template_schema import load_template_schema
+
+class TestBenchmark(TestBase):
+    def test_corpus_templates_open(self):
+        cases = generate_corpus(self.test_dir, scale=0.05)
+        self.assertEqual(len(cases), 14)
+        for name, path in cases:
+            self.assertIn("[Name]", load_template_schema(path).placeholders, name)
+
+    def test_run_and_compare(self):
+        current = run_benchmarks(self.test_dir, ["docx", "xml"], repeat=1, scale=0.05,
+                                 kinds=["table", "images"], report=lambda line: None)
+        self.assertEqual(len(current["results"]), 10)
+        self.assertEqual(compare(current, current, tolerance=0.2), [])
+
+        baseline = {"results": {key: dict(result, median_ms=result["median_ms"] / 10 - 5)
+                                for key, result in current["results"].items()}}
+        self.assertEqual(len(compare(current, baseline, tolerance=0.2, min_delta_ms=0)), 10)
@@ -0,0 +1,174 @@
+from test_base import TestBase
+from src.bulk import read_rows, run_bulk
+from src.job_journal import JobJournal
+import docx
+import io
+import json
+import os
+import zipfile
+
+class TestBulk(TestBase):
+    def setUp(self):
+        super().setUp()
+        doc = docx.Document()
+        doc.add_paragraph("Hello [Name], your PIN is [Pin]")
+        doc.save(os.path.join(self.test_templates_dir, "Lagermedarbejder_skabelon.docx"))
+
+        self.config = dict(self.test_config)
+        self.config["template_directory"] = os.path.abspath(self.test_templates_dir)
+        self.cwd = os.getcwd()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        super().tearDown()
+
+    def test_read_csv_rows(self):
+        input_path = os.path.join(self.test_dir, "staff.csv")
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write("Name,Username,Template\nJohn Doe,johndoe,\nJane Roe,janeroe,other.docx\n")
+
+        rows = list(read_rows(input_path, "Lagermedarbejder_skabelon.docx"))
+        self.assertEqual(rows[0], (1, {
+            "name": "John Doe",
+            "username": "johndoe",
+            "template": "Lagermedarbejder_skabelon.docx"
+        }))
+        self.assertEqual(rows[1][1]["template"], "other.docx")
+
+    def test_run_bulk_jsonl(self):
+        input_path = os.path.abspath(os.path.join(self.test_dir, "staff.jsonl"))
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"name": "John Doe"}) + "\n")
+            f.write(json.dumps({"name": ""}) + "\n")
+            f.write(json.dumps({"name": "Jane Roe"}) + "\n")
+
+        os.chdir(self.test_output_dir)
+        succeeded, failures, skipped, elapsed, workers = run_bulk(
+            self.config,
+            input_path,
+            workers=2,
+            chunk_size=2,
+            default_template="Lagermedarbejder_skabelon.docx"
+        )
+
+        self.assertEqual((succeeded, [result[0] for result in failures]), (2, [2]))
+        self.assertEqual(failures[0][3], "Name is required for this template")
+
+    def test_bad_rows_fail_on_their_own(self):
+        input_path = os.path.abspath(os.path.join(self.test_dir, "staff.jsonl"))
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"name": "John Doe", "username": 1234}) + "\n")
+            f.write('{"name": "Jane Roe",\n')
+            f.write("\n")
+            f.write(json.dumps(["not", "an", "object"]) + "\n")
+            f.write(json.dumps({"name": "Jane Roe"}) + "\n")
+
+        os.chdir(self.test_output_dir)
+        succeeded, failures, _, _, _ = run_bulk(
+            self.config, input_path, workers=1, default_template="Lagermedarbejder_skabelon.docx"
+        )
+        self.assertEqual(succeeded, 2)
+        self.assertEqual([(result[0], result[3].split(":")[0]) for result in failures], [
+            (2, "Invalid JSON"), (3, "Row is not a JSON object")
+        ])
+
+    def test_resume_from_journal(self):
+        input_path = os.path.abspath(os.path.join(self.test_dir, "staff.jsonl"))
+        journal_path = os.path.abspath(os.path.join(self.test_dir, "staff.journal"))
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"name": "John Doe"}) + "\n")
+            f.write(json.dumps({"name": ""}) + "\n")
+
+        key_path = os.path.abspath(os.path.join(self.test_dir, "journal.key"))
+        self.config["bulk_settings"] = {"journal_key_path": key_path}
+        os.chdir(self.test_output_dir)
+        options = dict(workers=1, default_template="Lagermedarbejder_skabelon.docx", journal_path=journal_path)
+        succeeded, failures, skipped, elapsed, workers = run_bulk(self.config, input_path, **options)
+        self.assertEqual((succeeded, len(failures), skipped), (1, 1, 0))
+
+        # Only the failed row is tried again
+        succeeded, failures, skipped, elapsed, workers = run_bulk(self.config, input_path, **options)
+        self.assertEqual((succeeded, [result[0] for result in failures], skipped), (0, [2], 1))
+
+        journal = JobJournal(journal_path)
+        journal.close()
+        self.assertEqual(list(journal.done), [1])
+        self.assertTrue(journal.output(1).endswith("John Doe.docx"))
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len([record for record in records if record["row"] == 1][-1]["credential_hash"]), 64)
+
+    def test_run_bulk_into_archive(self):
+        input_path = os.path.abspath(os.path.join(self.test_dir, "staff.jsonl"))
+        journal_path = os.path.abspath(os.path.join(self.test_dir, "staff.journal"))
+        archive_path = os.path.abspath(os.path.join(self.test_dir, "wave.zip"))
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"name": "John Doe"}) + "\n")
+            f.write(json.dumps({"name": "John Doe"}) + "\n")
+            f.write(json.dumps({"name": "Jane Roe", "template": "missing.docx"}) + "\n")
+
+        os.chdir(self.test_output_dir)
+        options = dict(
+            workers=2, default_template="Lagermedarbejder_skabelon.docx",
+            journal_path=journal_path, archive_path=archive_path
+        )
+        succeeded, failures, _, _, _ = run_bulk(self.config, input_path, **options)
+        self.assertEqual((succeeded, [result[0] for result in failures]), (2, [3]))
+        self.assertEqual(os.listdir("."), [])
+
+        # Resuming appends the row that now has a template to the same archive
+        with open(input_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"name": "John Doe"}) + "\n")
+        run_bulk(self.config, input_path, **options)
+
+        with zipfile.ZipFile(archive_path) as archive:
+            self.assertEqual(archive.namelist(), ["John Doe.docx", "John Doe (2).docx", "John Doe (3).docx"])
+            self.assertEqual(archive.getinfo("John Doe.docx").compress_type, zipfile.ZIP_STORED)
+            text = docx.Document(io.BytesIO(archive.read("John Doe (3).docx"))).paragraphs[0].text
+            self.assertTrue(text.startswith("Hello John Doe"))
+
+    def test_resume_rebuilds_archive_of_killed_run(self):
+        input_path = os.path.abspath(os.path.join(self.test_dir, "staff.jsonl"))
+        journal_path = os.path.abspath(os.path.join(self.test_dir, "staff.journal"))
+        archive_path = os.path.abspath(os.path.join(self.test_dir, "wave.zip"))
+        with open(input_path, 'w', encoding='utf-8') as f:
+            for index in range(3):
+                f.write(json.dumps({"name": f"Person {index}"}) + "\n")
+
+        os.chdir(self.test_output_dir)
+        options = dict(
+            workers=1, default_template="Lagermedarbejder_skabelon.docx",
+            journal_path=journal_path, archive_path=archive_path
+        )
+        run_bulk(self.config, input_path, **options)
+
+        # A killed run leaves no central directory and a torn last entry
+        with zipfile.ZipFile(archive_path) as archive:
+            cut = archive.infolist()[1].header_offset + 100
+        with open(archive_path, 'r+b') as f:
+            f.truncate(cut)
+
+        succeeded, failures, skipped, _, _ = run_bulk(self.config, input_path, **options)
+        self.assertEqual((succeeded, failures, skipped), (2, [], 1))
+        self.assertFalse(os.path.exists(archive_path + ".damaged"))
+        with zipfile.ZipFile(archive_path) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(sorted(archive.namelist()), ["Person 0.docx", "Person 1.docx", "Person 2.docx"])
+
+    def test_bounded_run_recycles_workers(self):
+        input_path = os.path.abspath(os.path.join(self.test_dir, "staff.jsonl"))
+        with open(input_path, 'w', encoding='utf-8') as f:
+            for index in range(7):
+                f.write(json.dumps({"name": f"Person {index}" if index != 3 else ""}) + "\n")
+
+        self.config["bulk_settings"] = {
+            "max_in_flight_rows": 2,
+            "max_tasks_per_worker": 1,
+            "max_worker_rss_mb": 1
+        }
+        os.chdir(self.test_output_dir)
+        succeeded, failures, _, _, _ = run_bulk(
+            self.config, input_path, workers=2, chunk_size=2,
+            default_template="Lagermedarbejder_skabelon.docx"
+        )
+        self.assertEqual((succeeded, [result[0] for result in failures]), (6, [4]))
@@ -5,7 +5,7 @@ import json
 
 class TestConfigManager(TestBase):
     def test_load_valid_config(self):
-        config_manager = ConfigManager()
+        config_manager = ConfigManager(self.test_config_path)
         self.assertIsNotNone(config_manager.config)
         self.assertEqual(
             config_manager.config["window_size"]["width"],
@@ -17,12 +17,16 @@ class TestConfigManager(TestBase):
         with open(self.test_config_path, 'w') as f:
             f.write("invalid json")
         
-        config_manager = ConfigManager()
+        config_manager = ConfigManager(self.test_config_path)
         self.assertIsNotNone(config_manager.config)
         self.assertTrue("window_size" in config_manager.config)
 
+        # The broken file is left for the user to fix
+        with open(self.test_config_path, 'r') as f:
+            self.assertEqual(f.read(), "invalid json")
+
     def test_save_config(self):
-        config_manager = ConfigManager()
+        config_manager = ConfigManager(self.test_config_path)
         new_width = 600
         config_manager.config["window_size"]["width"] = new_width
         config_manager.save_config(config_manager.config)
@@ -31,4 +35,32 @@ class TestConfigManager(TestBase):
         with open(self.test_config_path, 'r') as f:
             saved_config = json.load(f)
         
-        self.assertEqual(saved_config["window_size"]["width"], new_width) 
\ No newline at end of file
+        self.assertEqual(saved_config["window_size"]["width"], new_width)
+        self.assertEqual(os.listdir(self.test_dir).count("config.json"), 1)
+        self.assertFalse([name for name in os.listdir(self.test_dir) if name.endswith(".tmp")])
+
+    def test_reload_if_changed(self):
+        config_manager = ConfigManager(self.test_config_path, check_interval=0)
+        config = config_manager.config
+        self.assertFalse(config_manager.reload_if_changed())
+
+        # Our own save is not an external change
+        config_manager.save_config()
+        self.assertFalse(config_manager.reload_if_changed())
+
+        edited = dict(self.test_config, render_engine="xml")
+        edited["window_size"] = {"width": 800, "height": 400}
+        with open(self.test_config_path, 'w') as f:
+            json.dump(edited, f, indent=2)
+
+        self.assertTrue(config_manager.reload_if_changed())
+        self.assertIs(config_manager.config, config)
+        self.assertEqual(config["render_engine"], "xml")
+        self.assertEqual(config["window_size"]["width"], 800)
+        self.assertTrue(os.path.isabs(config["template_directory"]))
+
+        # A half-written file keeps the current values
+        with open(self.test_config_path, 'w') as f:
+            f.write('{"window_size": ')
+        self.assertFalse(config_manager.reload_if_changed())
+        self.assertEqual(config["render_engine"], "xml")
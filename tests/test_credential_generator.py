@@ -34,4 +34,27 @@ class TestCredentialGenerator(TestBase):
         self.assertTrue(has_upper)
         self.assertTrue(has_lower)
         self.assertTrue(has_digit)
-        self.assertTrue(has_special) 
\ No newline at end of file
+        self.assertTrue(has_special) 
+
+    def test_generate_pins_batch(self):
+        pins = self.generator.generate_pins(1000)
+        self.assertEqual(len(pins), 1000)
+        self.assertTrue(all(len(pin) == 6 and pin.isdigit() and pin[0] != "0" for pin in pins))
+
+    def test_generate_passwords_batch(self):
+        settings = self.test_config["password_settings"]
+        passwords = self.generator.generate_passwords(500)
+        self.assertEqual(len(passwords), 500)
+
+        for password in passwords:
+            self.assertEqual(len(password), settings["length"])
+            self.assertTrue(any(c.isupper() for c in password))
+            self.assertTrue(any(c.islower() for c in password))
+            self.assertTrue(any(c.isdigit() for c in password))
+            self.assertTrue(any(c in settings["special_chars"] for c in password))
+
+    def test_password_shorter_than_required_classes(self):
+        config = dict(self.test_config)
+        config["password_settings"] = dict(config["password_settings"], length=3)
+        with self.assertRaises(ValueError):
+            CredentialGenerator(config).generate_passwords(1)
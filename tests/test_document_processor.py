@@ -1,6 +1,7 @@
 from test_base import TestBase
 from src.document_processor import DocumentProcessor
 import docx
+import io
 import os
 
 class TestDocumentProcessor(TestBase):
@@ -40,4 +41,134 @@ class TestDocumentProcessor(TestBase):
         doc = docx.Document(output_path)
         self.assertEqual(doc.paragraphs[0].text, "Hello John Doe!")
         self.assertEqual(doc.paragraphs[1].text, "PIN: 123456")
-        self.assertEqual(doc.tables[0].cell(0, 1).text, "johndoe") 
\ No newline at end of file
+        self.assertEqual(doc.tables[0].cell(0, 1).text, "johndoe") 
+
+    def test_process_document_twice_from_cache(self):
+        for name in ("John Doe", "Jane Roe"):
+            output_path = os.path.join(self.test_output_dir, f"{name}.docx")
+            success, message = self.processor.process_document(
+                self.template_path,
+                output_path,
+                {"[Name]": name, "[Pin]": "123456", "[Username]": "user"}
+            )
+            self.assertTrue(success)
+            doc = docx.Document(output_path)
+            self.assertEqual(doc.paragraphs[0].text, f"Hello {name}!")
+
+        self.assertEqual(len(self.processor.template_cache), 1)
+
+    def test_create_document(self):
+        output_path = os.path.join(self.test_output_dir, "John Doe.docx")
+        open(output_path, 'w').close()
+
+        success, message, path = self.processor.create_document(
+            self.template_path, output_path, {"[Name]": "John Doe"}
+        )
+        self.assertTrue(success, message)
+        self.assertEqual(os.path.basename(path), "John Doe (2).docx")
+        self.assertEqual(os.path.getsize(output_path), 0)
+        self.assertEqual(docx.Document(path).paragraphs[0].text, "Hello John Doe!")
+
+        success, message, path = self.processor.create_document(
+            os.path.join(self.test_templates_dir, "missing.docx"), output_path, {}
+        )
+        self.assertEqual((success, path), (False, None))
+        self.assertEqual(sorted(os.listdir(self.test_output_dir)), ["John Doe (2).docx", "John Doe.docx"])
+
+    def test_render_to_bytes(self):
+        for engine in ("docx", "xml"):
+            processor = DocumentProcessor(dict(self.test_config, render_engine=engine))
+            success, message, data = processor.render_to_bytes(
+                self.template_path, {"[Name]": "John Doe", "[Pin]": "123456"}
+            )
+            self.assertTrue(success, message)
+            doc = docx.Document(io.BytesIO(data))
+            self.assertEqual(doc.paragraphs[0].text, "Hello John Doe!")
+        self.assertEqual(os.listdir(self.test_output_dir), [])
+
+    def test_xml_engine(self):
+        processor = DocumentProcessor(dict(self.test_config, render_engine="xml"))
+        output_path = os.path.join(self.test_output_dir, "output_xml.docx")
+        success, message = processor.process_document(
+            self.template_path,
+            output_path,
+            {"[Name]": "John & Jane", "[Pin]": "123456", "[Username]": "johndoe"}
+        )
+
+        self.assertTrue(success)
+        doc = docx.Document(output_path)
+        self.assertEqual(doc.paragraphs[0].text, "Hello John & Jane!")
+        self.assertEqual(doc.paragraphs[1].text, "PIN: 123456")
+        self.assertEqual(doc.tables[0].cell(0, 1).text, "johndoe")
+
+    def test_xml_engine_placeholder_split_over_runs(self):
+        doc = docx.Document()
+        paragraph = doc.add_paragraph("Dear ")
+        for text in ("[", "Na", "me]", ", welcome"):
+            paragraph.add_run(text).bold = True
+        template_path = os.path.join(self.test_templates_dir, "split.docx")
+        doc.save(template_path)
+
+        processor = DocumentProcessor(dict(self.test_config, render_engine="xml"))
+        output_path = os.path.join(self.test_output_dir, "split.docx")
+        success, message = processor.process_document(
+            template_path, output_path, {"[Name]": "John Doe"}
+        )
+
+        self.assertTrue(success)
+        paragraph = docx.Document(output_path).paragraphs[0]
+        self.assertEqual(paragraph.text, "Dear John Doe, welcome")
+        # The value lands in the bold run the placeholder starts in
+        self.assertEqual([run.text for run in paragraph.runs], ["Dear ", "John Doe", "", "", ", welcome"])
+        self.assertEqual([run.bold for run in paragraph.runs], [None, True, True, True, True])
+
+    def test_headers_and_footers(self):
+        doc = docx.Document()
+        doc.add_paragraph("Body text")
+        doc.sections[0].header.paragraphs[0].text = "Issued to [Name]"
+        doc.sections[0].footer.paragraphs[0].text = "PIN [Pin]"
+        template_path = os.path.join(self.test_templates_dir, "header.docx")
+        doc.save(template_path)
+
+        for engine in ("docx", "xml"):
+            processor = DocumentProcessor(dict(self.test_config, render_engine=engine))
+            output_path = os.path.join(self.test_output_dir, f"header_{engine}.docx")
+            success, message = processor.process_document(
+                template_path, output_path, {"[Name]": "John Doe", "[Pin]": "123456"}
+            )
+
+            self.assertTrue(success)
+            section = docx.Document(output_path).sections[0]
+            self.assertEqual(section.header.paragraphs[0].text, "Issued to John Doe")
+            self.assertEqual(section.footer.paragraphs[0].text, "PIN 123456")
+
+    def test_text_box_in_placeholder_paragraph(self):
+        from docx.oxml import parse_xml
+        from docx.oxml.ns import nsdecls
+        doc = docx.Document()
+        paragraph = doc.add_paragraph("Anchor [Name] ")
+        paragraph._p.append(parse_xml(
+            f'<w:r {nsdecls("w")} xmlns:v="urn:schemas-microsoft-com:vml"><w:pict><v:shape><v:textbox><w:txbxContent>'
+            '<w:p><w:r><w:t xml:space="preserve">Box [Pin]</w:t></w:r></w:p>'
+            '</w:txbxContent></v:textbox></v:shape></w:pict></w:r>'
+        ))
+        paragraph.add_run("end")
+        template_path = os.path.join(self.test_templates_dir, "textbox.docx")
+        doc.save(template_path)
+
+        for engine in ("docx", "xml"):
+            processor = DocumentProcessor(dict(self.test_config, render_engine=engine))
+            output_path = os.path.join(self.test_output_dir, f"textbox_{engine}.docx")
+            success, message = processor.process_document(
+                template_path, output_path, {"[Name]": "John Doe", "[Pin]": "123456"}
+            )
+
+            self.assertTrue(success, message)
+            paragraph = docx.Document(output_path).paragraphs[0]
+            boxes = paragraph._p.xpath(".//w:txbxContent")
+            self.assertEqual(len(boxes), 1, engine)
+            self.assertEqual(paragraph._p.xpath("string(.//w:txbxContent//w:t)"), "Box 123456", engine)
+            self.assertIn("Anchor John Doe", paragraph.text, engine)
+            if engine == "docx":
+                # Only the text node holding the placeholder was rewritten
+                self.assertEqual([run.text for run in paragraph.runs], ["Anchor John Doe ", "", "end"])
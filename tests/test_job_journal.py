@@ -0,0 +1,62 @@
+from test_base import TestBase
+from src.job_journal import JobJournal, credential_hash, load_journal_key, row_key, DONE, FAILED
+import os
+
+class TestJobJournal(TestBase):
+    def setUp(self):
+        super().setUp()
+        self.journal_path = os.path.join(self.test_dir, "job.journal")
+
+    def test_records_are_batched_and_reloaded(self):
+        key = row_key({"name": "John Doe"})
+        journal = JobJournal(self.journal_path, flush_every=2, flush_interval=60)
+        journal.record(1, key, DONE, output="John Doe.docx")
+        self.assertEqual(os.path.getsize(self.journal_path), 0)
+
+        journal.record(2, key, FAILED, message="Template is required")
+        self.assertGreater(os.path.getsize(self.journal_path), 0)
+        journal.close()
+
+        reloaded = JobJournal(self.journal_path)
+        reloaded.close()
+        self.assertEqual(reloaded.done, {1: key})
+        self.assertEqual(reloaded.output(1), "John Doe.docx")
+        self.assertTrue(reloaded.is_done(1, key))
+        self.assertFalse(reloaded.is_done(2, key))
+        self.assertFalse(reloaded.is_done(1, row_key({"name": "Jane Roe"})))
+
+    def test_torn_last_line_is_ignored(self):
+        with JobJournal(self.journal_path) as journal:
+            journal.record(1, "key", DONE)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write('{"row": 2, "key": "ke')
+
+        with JobJournal(self.journal_path) as journal:
+            self.assertEqual(list(journal.done), [1])
+            journal.record(3, "key", DONE)
+
+        reloaded = JobJournal(self.journal_path)
+        reloaded.close()
+        self.assertEqual(sorted(reloaded.done), [1, 3])
+
+    def test_outputs_are_synced_before_their_records(self):
+        synced = []
+        def before_flush(outputs):
+            synced.append((list(outputs), os.path.getsize(self.journal_path)))
+
+        with JobJournal(self.journal_path, flush_every=2, before_flush=before_flush) as journal:
+            journal.record(1, "key", DONE, output="a.docx")
+            journal.record(2, "key", FAILED, message="Template is required")
+            journal.record(3, "key", DONE, output="b.docx")
+        self.assertEqual(synced, [(["a.docx"], 0), (["b.docx"], synced[1][1])])
+        self.assertGreater(synced[1][1], 0)
+
+    def test_credential_hash_is_keyed(self):
+        key_path = os.path.join(self.test_dir, "journal.key")
+        key = load_journal_key(key_path)
+        self.assertEqual(load_journal_key(key_path), key)
+        self.assertEqual(len(key), 32)
+
+        digest = credential_hash(key, "123456", "3456", "")
+        self.assertEqual(digest, credential_hash(key, "123456", "3456", ""))
+        self.assertNotEqual(digest, credential_hash(b"other key", "123456", "3456", ""))
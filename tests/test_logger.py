@@ -0,0 +1,78 @@
+from test_base import TestBase
+from src.utils.logger import (
+    Logger, BulkSummary, JsonFormatter, configure_logging, shutdown_logging,
+    start_bulk_summary, end_bulk_summary
+)
+import json
+import logging
+import os
+import subprocess
+import sys
+import textwrap
+
+class TestLogger(TestBase):
+    def setUp(self):
+        super().setUp()
+        self.log_dir = os.path.join(self.test_dir, "logs")
+
+    def tearDown(self):
+        configure_logging()
+        super().tearDown()
+
+    def read_log(self):
+        shutdown_logging()
+        [name] = os.listdir(self.log_dir)
+        self.assertRegex(name, r"^app_\d{8}\.log$")
+        with open(os.path.join(self.log_dir, name), encoding='utf-8') as f:
+            return f.read().splitlines()
+
+    def test_each_line_is_written_once(self):
+        configure_logging({"directory": self.log_dir, "console": False})
+        loggers = [Logger() for _ in range(5)]
+        loggers[0].info("Starting application")
+        [line] = self.read_log()
+        self.assertIn("Starting application", line)
+
+    def test_json_lines_format(self):
+        configure_logging({"directory": self.log_dir, "console": False, "format": "json"})
+        Logger().error("Error processing document: boom")
+        [line] = self.read_log()
+        entry = json.loads(line)
+        self.assertEqual(entry["level"], "ERROR")
+        self.assertEqual(entry["message"], "Error processing document: boom")
+
+    def test_bulk_summary_replaces_success_lines(self):
+        configure_logging({"directory": self.log_dir, "console": False})
+        logger = Logger()
+        start_bulk_summary(interval=3600)
+        for index in range(50):
+            logger.info(f"Document processed successfully: {index}.docx")
+        logger.error("Error processing document: boom")
+        end_bulk_summary()
+        logger.info("Document processed successfully: after.docx")
+
+        lines = self.read_log()
+        self.assertEqual(len(lines), 3)
+        self.assertIn("boom", lines[0])
+        self.assertIn("Bulk run: 50 documents processed successfully", lines[1])
+        self.assertIn("after.docx", lines[2])
+
+    def test_bulk_summary_is_periodic(self):
+        summary = BulkSummary(interval=0)
+        record = logging.makeLogRecord({"msg": "Document processed successfully: a.docx", "levelno": logging.INFO})
+        self.assertIn("1 documents", summary.process(record).getMessage())
+        self.assertIsNotNone(JsonFormatter().format(record))
+
+    def test_listener_stops_before_earlier_exit_handlers(self):
+        # multiprocessing registers its queue cleanup when it is imported,
+        # which may be after the logger module but before logging is set up
+        script = textwrap.dedent(f"""
+            import atexit
+            import sys
+            sys.path.insert(0, {os.path.abspath("src")!r})
+            from utils import logger
+            atexit.register(lambda: print("listener stopped:", logger._listener is None))
+            logger.configure_logging({{"directory": {os.path.abspath(self.log_dir)!r}, "console": False}})
+        """)
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+        self.assertEqual(result.stdout.strip(), "listener stopped: True")
@@ -0,0 +1,63 @@
+from test_base import TestBase
+from src.utils.metrics import MetricsRegistry, NULL_TIMER
+from src.document_processor import DocumentProcessor, metrics
+import docx
+import json
+import os
+
+class TestMetrics(TestBase):
+    def setUp(self):
+        super().setUp()
+        self.registry = MetricsRegistry()
+        self.registry.configure({"enabled": True, "directory": self.test_dir})
+
+    def tearDown(self):
+        metrics.configure()
+        metrics.reset()
+        super().tearDown()
+
+    def test_disabled_registry_hands_out_no_op_timers(self):
+        registry = MetricsRegistry()
+        self.assertIs(registry.time("render.total"), NULL_TIMER)
+        self.assertIs(registry.counter("documents.rendered"), NULL_TIMER)
+        self.assertIsNone(registry.dump())
+        self.assertEqual(registry.snapshot()["histograms"], {})
+
+    def test_quantiles_and_counters(self):
+        histogram = self.registry.histogram("render.total")
+        for value in range(1, 101):
+            histogram.observe(value / 1000)
+        self.registry.counter("documents.rendered").inc(3)
+
+        self.assertEqual(histogram.quantile(0.5), 0.05)
+        self.assertEqual(histogram.quantile(0.95), 0.095)
+        self.assertEqual(self.registry.latency_summary("render.total"), "p50 50 ms / p95 95 ms")
+        self.assertEqual(self.registry.snapshot()["counters"], {"documents.rendered": 3})
+
+    def test_dump_json_and_prometheus(self):
+        with self.registry.time("render.save"):
+            pass
+        with open(self.registry.dump(), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)["histograms"]["render.save"]["count"], 1)
+
+        self.registry.configure({"enabled": True, "directory": self.test_dir, "format": "prometheus"})
+        with open(self.registry.dump(), encoding='utf-8') as f:
+            content = f.read()
+        self.assertIn("autokvittering_render_save_seconds_count 1", content)
+
+    def test_process_document_records_stages(self):
+        metrics.configure({"enabled": True, "directory": self.test_dir, "dump_interval": 3600})
+        template_path = os.path.join(self.test_templates_dir, "test_template.docx")
+        doc = docx.Document()
+        doc.add_paragraph("Hello [Name]")
+        doc.save(template_path)
+
+        processor = DocumentProcessor(self.test_config)
+        output_path = os.path.join(self.test_output_dir, "out.docx")
+        success, _ = processor.process_document(template_path, output_path, {"[Name]": "John Doe"})
+
+        self.assertTrue(success)
+        snapshot = metrics.snapshot()
+        for stage in ("render.total", "render.load_template", "render.copy", "render.replace", "render.save"):
+            self.assertEqual(snapshot["histograms"][stage]["count"], 1)
+        self.assertEqual(snapshot["counters"]["documents.rendered"], 1)
@@ -0,0 +1,75 @@
+from test_base import TestBase
+from src.output_planner import OutputPlanner, sanitize_name
+from datetime import datetime
+import os
+
+class TestOutputPlanner(TestBase):
+    def setUp(self):
+        super().setUp()
+        self.root = os.path.abspath(self.test_output_dir)
+        self.now = datetime(2024, 11, 18, 23, 59, 59)
+        self.day_dir = os.path.join(self.root, "2024", self.now.strftime("%B"), "18")
+
+    def planner(self, files_per_directory=0):
+        return OutputPlanner({"output_settings": {
+            "directory": self.root, "files_per_directory": files_per_directory
+        }})
+
+    def test_sanitize_name(self):
+        self.assertEqual(sanitize_name("Anders Jensen"), "Anders Jensen")
+        self.assertEqual(sanitize_name('  Ann/Lee: "B"?  '), "Ann Lee B")
+        self.assertEqual(sanitize_name("Søren Ø. "), "Søren Ø")
+        self.assertEqual(sanitize_name("con"), "con_")
+        self.assertEqual(sanitize_name("../.."), "document")
+
+    def test_duplicate_names_get_numbered(self):
+        paths = self.planner().plan_batch(["Anders Jensen", "anders jensen", "Anders Jensen"], self.now)
+        self.assertEqual([os.path.basename(path) for path in paths], [
+            "Anders Jensen.docx", "anders jensen (2).docx", "Anders Jensen (3).docx"
+        ])
+        self.assertTrue(all(os.path.dirname(path) == self.day_dir for path in paths))
+        self.assertTrue(os.path.isdir(self.day_dir))
+
+    def test_existing_files_are_indexed_once(self):
+        os.makedirs(self.day_dir)
+        open(os.path.join(self.day_dir, "John Doe.docx"), 'w').close()
+
+        planner = self.planner()
+        self.assertEqual(os.path.basename(planner.plan("John Doe", self.now)), "John Doe (2).docx")
+        # A file created behind the planner's back after indexing is not rescanned
+        open(os.path.join(self.day_dir, "Jane Roe.docx"), 'w').close()
+        self.assertEqual(os.path.basename(planner.plan("Jane Roe", self.now)), "Jane Roe.docx")
+
+    def test_sharding(self):
+        paths = self.planner(files_per_directory=2).plan_batch(
+            [f"Person {index}" for index in range(5)], self.now
+        )
+        shards = [os.path.relpath(os.path.dirname(path), self.day_dir) for path in paths]
+        self.assertEqual(shards, ["001", "001", "002", "002", "003"])
+
+        for path in paths:
+            open(path, 'w').close()
+        # A new planner counts the files already in the shards
+        path = self.planner(files_per_directory=2).plan("Person 0", self.now)
+        self.assertEqual(os.path.relpath(path, self.day_dir), os.path.join("003", "Person 0 (2).docx"))
+
+    def test_create_never_replaces_an_existing_file(self):
+        planner = self.planner()
+        path = planner.plan("John Doe", self.now)
+        # Another process writes the same name after it was planned
+        with open(path, 'w') as f:
+            f.write("theirs")
+
+        output, created = planner.create(path)
+        with output:
+            output.write(b"ours")
+        self.assertEqual(os.path.basename(created), "John Doe (2).docx")
+        with open(path) as f:
+            self.assertEqual(f.read(), "theirs")
+        self.assertEqual(os.path.basename(planner.plan("John Doe", self.now)), "John Doe (3).docx")
+
+        # A planner in another process (a bulk worker) finds the next free name too
+        open(os.path.join(self.day_dir, "John Doe (3).docx"), 'w').close()
+        output, created = self.planner().create(path)
+        output.close()
+        self.assertEqual(os.path.basename(created), "John Doe (4).docx")
@@ -0,0 +1,48 @@
+from test_base import TestBase
+from src.pin_registry import PinRegistry
+from src.credential_generator import CredentialGenerator
+import os
+
+class TestPinRegistry(TestBase):
+    def setUp(self):
+        super().setUp()
+        self.registry_path = os.path.join(self.test_dir, "pins.sqlite3")
+
+    def test_collisions_are_rejected_and_persisted(self):
+        registry = PinRegistry(self.registry_path, unique_print_pins=True)
+        accepted = registry.reserve([("123456", "3456"), ("123456", "3456"), ("223456", "3456"), ("654321", "4321")])
+        self.assertEqual(accepted, [("123456", "3456"), ("654321", "4321")])
+        registry.close()
+
+        reopened = PinRegistry(self.registry_path, unique_print_pins=True)
+        self.assertEqual(reopened.reserve([("654321", "0000"), ("111111", "1111")]), [("111111", "1111")])
+        self.assertTrue(reopened.is_issued("123456"))
+        self.assertEqual(len(reopened), 3)
+        reopened.close()
+
+    def test_print_pins_may_repeat_when_allowed(self):
+        registry = PinRegistry(self.registry_path, unique_print_pins=False)
+        accepted = registry.reserve([("123456", "3456"), ("223456", "3456")])
+        registry.close()
+        self.assertEqual(len(accepted), 2)
+
+    def test_print_pins_are_unique_only_among_recent_pins(self):
+        registry = PinRegistry(self.registry_path, unique_print_pins=True, print_pin_days=30)
+        registry.reserve([("123456", "3456")])
+        self.assertEqual(registry.reserve([("223456", "3456")]), [])
+        registry._connection.execute("UPDATE issued_pins SET issued_at = '2000-01-01T00:00:00'")
+        self.assertEqual(registry.reserve([("223456", "3456")]), [("223456", "3456")])
+        registry.close()
+
+    def test_generator_issues_unique_pins(self):
+        self.test_config["pin_registry"] = {"enabled": True, "path": self.registry_path, "unique_print_pins": True}
+        generator = CredentialGenerator(self.test_config)
+        pins = generator.generate_pins(2000) + generator.generate_pins(2000)
+        self.assertEqual(len(set(pins)), 4000)
+        self.assertEqual(len({generator.get_print_pin(pin) for pin in pins}), 4000)
+
+        self.test_config["pin_registry"]["max_attempts"] = 1
+        with self.assertRaises(RuntimeError):
+            generator.generate_pins(6001)
+        self.assertEqual(len(generator.pin_registry), 4000)
+        generator.pin_registry.close()
@@ -0,0 +1,56 @@
+from test_base import TestBase
+from src.document_processor import DocumentProcessor
+from src.placeholder_grammar import PlaceholderPlan, parse_placeholder
+from src.template_schema import load_template_schema
+from datetime import datetime
+import docx
+import os
+
+class TestPlaceholderGrammar(TestBase):
+    def test_parse_placeholder(self):
+        self.assertEqual(parse_placeholder("[Pin|last4]"), ("Pin", ("last4",)))
+        self.assertEqual(parse_placeholder("[Date|%d-%m-%Y]"), ("Date", ("%d-%m-%Y",)))
+        self.assertEqual(parse_placeholder("[NAME]"), ("Name", ("upper",)))
+        self.assertEqual(parse_placeholder("[PIN]"), ("PIN", ()))
+
+    def test_plan_resolves_only_used_fields(self):
+        calls = []
+        def now():
+            calls.append(1)
+            return datetime(2024, 11, 18)
+
+        plan = PlaceholderPlan(["[Name|upper]", "[name]", "[Pin|last4]", "[Pin|first2|lower]", "[Other]", "[Name|bogus]"])
+        values = {"name": "Anders Jensen", "pin": "123456", "date": now}
+        self.assertEqual(plan.resolve(values), {
+            "[Name|upper]": "ANDERS JENSEN",
+            "[name]": "anders jensen",
+            "[Pin|last4]": "3456",
+            "[Pin|first2|lower]": "12",
+        })
+        self.assertEqual(calls, [])
+
+        plan = PlaceholderPlan(["[Date|%Y/%m/%d]", "[Date]"])
+        self.assertEqual(plan.resolve(values), {"[Date|%Y/%m/%d]": "2024/11/18", "[Date]": "18-11-2024"})
+        self.assertEqual(calls, [1])
+
+    def test_render_with_modifiers(self):
+        doc = docx.Document()
+        doc.add_paragraph("[NAME] / [Name|lower] / PIN ending [Pin|last4] / [Unknown|upper]")
+        template_path = os.path.join(self.test_templates_dir, "modifiers.docx")
+        doc.save(template_path)
+
+        processor = DocumentProcessor(self.test_config)
+        schema = load_template_schema(template_path)
+        self.assertTrue(schema.uses("pin"))
+        replacements = processor.create_replacements_dict(
+            "John Doe", "johndoe", "123456", "3456", "secret", schema
+        )
+        self.assertEqual(sorted(replacements), ["[NAME]", "[Name|lower]", "[Pin|last4]"])
+
+        output_path = os.path.join(self.test_output_dir, "modifiers.docx")
+        success, message = processor.process_document(template_path, output_path, replacements)
+        self.assertTrue(success, message)
+        self.assertEqual(
+            docx.Document(output_path).paragraphs[0].text,
+            "JOHN DOE / john doe / PIN ending 3456 / [Unknown|upper]"
+        )
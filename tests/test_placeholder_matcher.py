@@ -0,0 +1,35 @@
+from test_base import TestBase
+from src.placeholder_matcher import PlaceholderMatcher
+
+class TestPlaceholderMatcher(TestBase):
+    def test_replaces_all_placeholders_in_one_pass(self):
+        matcher = PlaceholderMatcher({"[Name]": "John", "[Pin]": "123456"})
+        self.assertEqual(
+            matcher.replace("[Name] has PIN [Pin], [Name]!"),
+            "John has PIN 123456, John!"
+        )
+
+    def test_longest_placeholder_wins(self):
+        matcher = PlaceholderMatcher({"[Pin": "x", "[PinCode]": "1234"})
+        self.assertEqual(matcher.replace("[PinCode]"), "1234")
+
+    def test_values_are_not_rescanned(self):
+        matcher = PlaceholderMatcher({"[Name]": "[Pin]", "[Pin]": "123456"})
+        self.assertEqual(matcher.replace("[Name]"), "[Pin]")
+
+    def test_text_without_marker_is_returned_unchanged(self):
+        matcher = PlaceholderMatcher({"[Name]": "John"})
+        text = "Nothing to replace"
+        self.assertIs(matcher.replace(text), text)
+
+    def test_empty_replacements(self):
+        matcher = PlaceholderMatcher({})
+        self.assertEqual(matcher.replace("[Name]"), "[Name]")
+
+    def test_replace_segments_keeps_text_in_its_segment(self):
+        matcher = PlaceholderMatcher({"[Name]": "John Doe", "[Pin]": ""})
+        self.assertEqual(
+            matcher.replace_segments(["Dear [Na", "me], ", "", "PIN [Pin] [Other]"]),
+            ["Dear John Doe", ", ", "", "PIN  [Other]"]
+        )
+        self.assertIsNone(matcher.replace_segments(["[Oth", "er]"]))
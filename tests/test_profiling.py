@@ -0,0 +1,90 @@
+from test_base import TestBase
+from src.bulk import run_bulk
+from src.document_processor import DocumentProcessor, profiler as render_profiler
+from src.utils.profiling import ENV_VARIABLE, Profiler
+import docx
+import glob
+import json
+import os
+
+class TestProfiling(TestBase):
+    def setUp(self):
+        super().setUp()
+        self.profile_dir = os.path.join(self.test_dir, "profiles")
+        self.settings = {"enabled": True, "directory": self.profile_dir, "sample_rate": 1.0, "top": 5}
+        os.environ.pop(ENV_VARIABLE, None)
+
+    def tearDown(self):
+        os.environ.pop(ENV_VARIABLE, None)
+        render_profiler.configure()
+        super().tearDown()
+
+    def test_render_writes_report(self):
+        doc = docx.Document()
+        doc.add_paragraph("Hello [Name]")
+        template_path = os.path.join(self.test_templates_dir, "staff.docx")
+        doc.save(template_path)
+
+        render_profiler.configure(self.settings)
+        processor = DocumentProcessor(self.test_config)
+        success, _ = processor.process_document(
+            template_path, os.path.join(self.test_output_dir, "out.docx"), {"[Name]": "John Doe"}
+        )
+        self.assertTrue(success)
+
+        reports = glob.glob(os.path.join(self.profile_dir, "render_*_staff.docx.txt"))
+        self.assertEqual(len(reports), 1)
+        self.assertTrue(os.path.exists(reports[0][:-4] + ".prof"))
+        with open(reports[0], 'r', encoding='utf-8') as f:
+            report = f.read()
+        self.assertIn("functions by cumulative time", report)
+        self.assertIn("Peak traced memory", report)
+
+    def test_sampling_and_pruning(self):
+        profiler = Profiler()
+        profiler.configure(dict(self.settings, sample_rate=0.0))
+        with profiler.profile("render", "skipped"):
+            pass
+        with profiler.profile("bulk", "batch", sampled=False):
+            pass
+        self.assertEqual(len(glob.glob(os.path.join(self.profile_dir, "*.txt"))), 1)
+
+        profiler.configure(dict(self.settings, max_reports=2, memory=False))
+        for index in range(4):
+            with profiler.profile("render", str(index)):
+                pass
+        self.assertEqual(len(glob.glob(os.path.join(self.profile_dir, "*.txt"))), 2)
+
+    def test_bulk_batches_are_sampled(self):
+        doc = docx.Document()
+        doc.add_paragraph("Hello [Name]")
+        doc.save(os.path.join(self.test_templates_dir, "staff.docx"))
+        input_path = os.path.abspath(os.path.join(self.test_dir, "staff.jsonl"))
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"name": "John Doe"}) + "\n")
+        config = dict(self.test_config, template_directory=os.path.abspath(self.test_templates_dir))
+
+        cwd = os.getcwd()
+        os.chdir(self.test_output_dir)
+        try:
+            settings = dict(self.settings, directory=os.path.abspath(self.profile_dir), sample_rate=0.0)
+            bulk_reports = os.path.join(settings["directory"], "bulk_*.txt")
+            render_profiler.configure(settings)
+            run_bulk(config, input_path, workers=1, default_template="staff.docx")
+            self.assertEqual(glob.glob(bulk_reports), [])
+
+            render_profiler.configure(dict(settings, every_batch=True))
+            run_bulk(config, input_path, workers=1, default_template="staff.docx")
+            self.assertEqual(len(glob.glob(bulk_reports)), 1)
+        finally:
+            os.chdir(cwd)
+
+    def test_environment_variable(self):
+        os.environ[ENV_VARIABLE] = "0.25"
+        profiler = Profiler()
+        self.assertTrue(profiler.enabled)
+        self.assertEqual(profiler.settings["sample_rate"], 0.25)
+
+        os.environ[ENV_VARIABLE] = "0"
+        profiler.configure(self.settings)
+        self.assertFalse(profiler.enabled)
@@ -0,0 +1,144 @@
+from test_base import TestBase
+from src.render_server import create_server
+from concurrent.futures import ThreadPoolExecutor
+import docx
+import http.client
+import io
+import json
+import os
+import threading
+import time
+
+class TestRenderServer(TestBase):
+    def setUp(self):
+        super().setUp()
+        doc = docx.Document()
+        doc.add_paragraph("Hello [Name], your PIN is [Pin]")
+        doc.save(os.path.join(self.test_templates_dir, "Lagermedarbejder_skabelon.docx"))
+
+        config = dict(self.test_config)
+        config["template_directory"] = os.path.abspath(self.test_templates_dir)
+        self.cwd = os.getcwd()
+        os.chdir(self.test_output_dir)
+
+        self.server = create_server(config, host="127.0.0.1", port=0, workers=4)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        os.chdir(self.cwd)
+        super().tearDown()
+
+    def connect(self):
+        return http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+
+    def post(self, connection, body):
+        connection.request("POST", "/render", json.dumps(body), {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response, response.read()
+
+    def test_render_bytes_over_keep_alive_connection(self):
+        connection = self.connect()
+        for name in ("John Doe", "Jane Roe"):
+            response, body = self.post(connection, {"template": "Lagermedarbejder_skabelon.docx", "name": name})
+            self.assertEqual(response.status, 200)
+            text = docx.Document(io.BytesIO(body)).paragraphs[0].text
+            self.assertEqual(text, f"Hello {name}, your PIN is {response.getheader('X-Pin')}")
+        connection.close()
+
+    def test_render_to_path(self):
+        connection = self.connect()
+        response, body = self.post(connection, {
+            "template": "Lagermedarbejder_skabelon.docx", "name": "John Doe", "output": "path"
+        })
+        connection.close()
+        result = json.loads(body)
+        self.assertEqual(response.status, 200)
+        self.assertTrue(os.path.exists(result["output_path"]))
+
+    def test_invalid_requests(self):
+        connection = self.connect()
+        cases = [
+            ({"template": "Lagermedarbejder_skabelon.docx"}, 400),
+            ({"template": "../config.json", "name": "John Doe"}, 404),
+            ({"name": "John Doe"}, 400),
+        ]
+        for body, status in cases:
+            response, content = self.post(connection, body)
+            self.assertEqual(response.status, status, body)
+            self.assertIn("error", json.loads(content))
+        connection.close()
+
+    def test_bad_content_length_and_internal_errors(self):
+        for length in ("-1", "abc"):
+            connection = self.connect()
+            connection.putrequest("POST", "/render")
+            connection.putheader("Content-Length", length)
+            connection.endheaders()
+            response = connection.getresponse()
+            self.assertEqual(response.status, 400, length)
+            self.assertEqual(response.getheader("Connection"), "close")
+            response.read()
+            connection.close()
+
+        # Failures are logged; the client gets no internal paths
+        service = self.server.service
+        service.doc_processor.render_to_bytes = lambda *args, **kwargs: (False, "Bad zip: /srv/templates/x.docx", None)
+        connection = self.connect()
+        response, content = self.post(connection, {"template": "Lagermedarbejder_skabelon.docx", "name": "John Doe"})
+        self.assertEqual((response.status, json.loads(content)), (500, {"error": "The document could not be rendered"}))
+
+        def fail(request):
+            raise OSError("/srv/templates/x.docx")
+        service.render = fail
+        response, content = self.post(connection, {"template": "Lagermedarbejder_skabelon.docx", "name": "John Doe"})
+        self.assertEqual((response.status, json.loads(content)), (500, {"error": "Internal server error"}))
+        connection.close()
+
+    def test_waiting_connections_take_over_idle_keep_alive_workers(self):
+        self.server.shutdown()
+        self.server.server_close()
+        config = dict(self.server.service.config)
+        self.server = create_server(config, host="127.0.0.1", port=0, workers=1)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        body = {"template": "Lagermedarbejder_skabelon.docx", "name": "John Doe"}
+        first = self.connect()
+        response, _ = self.post(first, body)
+        self.assertIsNone(response.getheader("Connection"))
+
+        # The only worker now idles on the first connection while a second one waits
+        waiting = self.connect()
+        waiting.connect()
+        while not self.server.has_waiting_connections():
+            time.sleep(0.01)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            second = executor.submit(self.post, waiting, body)
+            response, _ = self.post(first, body)
+            self.assertEqual(response.getheader("Connection"), "close")
+            self.assertEqual(second.result()[0].status, 200)
+        first.close()
+        waiting.close()
+
+    def test_concurrent_requests_and_health(self):
+        def render(index):
+            connection = self.connect()
+            response, _ = self.post(connection, {"template": "Lagermedarbejder_skabelon.docx", "name": f"Person {index}"})
+            connection.close()
+            return response.status
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            self.assertEqual(list(executor.map(render, range(16))), [200] * 16)
+
+        connection = self.connect()
+        connection.request("GET", "/health")
+        health = json.loads(connection.getresponse().read())
+        connection.close()
+        self.assertEqual(health["status"], "ok")
+        self.assertEqual(health["counts"]["rendered"], 16)
+        self.assertEqual(health["templates"], ["Lagermedarbejder_skabelon.docx"])
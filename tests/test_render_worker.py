@@ -0,0 +1,46 @@
+from test_base import TestBase
+from src.render_worker import RenderWorker
+import threading
+
+class TestRenderWorker(TestBase):
+    def collect_events(self, worker, job_count):
+        events = []
+        while sum(1 for event in events if event[0] in ("done", "failed")) < job_count:
+            events.extend(worker.poll())
+        return events
+
+    def test_jobs_run_in_order_off_the_calling_thread(self):
+        caller = threading.current_thread()
+        release = threading.Event()
+
+        def render(name, progress):
+            release.wait(5)
+            progress(f"Rendering {name}")
+            return name, threading.current_thread() is not caller
+
+        worker = RenderWorker(render)
+        worker.start()
+        first = worker.submit(name="John")
+        second = worker.submit(name="Jane")
+        self.assertEqual(worker.pending, 2)
+        release.set()
+
+        events = self.collect_events(worker, 2)
+        worker.stop(timeout=5)
+
+        done = [(job_id, payload) for kind, job_id, payload in events if kind == "done"]
+        self.assertEqual(done, [(first, ("John", True)), (second, ("Jane", True))])
+        self.assertIn(("progress", first, "Rendering John"), events)
+        self.assertEqual(worker.pending, 0)
+
+    def test_failed_job_is_reported(self):
+        def render(progress):
+            raise ValueError("template missing")
+
+        worker = RenderWorker(render)
+        worker.start()
+        job_id = worker.submit()
+        events = self.collect_events(worker, 1)
+        worker.stop(timeout=5)
+
+        self.assertEqual(events[-1], ("failed", job_id, "template missing"))
@@ -0,0 +1,71 @@
+from test_base import TestBase
+from src.document_processor import DocumentProcessor
+from src.repeating_rows import split_replacements
+from src.template_schema import load_template_schema
+import docx
+import os
+
+class TestRepeatingRows(TestBase):
+    def setUp(self):
+        super().setUp()
+        doc = docx.Document()
+        doc.add_paragraph("Handover by [Name]")
+        table = doc.add_table(rows=3, cols=2)
+        table.cell(0, 0).text = "Name"
+        table.cell(0, 1).text = "Username"
+        table.cell(1, 0).text = "[#Hires]"
+        table.cell(1, 0).paragraphs[0].add_run("[Hires.").bold = True
+        table.cell(1, 0).paragraphs[0].add_run("Name]")
+        table.cell(1, 1).text = "[Hires.Username] for [Name]"
+        table.cell(2, 0).text = "Total"
+        self.template_path = os.path.join(self.test_templates_dir, "handover.docx")
+        doc.save(self.template_path)
+
+        self.hires = [
+            {"Name": "John Doe", "Username": "johndoe"},
+            {"Name": "Jane & Roe", "Username": "janeroe"},
+            {"Name": "Ann Lee"},
+        ]
+
+    def render(self, engine, hires):
+        processor = DocumentProcessor(dict(self.test_config, render_engine=engine))
+        output_path = os.path.join(self.test_output_dir, f"{engine}.docx")
+        success, message = processor.process_document(
+            self.template_path, output_path, {"[Name]": "Lead", "[#Hires]": hires}
+        )
+        self.assertTrue(success, message)
+        return docx.Document(output_path)
+
+    def test_rows_repeat_in_both_engines(self):
+        for engine in ("docx", "xml"):
+            doc = self.render(engine, self.hires)
+            rows = [[cell.text for cell in row.cells] for row in doc.tables[0].rows]
+            self.assertEqual(rows, [
+                ["Name", "Username"],
+                ["John Doe", "johndoe for Lead"],
+                ["Jane & Roe", "janeroe for Lead"],
+                ["Ann Lee", " for Lead"],
+                ["Total", ""],
+            ], engine)
+            self.assertEqual(doc.paragraphs[0].text, "Handover by Lead")
+            runs = doc.tables[0].cell(1, 0).paragraphs[0].runs
+            self.assertEqual([(run.text, run.bold) for run in runs], [
+                ("", None), ("John Doe", True), ("", None)
+            ], engine)
+
+    def test_empty_list_removes_row(self):
+        for engine in ("docx", "xml"):
+            doc = self.render(engine, [])
+            self.assertEqual(len(doc.tables[0].rows), 2, engine)
+
+    def test_schema_and_replacements(self):
+        schema = load_template_schema(self.template_path)
+        self.assertEqual(schema.tables, ["Hires"])
+        self.assertEqual(schema.required_fields, ["name"])
+
+        replacements = DocumentProcessor(self.test_config).create_replacements_dict(
+            "Lead", "", "1234", "5678", "secret", schema, {"Hires": self.hires, "Other": []}
+        )
+        scalars, tables = split_replacements(replacements)
+        self.assertEqual(scalars, {"[Name]": "Lead"})
+        self.assertEqual(tables, {"Hires": self.hires})
@@ -0,0 +1,9 @@
+from test_base import TestBase
+from benchmark_startup import HEADLESS_MODULES, profile_import
+
+class TestStartup(TestBase):
+    def test_headless_modules_do_not_load_gui_or_docx(self):
+        for module in HEADLESS_MODULES:
+            profile = profile_import(module)
+            self.assertEqual(profile["heavy_dependencies"], [], module)
+            self.assertIn(module, [entry["name"] for entry in profile["imports"]])
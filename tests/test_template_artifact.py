@@ -0,0 +1,109 @@
+from test_base import TestBase
+from src.compile_templates import compile_templates
+from src.document_processor import DocumentProcessor
+from src.template_artifact import ARTIFACT_SUFFIX, TemplateArtifact
+from src.template_schema import SIDECAR_SUFFIX
+from unittest import mock
+import docx
+import os
+
+class TestTemplateArtifact(TestBase):
+    def setUp(self):
+        super().setUp()
+        doc = docx.Document()
+        doc.add_paragraph("Static intro & more")
+        paragraph = doc.add_paragraph("Hello ")
+        for text in ("[Na", "me]", ", PIN [Pin|last4]"):
+            paragraph.add_run(text).bold = True
+        table = doc.add_table(rows=2, cols=2)
+        table.cell(0, 0).text = "[#Hires][Hires.Name]"
+        table.cell(0, 1).text = "[Hires.Username|upper]"
+        table.cell(1, 0).text = "Signed [Name]"
+        doc.add_paragraph("Static outro")
+        doc.sections[0].footer.paragraphs[0].text = "Footer [Name]"
+        self.template_path = os.path.join(self.test_templates_dir, "staff.docx")
+        doc.save(self.template_path)
+
+        self.artifact_dir = os.path.join(self.test_dir, "compiled")
+        self.config = dict(self.test_config, template_artifacts={"enabled": True, "directory": self.artifact_dir})
+        self.replacements = {
+            "[Name]": "John Doe",
+            "[Pin|last4]": "3456",
+            "[#Hires]": [{"Name": "Ann", "Username": "ann"}, {"Name": "Bo", "Username": "bo"}]
+        }
+
+    def render(self, config, engine, output_name):
+        processor = DocumentProcessor(dict(config, render_engine=engine))
+        output_path = os.path.join(self.test_output_dir, output_name)
+        success, message = processor.process_document(self.template_path, output_path, self.replacements)
+        self.assertTrue(success, message)
+        doc = docx.Document(output_path)
+        texts = [paragraph.text for paragraph in doc.paragraphs]
+        cells = [[cell.text for cell in row.cells] for row in doc.tables[0].rows]
+        return processor, (texts, cells, doc.sections[0].footer.paragraphs[0].text)
+
+    def test_compile_is_incremental_and_prunes(self):
+        stale = os.path.join(self.artifact_dir, "0" * 64 + ARTIFACT_SUFFIX)
+        os.makedirs(self.artifact_dir)
+        open(stale, 'w').close()
+
+        self.assertEqual(compile_templates(self.config), (["staff.docx"], [], [], []))
+        self.assertEqual(
+            compile_templates(self.config, prune=True),
+            ([], ["staff.docx"], [os.path.basename(stale)], [])
+        )
+
+    def test_artifacts_in_use_are_skipped(self):
+        compile_templates(self.config)
+        open(os.path.join(self.artifact_dir, "0" * 64 + ARTIFACT_SUFFIX), 'w').close()
+
+        # Windows refuses to replace or remove a file another process has mapped
+        with mock.patch("os.replace", side_effect=PermissionError("in use")), \
+                mock.patch("os.remove", side_effect=PermissionError("in use")):
+            compiled, unchanged, removed, skipped = compile_templates(self.config, prune=True, force=True)
+        self.assertEqual((compiled, removed), ([], []))
+        self.assertEqual(sorted(skipped), ["0" * 64 + ARTIFACT_SUFFIX, "staff.docx"])
+
+    def test_template_without_artifact_is_not_scanned_twice(self):
+        processor = DocumentProcessor(self.config)
+        self.assertEqual(processor.template_cache.get(self.template_path).skeletons, {})
+        self.assertFalse(os.path.exists(self.template_path + SIDECAR_SUFFIX))
+
+    def test_rendering_from_artifact_matches_template(self):
+        compile_templates(self.config)
+        for engine in ("docx", "xml"):
+            _, expected = self.render(self.test_config, engine, f"plain_{engine}.docx")
+            processor, actual = self.render(self.config, engine, f"artifact_{engine}.docx")
+            self.assertEqual(actual, expected, engine)
+            self.assertTrue(processor.template_cache.get(self.template_path).skeletons)
+
+        texts, cells, footer = actual
+        self.assertEqual(texts, ["Static intro & more", "Hello John Doe, PIN 3456", "Static outro"])
+        self.assertEqual(cells, [["Ann", "ANN"], ["Bo", "BO"], ["Signed John Doe", ""]])
+        self.assertEqual(footer, "Footer John Doe")
+
+    def test_changed_template_falls_back_to_compiling(self):
+        compile_templates(self.config)
+        doc = docx.Document()
+        doc.add_paragraph("New [Name]")
+        doc.save(self.template_path)
+
+        processor = DocumentProcessor(self.config)
+        self.assertEqual(processor.template_cache.get(self.template_path).skeletons, {})
+
+    def test_truncated_or_foreign_artifacts_are_ignored(self):
+        compile_templates(self.config)
+        [name] = os.listdir(self.artifact_dir)
+        path = os.path.join(self.artifact_dir, name)
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        for broken in (data[:10], data[:-100], b"PK\x03\x04" + b"\0" * 40):
+            with open(path, 'wb') as f:
+                f.write(broken)
+            with self.assertRaises(ValueError):
+                TemplateArtifact(path)
+
+            _, (texts, _, _) = self.render(self.config, "xml", "fallback.docx")
+            self.assertEqual(texts[1], "Hello John Doe, PIN 3456")
+            self.assertEqual(compile_templates(self.config), (["staff.docx"], [], [], []))
@@ -0,0 +1,72 @@
+from test_base import TestBase
+from src.template_cache import TemplateCache
+import docx
+import os
+
+class TestTemplateCache(TestBase):
+    def setUp(self):
+        super().setUp()
+        self.cache = TemplateCache(max_entries=2)
+        self.template_paths = []
+        for index in range(3):
+            doc = docx.Document()
+            doc.add_paragraph("No placeholders here")
+            doc.add_paragraph(f"Hello [Name] {index}")
+            path = os.path.join(self.test_templates_dir, f"template{index}.docx")
+            doc.save(path)
+            self.template_paths.append(path)
+
+    def test_cache_hit(self):
+        first = self.cache.get(self.template_paths[0])
+        second = self.cache.get(self.template_paths[0])
+        self.assertIs(first, second)
+        self.assertEqual(first.part_index.parts, {"word/document.xml": [1]})
+
+    def test_lru_eviction(self):
+        first = self.cache.get(self.template_paths[0])
+        self.cache.get(self.template_paths[1])
+        self.cache.get(self.template_paths[0])
+        self.cache.get(self.template_paths[2])
+        self.assertEqual(len(self.cache), 2)
+        self.assertIs(self.cache.get(self.template_paths[0]), first)
+
+    def test_parsed_parts_count_towards_the_byte_limit(self):
+        first = self.cache.get(self.template_paths[0])
+        packaged = first.nbytes
+        first.checkout()
+        self.assertGreater(first.nbytes, packaged)
+
+        self.cache.max_bytes = first.nbytes + packaged
+        second = self.cache.get(self.template_paths[1])
+        self.assertEqual(len(self.cache), 2)
+        second.checkout()
+        self.cache.get(self.template_paths[1])
+        self.assertEqual(len(self.cache), 1)
+
+    def test_modified_template_is_recompiled(self):
+        first = self.cache.get(self.template_paths[0])
+        doc = docx.Document()
+        doc.add_paragraph("[Username]")
+        doc.save(self.template_paths[0])
+        os.utime(self.template_paths[0], ns=(0, first.mtime + 1))
+
+        second = self.cache.get(self.template_paths[0])
+        self.assertIsNot(first, second)
+        self.assertEqual(second.part_index.parts, {"word/document.xml": [0]})
+
+    def test_checkout_leaves_compiled_form_untouched(self):
+        compiled = self.cache.get(self.template_paths[0])
+        compiled.checkout()[0].paragraphs[0].text = "Hello John Doe 0"
+        self.assertEqual(compiled.checkout()[0].paragraphs[0].text, "Hello [Name] 0")
+
+    def test_part_index_covers_headers_and_footers(self):
+        doc = docx.Document()
+        doc.add_paragraph("Body without placeholders")
+        doc.sections[0].header.paragraphs[0].text = "Issued to [Name]"
+        doc.sections[0].footer.paragraphs[0].text = "Page footer"
+        path = os.path.join(self.test_templates_dir, "header.docx")
+        doc.save(path)
+
+        part_index = self.cache.get(path).part_index
+        self.assertEqual(list(part_index.parts), ["word/header1.xml"])
+        self.assertEqual(part_index.placeholders, {"[Name]"})
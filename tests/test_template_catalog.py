@@ -0,0 +1,101 @@
+from test_base import TestBase
+from src.template_catalog import TemplateCatalog
+import docx
+import os
+import threading
+
+class TestTemplateCatalog(TestBase):
+    def setUp(self):
+        super().setUp()
+        self.config = {"template_directory": self.test_templates_dir}
+        self.catalog = TemplateCatalog(self.config, refresh_interval=3600)
+
+    def save_template(self, name, text, directory=None):
+        doc = docx.Document()
+        doc.add_paragraph(text)
+        path = os.path.join(directory or self.test_templates_dir, name)
+        doc.save(path)
+        return path
+
+    def test_entries_carry_metadata(self):
+        path = self.save_template("Lagermedarbejder_skabelon.docx", "Hello [Name], PIN [Pin]")
+        with open(os.path.join(self.test_templates_dir, "notes.txt"), 'w') as f:
+            f.write("not a template")
+
+        self.assertEqual(self.catalog.names(), ["Lagermedarbejder_skabelon.docx"])
+        entry = self.catalog.get("Lagermedarbejder_skabelon.docx")
+        self.assertEqual(entry.path, path)
+        self.assertEqual(entry.size, os.path.getsize(path))
+        self.assertEqual(entry.placeholders, ["[Name]", "[Pin]"])
+        self.assertEqual(len(entry.content_hash), 64)
+        self.assertIsNone(self.catalog.get("../config.json"))
+
+    def test_refresh_is_incremental(self):
+        self.save_template("a.docx", "[Name]")
+        self.save_template("b.docx", "[Name]")
+        self.assertEqual(self.catalog.refresh(), (["a.docx", "b.docx"], [], []))
+        self.assertEqual(self.catalog.refresh(), ([], [], []))
+
+        self.save_template("b.docx", "[Name] [Username]")
+        os.remove(os.path.join(self.test_templates_dir, "a.docx"))
+        self.save_template("c.docx", "[Name]")
+        added, changed, removed = self.catalog.refresh()
+        self.assertEqual((added, changed, removed), (["c.docx"], ["b.docx"], ["a.docx"]))
+        self.assertEqual(self.catalog.get("b.docx").placeholders, ["[Name]", "[Username]"])
+
+    def test_new_template_is_found_before_the_next_poll(self):
+        self.assertEqual(self.catalog.names(), [])
+        self.save_template("a.docx", "[Name]")
+        self.assertEqual(self.catalog.names(), [])
+        self.assertIsNotNone(self.catalog.get("a.docx"))
+
+    def test_misses_rescan_at_most_once_per_interval(self):
+        refreshes = []
+        refresh = self.catalog.refresh
+        self.catalog.refresh = lambda: refreshes.append(1) or refresh()
+
+        self.catalog.names()
+        for _ in range(100):
+            self.assertIsNone(self.catalog.get("missing.docx"))
+        self.save_template("a.docx", "[Name]")
+        self.assertIsNone(self.catalog.get("a.docx"))
+        self.assertEqual(len(refreshes), 2)
+
+        self.catalog.refresh_interval = 0
+        self.assertIsNotNone(self.catalog.get("a.docx"))
+
+    def test_broken_templates_and_directory_changes(self):
+        with open(os.path.join(self.test_templates_dir, "broken.docx"), 'wb') as f:
+            f.write(b"not a zip file")
+        self.save_template("a.docx", "[Name]")
+        self.assertEqual(self.catalog.names(), ["a.docx"])
+
+        other_dir = os.path.join(self.test_dir, "other")
+        os.makedirs(other_dir)
+        self.save_template("b.docx", "[Name]", other_dir)
+        self.config["template_directory"] = other_dir
+        self.assertEqual(self.catalog.names(), ["b.docx"])
+
+    def test_snapshot_reads_do_not_wait_for_indexing(self):
+        self.save_template("a.docx", "[Name]")
+        self.catalog.refresh()
+        self.save_template("b.docx", "[Name]")
+
+        indexing, release = threading.Event(), threading.Event()
+        index = self.catalog._index
+        def slow_index(*args):
+            indexing.set()
+            release.wait(5)
+            index(*args)
+        self.catalog._index = slow_index
+
+        self.catalog.refresh_interval = 0
+        self.catalog.refresh_in_background()
+        self.assertTrue(indexing.wait(5))
+        self.assertEqual(self.catalog.names(refresh=False), ["a.docx"])
+        self.assertIsNotNone(self.catalog.get("a.docx", refresh=False))
+        self.assertIsNone(self.catalog.get("b.docx", refresh=False))
+
+        release.set()
+        self.catalog._refresh_thread.join(5)
+        self.assertEqual(self.catalog.names(refresh=False), ["a.docx", "b.docx"])
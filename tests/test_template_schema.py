@@ -0,0 +1,46 @@
+from test_base import TestBase
+from src.template_schema import load_template_schema, SIDECAR_SUFFIX
+import docx
+import json
+import os
+
+class TestTemplateSchema(TestBase):
+    def setUp(self):
+        super().setUp()
+        doc = docx.Document()
+        doc.add_paragraph("Hello [Name], your PIN is [Pin]")
+        doc.sections[0].footer.paragraphs[0].text = "Printer code [PrintPin]"
+        self.template_path = os.path.join(self.test_templates_dir, "staff.docx")
+        doc.save(self.template_path)
+
+    def test_scan_placeholders(self):
+        schema = load_template_schema(self.template_path)
+        self.assertEqual(schema.placeholders, ["[Name]", "[Pin]", "[PrintPin]"])
+        self.assertEqual(schema.required_fields, ["name"])
+        self.assertTrue(schema.uses("pin"))
+        self.assertFalse(schema.uses("password", "username"))
+
+    def test_sidecar_is_reused_while_content_is_unchanged(self):
+        schema = load_template_schema(self.template_path)
+        sidecar_path = self.template_path + SIDECAR_SUFFIX
+        self.assertTrue(os.path.exists(sidecar_path))
+
+        # A touched template keeps its schema as long as the content hash matches
+        with open(sidecar_path, 'r') as f:
+            cached = json.load(f)
+        cached["placeholders"] = ["[Name]"]
+        with open(sidecar_path, 'w') as f:
+            json.dump(cached, f)
+        os.utime(self.template_path, ns=(0, schema.mtime + 1))
+
+        self.assertEqual(load_template_schema(self.template_path).placeholders, ["[Name]"])
+
+    def test_changed_template_is_rescanned(self):
+        load_template_schema(self.template_path)
+        doc = docx.Document()
+        doc.add_paragraph("[Name] / [Username] / [Password]")
+        doc.save(self.template_path)
+
+        schema = load_template_schema(self.template_path)
+        self.assertEqual(schema.required_fields, ["name", "username"])
+        self.assertEqual(schema.missing_fields({"name": "John"}), ["Username"])
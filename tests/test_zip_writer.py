@@ -0,0 +1,31 @@
+from test_base import TestBase
+from src.utils.zip_writer import PassthroughZipFile
+import os
+import zipfile
+
+class TestPassthroughZipFile(TestBase):
+    def setUp(self):
+        super().setUp()
+        self.source_path = os.path.join(self.test_dir, "source.zip")
+        with zipfile.ZipFile(self.source_path, 'w', zipfile.ZIP_DEFLATED) as source:
+            source.writestr("word/document.xml", "<document>" + "x" * 5000 + "</document>")
+            source.writestr("word/media/image1.png", os.urandom(2048))
+
+    def test_copy_member_keeps_compressed_bytes(self):
+        output_path = os.path.join(self.test_dir, "output.zip")
+        with zipfile.ZipFile(self.source_path) as source, \
+                PassthroughZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as output:
+            output.writestr("word/document.xml", "<document>changed</document>")
+            output.copy_member(source, source.getinfo("word/media/image1.png"))
+
+        with zipfile.ZipFile(self.source_path) as source, zipfile.ZipFile(output_path) as output:
+            self.assertIsNone(output.testzip())
+            self.assertEqual(output.read("word/document.xml"), b"<document>changed</document>")
+            self.assertEqual(
+                output.read("word/media/image1.png"),
+                source.read("word/media/image1.png")
+            )
+            self.assertEqual(
+                output.getinfo("word/media/image1.png").compress_size,
+                source.getinfo("word/media/image1.png").compress_size
+            )